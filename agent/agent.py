@@ -1,7 +1,3 @@
-import asyncio
-import queue
-import threading
-
 from langchain.agents import create_agent
 from langchain_core.messages import HumanMessage
 from langchain.agents.middleware.todo import TodoListMiddleware
@@ -10,45 +6,40 @@ from langchain.agents.middleware import ToolRetryMiddleware
 from agent.prompts import leader_agent_prompt
 from agent.prompts import todo_prompt
 
-from agent.utils.subagent_tools import call_input_parser_subagent, call_patent_searcher_subagent
-from agent.utils.subagent_tools import call_outline_generator_subagent, call_abstract_writer_subagent, call_claims_writer_subagent
-from agent.utils.subagent_tools import call_description_writer_part1_subagent, call_description_writer_part2_subagent, call_diagram_generator_subagent
-from agent.utils.subagent_tools import call_markdown_merger_subagent
-from agent.utils.subagent_tools import init_subagents
-
 from agent.utils.tools import get_filesystem_tools
 
-from agent.utils import llm_model
-from agent.utils.llm_model import update_llm_model
+from agent.pipeline import project_path
+from agent.utils.artifact_cache import ArtifactCache
+from agent.utils.tracing import TracingMiddleware, trace_scope
+
+# init_patentbot 的模型设置，run_patentbot_async_stream 创建的任务按此获取（缓存的）PatentBot
+_bot_options = {"model_name": "deepseek-chat", "use_llm_cache": False}
 
-import time
+def shoud_stop(uuid: str = None):
+    """停止生成任务：指定 uuid 时只停止该任务，否则停止所有进行中的任务
 
-leader_agent = None
+    Args:
+        uuid: 任务的项目uuid（PatentRun.uuid）
+    """
+    from agent.run_manager import run_manager
 
-finished = threading.Event()
-stopped = threading.Event()
+    if uuid is not None:
+        run_manager.stop(uuid)
+        return
+    for run in run_manager.active_runs():
+        run.stop()
 
-def shoud_stop():
-    stopped.set()
+def create_leader_agent(model, subagent_tools: list):
+    """创建 leader 代理，由它按 leader_agent_prompt 编排子代理
 
-def init_leader_agent():
-    global leader_agent
+    Args:
+        model: leader 代理使用的模型
+        subagent_tools: 调用子代理的工具
+    """
     _filesystem_tools = get_filesystem_tools()
-    _subagents_tool = [
-    call_input_parser_subagent,
-    call_patent_searcher_subagent,
-    call_outline_generator_subagent,
-    call_abstract_writer_subagent,
-    call_claims_writer_subagent,
-    call_description_writer_part1_subagent,
-    call_description_writer_part2_subagent,
-    call_diagram_generator_subagent,
-    call_markdown_merger_subagent,
-    ]
-
-    leader_agent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=_filesystem_tools + _subagents_tool,
+    return create_agent(
+        model=model,
+        tools=_filesystem_tools + list(subagent_tools),
         middleware=[
             TodoListMiddleware(
                 system_prompt=todo_prompt.sys_prompt,
@@ -56,76 +47,59 @@ def init_leader_agent():
             ),
             ToolRetryMiddleware(
                 max_retries=0,
-            )
+            ),
+            TracingMiddleware(),
         ],
     )
 
-async def _astream_call_patentbot(file_name: str):
-    timestamp = int(time.time())
-    query = f"将技术交底书 '{file_name}' 生成专利，项目的uuid为{str(timestamp)}"
+async def astream_leader(agent, file_name: str, uuid: str):
+    """由 leader 代理编排生成专利，产出 stream_mode="updates" 的数据块"""
+    query = f"将技术交底书 '{file_name}' 生成专利，项目的uuid为{uuid}"
     messages = [HumanMessage(content=query), HumanMessage(content=leader_agent_prompt.prompt)]
-    async for chunk in leader_agent.astream({"messages": messages}, stream_mode="updates"):
-        yield chunk#[(item["content"], item["status"]) for item in data.get("todos")]
+    # 项目目录由 leader 代理创建，写入追踪记录前确保目录存在
+    project_dir = project_path(uuid)
+    project_dir.mkdir(parents=True, exist_ok=True)
+    with trace_scope(project_dir=project_dir, stage="leader"):
+        async for chunk in agent.astream({"messages": messages}, stream_mode="updates"):
+            yield chunk#[(item["content"], item["status"]) for item in data.get("todos")]
+
+def start_patentbot_run(file_name: str, use_leader: bool = False, resume_uuid: str = None,
+                        use_cache: bool = False):
+    """创建并在 run_manager 中登记一次生成任务，使用 init_patentbot 设置的模型
+
+    每个任务有各自的事件流和停止信号，用 run.stream() 获取事件流，run_manager.stop(run.uuid) 只停止该任务。
 
-def run_patentbot_async_stream(file_name: str):
-    """
-    运行异步流式生成器，实时转换为同步生成器
-    
     Args:
         file_name: 文件名
-        should_stop_func: 停止检查函数，返回 True 时停止生成
+        use_leader: 是否由 leader 代理编排子代理，默认按固定流水线执行
+        resume_uuid: 续跑的项目uuid（workspace/temp_[uuid]/），设置后按流水线续跑
+        use_cache: 是否复用之前项目中输入、提示词和模型都相同的阶段输出（仅流水线模式）
+
+    Returns:
+        PatentRun
+    """
+    from agent.run_manager import get_patentbot, run_manager
+
+    bot = get_patentbot(use_leader=use_leader and not resume_uuid, **_bot_options)
+    cache = ArtifactCache() if use_cache else None
+    return run_manager.start(bot, file_name, uuid=resume_uuid, resume=resume_uuid is not None, cache=cache)
+
+def run_patentbot_async_stream(file_name: str, use_leader: bool = False, resume_uuid: str = None,
+                               use_cache: bool = False):
     """
-    # 使用队列来在线程间传递数据
-    chunk_queue = queue.Queue()
-    exception_queue = queue.Queue()
-    finished.clear()
-    stopped.clear()
-
-    async def _stream():
-        """异步流式处理函数"""
-        try:
-            async for chunk in _astream_call_patentbot(file_name):
-                chunk_queue.put(chunk)
-            finished.set()
-        except Exception as e:
-            exception_queue.put(e)
-    
-    async def _run_async():
-        task = asyncio.create_task(_stream())
-        while not finished.is_set() and not stopped.is_set():
-            await asyncio.sleep(0)
-        if stopped.is_set():
-            task.cancel()
-        
-    
-    def _main_async():
-        asyncio.run(_run_async())
-    
-    # 在后台线程中运行异步函数
-    thread = threading.Thread(target=_main_async, daemon=True)
-    thread.start()
-    
-    # 实时 yield 队列中的数据
-    while not finished.is_set() or not chunk_queue.empty():
-        try:
-            # 非阻塞获取数据，超时时间 0.1 秒
-            chunk = chunk_queue.get(timeout=0.1)
-            yield chunk
-        except queue.Empty:
-            # 如果队列为空，检查是否有异常
-            if not exception_queue.empty():
-                raise exception_queue.get()
-            # 如果已停止，退出循环
-            if stopped.is_set():
-                break
-            # 继续等待
-            time.sleep(0.05)
-
-def init_patentbot(model_name: str = "deepseek-chat"):
-    update_llm_model(model_name)
-    init_leader_agent()
-    init_subagents()
+    运行异步流式生成器，实时转换为同步生成器
+
+    事件流在任务自己的后台线程中运行；shoud_stop(uuid) 或 run_manager.stop(uuid) 立即结束该任务的迭代，
+    参数同 start_patentbot_run
+    """
+    yield from start_patentbot_run(file_name, use_leader, resume_uuid, use_cache).stream()
+
+def init_patentbot(model_name: str = "deepseek-chat", use_leader: bool = False, use_llm_cache: bool = False):
+    """设置 run_patentbot_async_stream 使用的模型，并预先创建模型及代理（API Key 从环境变量读取）"""
+    from agent.run_manager import get_patentbot
 
+    _bot_options.update(model_name=model_name, use_llm_cache=use_llm_cache)
+    get_patentbot(use_leader=use_leader, **_bot_options)
 
 if __name__ == "__main__":
-    ...
\ No newline at end of file
+    ...
@@ -0,0 +1,162 @@
+"""批量生成专利
+
+用法（在项目目录下运行）:
+    python -m agent.batch workspace/data/ --model deepseek-chat --jobs 2
+    python -m agent.batch "workspace/data/*.docx" --jobs 4 --cache
+"""
+import argparse
+import asyncio
+import glob
+import logging
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from agent.pipeline import WORKSPACE_DIR, project_path
+from agent.run_manager import PatentBot, PatentRun, get_llm_cache
+from agent.utils.artifact_cache import ArtifactCache
+
+# 与 ui/app.py 中允许上传的文件类型一致
+SUPPORTED_SUFFIXES = (".docx", ".doc", ".txt", ".md")
+
+
+def collect_files(pattern: str) -> list[Path]:
+    """收集待处理的技术交底书
+
+    Args:
+        pattern: 目录或 glob 模式
+    """
+    path = Path(pattern)
+    if path.is_dir():
+        candidates = path.iterdir()
+    else:
+        candidates = (Path(item) for item in glob.glob(pattern))
+    return sorted(item.resolve() for item in candidates if item.is_file() and item.suffix.lower() in SUPPORTED_SUFFIXES)
+
+
+def _job_logger(uuid: str, log_file: Path) -> logging.Logger:
+    logger = logging.getLogger(f"patentbot.batch.{uuid}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.FileHandler(log_file, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+
+async def run_job(bot: PatentBot, file_path: Path, uuid: str, semaphore: asyncio.Semaphore, **run_kwargs) -> dict:
+    """在并发上限内生成一篇专利，日志写入 temp_[uuid]/run.log
+
+    Returns:
+        任务结果：文件、uuid、状态、耗时、token用量
+    """
+    result = {"file": file_path.name, "uuid": uuid, "status": "failed", "seconds": 0.0,
+              "input_tokens": 0, "output_tokens": 0}
+    async with semaphore:
+        start = time.perf_counter()
+        project_dir = project_path(uuid)
+        project_dir.mkdir(parents=True, exist_ok=True)
+        logger = _job_logger(uuid, project_dir / "run.log")
+        logger.info("开始生成: %s", file_path)
+        todos = []
+        try:
+            with get_usage_metadata_callback() as usage:
+                async for chunk in PatentRun(bot, str(file_path), uuid=uuid, **run_kwargs).astream():
+                    if chunk.get("tools"):
+                        todos = chunk["tools"]["todos"]
+                        logger.info("任务进展: %s", "，".join(f"{item['content']}[{item['status']}]" for item in todos))
+                    if chunk.get("model"):
+                        logger.info("结果:\n%s", chunk["model"]["messages"][-1].content)
+            for metadata in usage.usage_metadata.values():
+                result["input_tokens"] += metadata.get("input_tokens", 0)
+                result["output_tokens"] += metadata.get("output_tokens", 0)
+            if todos and all(item["status"] == "completed" for item in todos):
+                result["status"] = "completed"
+        except Exception:
+            logger.exception("生成失败")
+        finally:
+            result["seconds"] = time.perf_counter() - start
+            logger.info("结束: %s，耗时 %.1f 秒", result["status"], result["seconds"])
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+    return result
+
+
+def format_summary(results: list[dict]) -> str:
+    """生成任务汇总表（Markdown）"""
+    lines = [
+        "| 文件 | uuid | 状态 | 耗时（秒） | 输入tokens | 输出tokens |",
+        "| --- | --- | --- | --- | --- | --- |",
+    ]
+    for item in results:
+        lines.append(
+            f"| {item['file']} | {item['uuid']} | {item['status']} | {item['seconds']:.1f} "
+            f"| {item['input_tokens']} | {item['output_tokens']} |"
+        )
+    completed = sum(1 for item in results if item["status"] == "completed")
+    lines.append("")
+    lines.append(f"共 {len(results)} 个任务，成功 {completed} 个，失败 {len(results) - completed} 个")
+    return "\n".join(lines)
+
+
+async def run_batch(bot: PatentBot, files: list[Path], jobs: int = 2, **run_kwargs) -> list[dict]:
+    """以并发上限 jobs 批量生成专利，每个任务使用独立的 temp_[uuid]/"""
+    semaphore = asyncio.Semaphore(max(jobs, 1))
+    timestamp = int(time.time())
+    return await asyncio.gather(*(
+        run_job(bot, file_path, f"{timestamp}_{index}", semaphore, **run_kwargs)
+        for index, file_path in enumerate(files)
+    ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量将技术交底书生成专利")
+    parser.add_argument("source", nargs="?", default=str(WORKSPACE_DIR / "data"), help="技术交底书目录或 glob 模式")
+    parser.add_argument("--model", default="deepseek-chat", help="模型：deepseek-chat、gpt-5、gpt-5-mini")
+    parser.add_argument("--jobs", type=int, default=2, help="同时生成的专利数")
+    parser.add_argument("--stage-concurrency", type=int, default=2, help="单个专利内同时执行的阶段数")
+    parser.add_argument("--max-retries", type=int, default=5, help="每个阶段重新委托任务的最大次数")
+    parser.add_argument("--cache", action="store_true", help="复用之前项目中输入、提示词和模型都相同的阶段输出")
+    parser.add_argument("--llm-cache", action="store_true", help="缓存模型响应，相同的请求直接返回之前的响应")
+    parser.add_argument("--long-writer", action="store_true", help="按章节分段撰写说明书，输出被截断时从截断处续写")
+    parser.add_argument("--fan-out", type=int, default=1,
+                        help="具体实施方式中同时撰写的实施例数，大于1时同时启用--long-writer")
+    parser.add_argument("--parallel-figures", action="store_true", help="并行生成各附图，每个附图只附带对应实施例的内容")
+    parser.add_argument("--agent-merge", action="store_true",
+                        help="由 markdown_merger 子代理合并完整专利并撰写评审报告（默认在本地合并、计算指标）")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    files = collect_files(args.source)
+    if not files:
+        print(f"没有找到技术交底书: {args.source}", file=sys.stderr)
+        return 1
+
+    bot = PatentBot(model_name=args.model, llm_cache=get_llm_cache() if args.llm_cache else None,
+                    long_writer=args.long_writer, fan_out=args.fan_out,
+                    parallel_figures=args.parallel_figures, local_merge=not args.agent_merge)
+    results = asyncio.run(run_batch(
+        bot,
+        files,
+        jobs=args.jobs,
+        max_retries=args.max_retries,
+        max_concurrency=args.stage_concurrency,
+        cache=ArtifactCache() if args.cache else None,
+    ))
+
+    summary = format_summary(results)
+    summary_file = WORKSPACE_DIR / f"batch_{int(time.time())}.md"
+    summary_file.write_text(summary + "\n", encoding="utf-8")
+    print(summary)
+    print(f"\n汇总表已保存: {summary_file}")
+    if bot.llm_cache is not None:
+        print("模型响应缓存: 命中 {hits} 次，未命中 {misses} 次".format(**bot.llm_cache.stats()))
+    return 0 if all(item["status"] == "completed" for item in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import asyncio
+import re
+import time
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from agent.long_writer import DESCRIPTION, call_file_tool, message_text
+from agent.pipeline import Stage
+from agent.prompts import figure_writer_prompt
+from agent.utils.mermaid_validator import format_issues, validate_mermaid
+from agent.utils.patent_text import drawing_lines, embodiment_excerpts, find_section
+from agent.utils.subagent_tools import SUBAGENT_TEMPERATURES
+from agent.utils.tools import aget_filesystem_tools, aget_learn_skills_tools
+from agent.utils.tracing import record_span
+
+FIGURES = "04_content/figures.md"
+
+# 生成附图前检索的技能（与 diagram_generator 提示词中的检索词一致）
+SKILL_QUERIES = ("附图 基本要求 附图标记", "flowchart node shapes links subgraph", "sequenceDiagram participants messages")
+
+# 找不到对应实施例时，附带的具体实施方式的最大字数
+_MAX_EXCERPT_CHARS = 4000
+
+_MERMAID = re.compile(r"```mermaid\s*\n(.*?)```", re.DOTALL)
+
+
+def _excerpt(description: str, excerpts: dict, number: str) -> str:
+    """返回图号对应的实施例内容，找不到"如图N所示"时退回到提及该图的段落或具体实施方式开头"""
+    if number in excerpts:
+        return excerpts[number]
+    section = find_section(description, "具体实施方式") or ""
+    mentions = [item.strip() for item in re.split(r"\n\s*\n", section) if re.search(rf"图\s*{number}(?!\d)", item)]
+    return "\n\n".join(mentions) or section.strip()[:_MAX_EXCERPT_CHARS]
+
+
+def _mermaid_block(text: str) -> str:
+    """取出模型输出中的 mermaid 代码块内容，没有代码块时使用整个输出"""
+    match = _MERMAID.search(text)
+    return (match.group(1) if match else re.sub(r"^```\w*\s*$", "", text, flags=re.MULTILINE)).strip()
+
+
+def merge_figures(blocks: list[tuple[str, str]]) -> str:
+    """按图号顺序合并为说明书附图
+
+    Args:
+        blocks: (图号, mermaid 图表内容) 列表
+    """
+    parts = ["# 说明书附图"]
+    for number, block in blocks:
+        parts.append(f"```mermaid\n{block}\n```\n图{number}")
+    return "\n\n".join(parts) + "\n"
+
+
+class FigureWriter:
+    """并行生成说明书附图，代替 diagram_generator 子代理
+
+    先从附图说明中取出附图列表，每个附图只附带具体实施方式中对应实施例的内容，各附图同时调用模型生成
+    mermaid 图表（最多 max_concurrency 个并行），耗时取决于最慢的附图而不是所有附图之和；
+    完成后按图号顺序合并写入 figures.md。
+    每个图表生成后先在本地校验，有错误时只把该附图的错误行发回模型修改（最多 max_repairs 次）。
+    """
+
+    stages = ("diagram_generator",)
+    prompt = figure_writer_prompt.prompt + figure_writer_prompt.figure_prompt
+
+    def __init__(self, models: dict, max_concurrency: int = 8, max_repairs: int = 2):
+        """
+        Args:
+            models: 温度档位 -> 模型，如 {"low": llm_temp_low, "high": llm_temp_high}
+            max_concurrency: 同时生成的附图数
+            max_repairs: 每个图表校验不通过时修改的最大次数
+        """
+        self.models = models
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_repairs = max_repairs
+        self._skills = None
+
+    async def write(self, stage: Stage, project_dir: Path, problems: list[str] = None) -> list[dict]:
+        """生成阶段的输出文件 figures.md
+
+        Args:
+            problems: 上一次输出未通过检查的问题（附图阶段没有内容检查，不使用）
+
+        Returns:
+            每次模型调用的记录：图号、修改序号、字数、耗时、校验错误数
+        """
+        description = (project_dir / DESCRIPTION).read_text(encoding="utf-8")
+        drawings = drawing_lines(description)
+        if not drawings:
+            raise RuntimeError("说明书中没有找到附图说明")
+        excerpts = embodiment_excerpts(description)
+        model = self.models[SUBAGENT_TEMPERATURES[stage.name]]
+        system = SystemMessage(content=figure_writer_prompt.prompt.format(skills=await self._load_skills()))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        records = []
+
+        async def generate(number: str, drawing: str) -> str:
+            messages = [system, HumanMessage(content=figure_writer_prompt.figure_prompt.format(
+                drawing=drawing, excerpt=_excerpt(description, excerpts, number),
+            ))]
+            async with semaphore:
+                for repair in range(self.max_repairs + 1):
+                    start = time.perf_counter()
+                    response = await model.ainvoke(messages)
+                    block = _mermaid_block(message_text(response.content))
+                    errors = [issue for issue in validate_mermaid(block, figure=number) if issue.level == "error"]
+                    usage = response.usage_metadata or {}
+                    record = {
+                        "type": "chunk",
+                        "name": f"figure_{number}",
+                        "start": time.time() - (time.perf_counter() - start),
+                        "continuation": repair,
+                        "chars": len(block),
+                        "duration_ms": (time.perf_counter() - start) * 1000,
+                        "finish_reason": response.response_metadata.get("finish_reason"),
+                        "input_tokens": usage.get("input_tokens", 0),
+                        "output_tokens": usage.get("output_tokens", 0),
+                        "errors": len(errors),
+                    }
+                    record_span(record)
+                    records.append(record)
+                    if not errors:
+                        break
+                    messages = messages + [
+                        AIMessage(content=f"```mermaid\n{block}\n```"),
+                        HumanMessage(content=figure_writer_prompt.repair_prompt.format(issues=format_issues(errors))),
+                    ]
+                return block
+
+        blocks = await asyncio.gather(*(generate(number, drawing) for number, drawing in drawings))
+        tools = {item.name: item for item in await aget_filesystem_tools()}
+        content = merge_figures([(number, block) for (number, _), block in zip(drawings, blocks)])
+        await call_file_tool(tools["write_file"], {"path_to_file": str(project_dir / FIGURES), "content": content})
+        return records
+
+    async def _load_skills(self) -> str:
+        """检索一次画图技能，所有附图共用"""
+        if self._skills is None:
+            tools = {item.name: item for item in await aget_learn_skills_tools()}
+            results = await asyncio.gather(*(tools["search_skills"].ainvoke({"query": query}) for query in SKILL_QUERIES))
+            self._skills = "\n\n---\n\n".join(message_text(item) for item in results)
+        return self._skills
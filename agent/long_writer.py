@@ -0,0 +1,457 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from agent.pipeline import FILE_TITLES, Stage, resolve_file
+from agent.prompts import long_writer_prompt
+from agent.utils.claim_support import FeatureCoverage, claim_coverage, low_coverage
+from agent.utils.outline_metrics import GATE_TOLERANCE, OUTLINE, SectionMetric, format_target, measure, parse_targets
+from agent.utils.patent_text import drawing_lines
+from agent.utils.subagent_tools import SUBAGENT_TEMPERATURES
+from agent.utils.tools import aget_filesystem_tools
+from agent.utils.tracing import record_span
+
+# 可以分段撰写的阶段
+LONG_WRITER_STAGES = ("description_writer_part1", "description_writer_part2")
+
+DESCRIPTION = "04_content/description.md"
+CLAIMS = "04_content/claims.md"
+
+# 记录各阶段已完成的段落，中断或截断后从最后完成的位置继续；阶段完成后保留记录，输入不变时重新执行不再重写
+PROGRESS_FILE = "long_writer.json"
+
+# 第一部分有字数要求的章节 -> 对应的段落
+_CHAPTER_KEYS = {
+    "技术领域": ["technical_field"],
+    "背景技术": ["background"],
+    "发明内容": ["summary_problem", "summary_solution", "summary_effects"],
+}
+
+# 撰写每段时附带的已写内容（末尾）的字数
+_WRITTEN_TAIL_CHARS = 3000
+# 续写时附带的截断处之前的字数
+_CONTINUE_TAIL_CHARS = 500
+
+_FENCE = re.compile(r"^\s*(```|''')[a-z]*\s*$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class Section:
+    """分段撰写的一段
+
+    Attributes:
+        key: 段落标识，记录在进度文件中
+        heading: 段落开头写入的标题，为空时不写标题
+        instruction: 本段的撰写任务
+    """
+    key: str
+    heading: str | None
+    instruction: str
+
+
+def part1_sections() -> list[Section]:
+    """说明书第一部分：技术领域、背景技术、发明内容（分三段）、附图说明"""
+    return [
+        Section("technical_field", "# 专利说明书\n\n## 技术领域", "撰写专利说明书的技术领域。"),
+        Section("background", "## 背景技术", "参考'现有技术分析报告'，撰写专利说明书的背景技术。"),
+        Section(
+            "summary_problem", "## 发明内容",
+            "撰写发明内容的第一部分：本发明要解决的技术问题及发明目的。"
+            "发明内容共分三部分撰写，总字数2500-4000字，本部分约500字。",
+        ),
+        Section(
+            "summary_solution", None,
+            "撰写发明内容的第二部分：技术方案，与权利要求书的各项权利要求逐一对应，约1500-2500字。",
+        ),
+        Section("summary_effects", None, "撰写发明内容的第三部分：有益效果，约500-1000字。"),
+        Section(
+            "drawings", "## 附图说明",
+            "撰写附图说明，根据具体实施方式需要的实施例确定附图，每一个附图使用一句话说明（如\"图1为……的流程图\"），"
+            "不要描述具体内容，每个附图单独一行。",
+        ),
+    ]
+
+
+def part2_sections(description: str) -> list[Section]:
+    """说明书第二部分：具体实施方式的开头、每个附图对应的实施例、结尾
+
+    Args:
+        description: 已完成第一部分的说明书，根据其中的附图说明确定实施例
+    """
+    sections = [Section(
+        "embodiment_opening", "## 具体实施方式",
+        "撰写具体实施方式的开头，简洁明了，不要描述具体内容，字数不超过100字。",
+    )]
+    drawings = drawing_lines(description)
+    for number, line in drawings:
+        sections.append(Section(
+            f"embodiment_{number}", None,
+            f"撰写图{number}对应的实施例（1500-2000字），附图说明为：{line}\n"
+            f"以\"如图{number}所示\"开头，描述整体流程/系统模块/技术细节/操作步骤/装置结构等，"
+            f"步骤编号或模块编号为{number}01、{number}02……",
+        ))
+    if not drawings:
+        sections.append(Section(
+            "embodiment_1", None,
+            "根据'专利权利要求书'撰写具体实施方式的实施例（1500-2000字），使用步骤编号或模块编号描述。",
+        ))
+    sections.append(Section(
+        "embodiment_ending", None,
+        "撰写具体实施方式的结尾，简洁明了，不要描述具体内容，字数不超过200字。",
+    ))
+    return sections
+
+
+def supplement_section(features: list[FeatureCoverage]) -> Section:
+    """补充实施例：只说明在已写好的具体实施方式中支持不足的技术特征"""
+    items = "\n".join(f"- 权利要求{feature.claim}：{feature.text}" for feature in features)
+    return Section(
+        "embodiment_supplement", None,
+        "以下权利要求的技术特征在已写好的具体实施方式中描述不足，撰写一段补充说明，"
+        f"结合已写好的实施例逐一详细说明这些特征的实现方式（每个特征100-300字），不要重复已写好的内容：\n{items}",
+    )
+
+
+def expansion_section(metric: SectionMetric) -> Section:
+    """补充具体实施方式：字数不足时在结尾之前补充一段，不重写已写好的实施例"""
+    return Section(
+        "embodiment_expansion", None,
+        f"具体实施方式共{metric.count}字，要求{format_target(metric.target)}，{metric.advice()}。"
+        f"撰写一段补充（约{-metric.deviation}字），结合已写好的实施例补充可选的实施方式、参数选择、异常处理等细节，"
+        "不要重复已写好的内容。",
+    )
+
+
+def revision_section(key: str, heading: str | None, metric: SectionMetric, text: str) -> Section:
+    """按字数偏差修改已写好的一段：只补充或删减这一段，不改变其余章节"""
+    return Section(
+        key, heading,
+        f"{metric.section}共{metric.count}字，要求{format_target(metric.target)}，{metric.advice()}。"
+        f"修改以下已写好的内容（只修改这部分），保持术语、步骤编号和模块编号不变，输出修改后的完整内容：\n\n{text}",
+    )
+
+
+def _clean(text: str, heading: str | None) -> str:
+    text = _FENCE.sub("", text).strip()
+    # 模型有时会重复输出标题
+    if heading:
+        title = heading.splitlines()[-1].strip()
+        if text.startswith(title):
+            text = text[len(title):].lstrip()
+    return text
+
+
+def message_text(content) -> str:
+    """返回模型消息或工具结果中的文本"""
+    if isinstance(content, str):
+        return content
+    return "".join(item.get("text", "") if isinstance(item, dict) else str(item) for item in content)
+
+
+async def call_file_tool(tool, arguments: dict):
+    """调用 filesystem 的写文件工具，失败时抛出 RuntimeError"""
+    result = await tool.ainvoke(arguments)
+    text = message_text(result)
+    if "成功" not in text:
+        raise RuntimeError(f"{tool.name} 失败: {text}")
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LongWriter:
+    """分段撰写说明书，代替 description_writer_part1/part2 子代理
+
+    按章节（第二部分按附图对应的实施例）逐段调用模型，每段写完后用 append_file 工具追加到说明书；
+    模型输出因长度限制被截断（finish_reason 为 length）时，保留已输出的内容并从截断处续写，
+    截断只需重写一段而不是整个阶段。已完成的段落记录在项目目录的 long_writer.json 中，阶段重新执行时从中断处继续；
+    阶段已经完成且输入没有变化时（如第二部分中断后续跑，第一部分被重新执行）不再重写。
+
+    fan_out 大于 1 时，第二部分的各段（开头、各实施例、结尾）同时撰写，最多 fan_out 段并行，
+    各段只参考开始撰写时已写好的内容，完成后仍按附图顺序依次追加，输出与并行度及完成顺序无关。
+
+    第二部分在追加结尾之前计算各权利要求特征在说明书中的支持度，只为支持不足的特征补充一段说明。
+    流水线检查未通过而重新执行时不重写整个阶段，只修改有问题的部分：仍有支持不足的特征时，在结尾之前再补充一段；
+    章节字数偏差过大时，第一部分只重写该章节，具体实施方式不足时在结尾之前补充一段，过长时精简最长的实施例。
+    """
+
+    stages = LONG_WRITER_STAGES
+    prompt = long_writer_prompt.prompt
+
+    def __init__(self, models: dict, max_continuations: int = 3, fan_out: int = 1):
+        """
+        Args:
+            models: 温度档位 -> 模型，如 {"low": llm_temp_low, "high": llm_temp_high}
+            max_continuations: 每段因截断续写的最大次数
+            fan_out: 第二部分同时撰写的段数，为 1 时逐段撰写
+        """
+        self.models = models
+        self.max_continuations = max_continuations
+        self.fan_out = max(1, fan_out)
+
+    async def write(self, stage: Stage, project_dir: Path, problems: list[str] = None) -> list[dict]:
+        """分段撰写阶段的输出文件
+
+        Args:
+            stage: 阶段
+            project_dir: 项目目录
+            problems: 上一次输出未通过检查的问题，阶段已完成时只修改有问题的部分
+
+        Returns:
+            每次模型调用的记录：段落、续写序号、字数、耗时、结束原因
+        """
+        tools = {item.name: item for item in await aget_filesystem_tools()}
+        target = project_dir / DESCRIPTION
+        context = self._context(stage, project_dir)
+        content = self._restore(stage, project_dir, target, _sha256("\n\n".join(message.content for message in context)))
+        progress = self._load_progress(project_dir)[stage.name]
+        if progress.get("complete"):
+            return await self._revise(stage, project_dir, tools, context, content, progress) if problems else []
+        await call_file_tool(tools["write_file"], {"path_to_file": str(target), "content": content})
+
+        if stage.name == "description_writer_part1":
+            sections = part1_sections()
+        else:
+            sections = part2_sections(content)
+        model = self.models[SUBAGENT_TEMPERATURES[stage.name]]
+        pending = [section for section in sections if section.key not in progress["done"]]
+        # 第一部分的各章节前后衔接，只有第二部分并行撰写
+        width = self.fan_out if stage.name == "description_writer_part2" else 1
+        chunks = []
+        tasks = {}
+
+        async def append(key: str, text: str):
+            nonlocal content
+            if content.strip():
+                text = "\n\n" + text
+            await call_file_tool(tools["append_file"], {"path_to_file": str(target), "content": text})
+            content += text
+            progress["done"].append(key)
+            progress["lengths"][key] = len(text)
+            progress["length"] = len(content)
+            progress["hash"] = _sha256(content)
+            self._save_progress(project_dir, stage.name, progress)
+
+        try:
+            for index, section in enumerate(pending):
+                # 本段及其后 width - 1 段同时撰写，各段只参考开始撰写时已写好的内容
+                for ahead in pending[index:index + width]:
+                    if ahead.key not in tasks:
+                        tasks[ahead.key] = asyncio.create_task(self._generate(model, context, ahead, content, chunks))
+                text = await tasks.pop(section.key)
+                supplement = self._supplement(project_dir, content) if section.key == "embodiment_ending" else None
+                if supplement and supplement.key not in progress["done"]:
+                    # 结尾之前，只为说明书支持不足的权利要求特征补充一段
+                    await append(supplement.key, await self._generate(model, context, supplement, content, chunks))
+                await append(section.key, text)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        progress["complete"] = True
+        self._save_progress(project_dir, stage.name, progress)
+        return chunks
+
+    async def _revise(self, stage: Stage, project_dir: Path, tools: dict, context: list, content: str,
+                      progress: dict) -> list[dict]:
+        """修改已完成的阶段输出中未通过检查的部分，不重写整个阶段
+
+        - 第二部分仍有支持不足的权利要求特征时，在结尾之前为这些特征再补充一段
+        - 字数偏差超过 GATE_TOLERANCE 的章节（只按大纲中给出的要求）：第一部分只重写该章节；
+          具体实施方式不足时在结尾之前补充一段，过长时精简最长的实施例
+
+        Returns:
+            每次模型调用的记录
+        """
+        model = self.models[SUBAGENT_TEMPERATURES[stage.name]]
+        chunks = []
+        revised = content
+        part2 = stage.name == "description_writer_part2"
+        if part2 and "embodiment_ending" in progress["done"]:
+            start, _ = self._span(progress, ["embodiment_ending"])
+            supplement = self._supplement(project_dir, revised[:start])
+            if supplement:
+                supplement = replace(supplement, key=self._new_key(progress, supplement.key))
+                text = await self._generate(model, context, supplement, revised[:start], chunks)
+                revised = self._insert(revised, progress, "embodiment_ending", supplement.key, text)
+
+        outline = project_dir / OUTLINE
+        targets = parse_targets(outline.read_text(encoding="utf-8", errors="ignore") if outline.is_file() else "")
+        sections = ("具体实施方式",) if part2 else tuple(_CHAPTER_KEYS)
+        for metric in measure({DESCRIPTION: revised}, targets, sections):
+            if metric.source != "大纲" or metric.within(GATE_TOLERANCE):
+                continue
+            if not part2:
+                keys = [key for key in _CHAPTER_KEYS[metric.section] if key in progress["done"]]
+            elif metric.deviation < 0 and "embodiment_ending" in progress["done"]:
+                start, _ = self._span(progress, ["embodiment_ending"])
+                expansion = expansion_section(metric)
+                expansion = replace(expansion, key=self._new_key(progress, expansion.key))
+                text = await self._generate(model, context, expansion, revised[:start], chunks)
+                revised = self._insert(revised, progress, "embodiment_ending", expansion.key, text)
+                continue
+            else:
+                # 过长时精简最长的实施例
+                embodiments = [key for key in progress["done"] if key not in ("embodiment_opening", "embodiment_ending")]
+                keys = [max(embodiments, key=progress["lengths"].get)] if embodiments else []
+            if not keys:
+                continue
+            start, end = self._span(progress, keys)
+            heading = next((section.heading for section in part1_sections() if section.key == keys[0]), None)
+            old = revised[start:end].strip()
+            if heading and old.startswith(heading):
+                old = old[len(heading):].strip()
+            text = await self._generate(model, context, revision_section(keys[0], heading, metric, old),
+                                        revised[:start], chunks)
+            revised = self._replace(revised, progress, keys, text)
+
+        if revised != content:
+            target = project_dir / DESCRIPTION
+            await call_file_tool(tools["write_file"], {"path_to_file": str(target), "content": revised})
+            progress["hash"] = _sha256(revised[:progress["length"]])
+            self._save_progress(project_dir, stage.name, progress)
+        return chunks
+
+    @staticmethod
+    def _span(progress: dict, keys: list[str]) -> tuple[int, int]:
+        """连续的几段在说明书中的位置 (开始, 结束)，包括段落前的空行"""
+        start = progress["length"] - sum(progress["lengths"].values())
+        for key in progress["done"]:
+            if key == keys[0]:
+                break
+            start += progress["lengths"][key]
+        return start, start + sum(progress["lengths"][key] for key in keys)
+
+    @staticmethod
+    def _new_key(progress: dict, key: str) -> str:
+        """重新执行时追加的段落的标识，与已有的段落不重复"""
+        return f"{key}_{sum(done.startswith(key) for done in progress['done']) + 1}"
+
+    def _replace(self, content: str, progress: dict, keys: list[str], text: str) -> str:
+        """把连续的几段替换为 text，更新进度中的长度（替换后的内容记在第一段）"""
+        start, end = self._span(progress, keys)
+        if content[:start].strip():
+            text = "\n\n" + text
+        progress["lengths"].update({key: 0 for key in keys})
+        progress["lengths"][keys[0]] = len(text)
+        progress["length"] += len(text) - (end - start)
+        return content[:start] + text + content[end:]
+
+    def _insert(self, content: str, progress: dict, before: str, key: str, text: str) -> str:
+        """在 before 段之前插入一段，更新进度中的段落及长度"""
+        start, _ = self._span(progress, [before])
+        text = "\n\n" + text
+        progress["done"].insert(progress["done"].index(before), key)
+        progress["lengths"][key] = len(text)
+        progress["length"] += len(text)
+        return content[:start] + text + content[start:]
+
+    @staticmethod
+    def _supplement(project_dir: Path, written: str) -> Section | None:
+        """已写好的说明书中有支持不足的权利要求特征时，返回只说明这些特征的补充段落"""
+        claims = project_dir / CLAIMS
+        if not claims.is_file():
+            return None
+        features = low_coverage(claim_coverage(claims.read_text(encoding="utf-8", errors="ignore"), written))
+        return supplement_section(features) if features else None
+
+    async def _generate(self, model, context: list, section: Section, written: str, chunks: list) -> str:
+        """撰写一段（含标题），输出被截断时从截断处续写"""
+        messages = context + [HumanMessage(content=long_writer_prompt.section_prompt.format(
+            written=written[-_WRITTEN_TAIL_CHARS:], instruction=section.instruction,
+        ))]
+        text = f"{section.heading}\n\n" if section.heading else ""
+        for continuation in range(self.max_continuations + 1):
+            start = time.perf_counter()
+            response = await model.ainvoke(messages)
+            chunk = _clean(message_text(response.content), section.heading if continuation == 0 else None)
+            finish_reason = response.response_metadata.get("finish_reason")
+            text += chunk
+            usage = response.usage_metadata or {}
+            record = {
+                "type": "chunk",
+                "name": section.key,
+                "start": time.time() - (time.perf_counter() - start),
+                "continuation": continuation,
+                "chars": len(chunk),
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "finish_reason": finish_reason,
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0),
+            }
+            record_span(record)
+            chunks.append(record)
+            if finish_reason != "length":
+                break
+            messages = messages + [HumanMessage(content=long_writer_prompt.continue_prompt.format(
+                tail=text[-_CONTINUE_TAIL_CHARS:],
+            ))]
+        return text
+
+    def _context(self, stage: Stage, project_dir: Path) -> list:
+        documents = []
+        for name in stage.inputs:
+            if name == DESCRIPTION:
+                # 已写好的说明书随每段任务附带
+                continue
+            path = resolve_file(project_dir, name)
+            title = stage.input_titles.get(name, FILE_TITLES[name])
+            documents.append(f"# {title}\n\n{path.read_text(encoding='utf-8', errors='ignore')}")
+        return [SystemMessage(content=self.prompt), HumanMessage(content="\n\n".join(documents))]
+
+    def _restore(self, stage: Stage, project_dir: Path, target: Path, inputs: str) -> str:
+        """返回续写前说明书应有的内容，并初始化本阶段的进度
+
+        进度记录与输入及文件内容一致时：阶段已完成则保留文件内容（其后可能是下一阶段写了一半的内容），
+        否则去掉最后完成的段落之后的内容（中断时写了一半的段落）；
+        不一致时重新开始：第一部分从空文件开始，第二部分保留'具体实施方式'之前的内容。
+
+        Args:
+            inputs: 输入文件及提示词的哈希，与进度记录中的不同时重新开始
+        """
+        content = target.read_text(encoding="utf-8") if target.is_file() else ""
+        progress = self._load_progress(project_dir).get(stage.name)
+        if (progress and progress.get("inputs") == inputs and len(content) >= progress["length"]
+                and _sha256(content[:progress["length"]]) == progress["hash"]):
+            return content if progress.get("complete") else content[:progress["length"]]
+
+        if stage.name == "description_writer_part1":
+            content = ""
+        else:
+            match = re.search(r"^##\s*具体实施方式", content, re.MULTILINE)
+            if match:
+                content = content[:match.start()]
+            content = content.rstrip()
+        self._save_progress(project_dir, stage.name, {
+            "done": [], "lengths": {}, "length": len(content), "hash": _sha256(content), "inputs": inputs,
+            "complete": False,
+        })
+        return content
+
+    @staticmethod
+    def _load_progress(project_dir: Path) -> dict:
+        path = project_dir / PROGRESS_FILE
+        if not path.is_file():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    def _save_progress(self, project_dir: Path, stage_name: str, progress: dict | None):
+        data = self._load_progress(project_dir)
+        if progress is None:
+            data.pop(stage_name, None)
+        else:
+            data[stage_name] = progress
+        path = project_dir / PROGRESS_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(path)
@@ -0,0 +1,82 @@
+import time
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from agent.long_writer import call_file_tool, message_text
+from agent.pipeline import Stage
+from agent.prompts import review_writer_prompt
+from agent.utils.patent_merger import (
+    ABSTRACT, COMPLETE_PATENT, SUMMARY_REPORT, checks_table, compute_checks, flagged_excerpts, merge_patent,
+)
+from agent.utils.patent_text import find_section
+from agent.utils.subagent_tools import SUBAGENT_TEMPERATURES
+from agent.utils.tools import aget_filesystem_tools
+from agent.utils.tracing import record_span
+
+
+def build_report(table: str, review: str) -> str:
+    """专利评审报告：本地计算的指标检查表 + 模型撰写的评审意见"""
+    return f"# 专利评审报告\n\n## 指标检查\n\n{table}\n\n{review.strip()}\n"
+
+
+class MergeWriter:
+    """在本地合并完整专利并计算指标，代替 markdown_merger 子代理
+
+    合并按固定顺序直接拼接文件；章节完整性、权利要求编号、附图编号、字数等检查在本地计算，
+    模型只收到指标表及未通过检查项的原文片段，撰写评审意见，不再读入整篇专利。
+    """
+
+    stages = ("markdown_merger",)
+    prompt = review_writer_prompt.prompt + review_writer_prompt.review_prompt
+
+    def __init__(self, models: dict):
+        """
+        Args:
+            models: 温度档位 -> 模型，如 {"low": llm_temp_low, "high": llm_temp_high}
+        """
+        self.models = models
+
+    async def write(self, stage: Stage, project_dir: Path, problems: list[str] = None) -> list[dict]:
+        """生成阶段的输出文件 complete_patent.md、summary_report.md
+
+        Args:
+            problems: 上一次输出未通过检查的问题（合并阶段没有内容检查，不使用）
+
+        Returns:
+            模型调用的记录
+        """
+        tools = {item.name: item for item in await aget_filesystem_tools()}
+        await call_file_tool(tools["write_file"], {
+            "path_to_file": str(project_dir / COMPLETE_PATENT), "content": merge_patent(project_dir),
+        })
+
+        checks = compute_checks(project_dir)
+        table = checks_table(checks)
+        title = find_section((project_dir / ABSTRACT).read_text(encoding="utf-8", errors="ignore"), "发明名称", 1)
+        model = self.models[SUBAGENT_TEMPERATURES[stage.name]]
+        start = time.perf_counter()
+        response = await model.ainvoke([
+            SystemMessage(content=review_writer_prompt.prompt),
+            HumanMessage(content=review_writer_prompt.review_prompt.format(
+                title=(title or "").strip(), table=table, excerpts=flagged_excerpts(checks) or "无",
+            )),
+        ])
+        review = message_text(response.content)
+        usage = response.usage_metadata or {}
+        record = {
+            "type": "chunk",
+            "name": "summary_report",
+            "start": time.time() - (time.perf_counter() - start),
+            "continuation": 0,
+            "chars": len(review),
+            "duration_ms": (time.perf_counter() - start) * 1000,
+            "finish_reason": response.response_metadata.get("finish_reason"),
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+        }
+        record_span(record)
+        await call_file_tool(tools["write_file"], {
+            "path_to_file": str(project_dir / SUMMARY_REPORT), "content": build_report(table, review),
+        })
+        return [record]
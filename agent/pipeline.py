@@ -0,0 +1,704 @@
+import asyncio
+import hashlib
+import json
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from langchain_core.messages import AIMessage
+
+from agent.utils.subagent_tools import call_input_parser_subagent, call_patent_searcher_subagent
+from agent.utils.subagent_tools import call_outline_generator_subagent, call_abstract_writer_subagent, call_claims_writer_subagent
+from agent.utils.subagent_tools import call_description_writer_part1_subagent, call_description_writer_part2_subagent, call_diagram_generator_subagent
+from agent.utils.subagent_tools import call_markdown_merger_subagent
+from agent.utils.subagent_tools import SUBAGENT_PROMPTS, SUBAGENT_TEMPERATURES
+from agent.utils.artifact_cache import ArtifactCache
+from agent.utils.claim_support import support_problems
+from agent.utils.claims_checker import claims_problems
+from agent.utils.outline_metrics import length_problems
+from agent.utils.tracing import record_span, trace_scope
+from agent.utils import llm_model
+
+# 获取项目根目录（pipeline.py 位于 agent/，向上一级到项目根目录）
+_PROJECT_ROOT = Path(__file__).parent.parent
+WORKSPACE_DIR = _PROJECT_ROOT / "workspace"
+DATA_DIR = WORKSPACE_DIR / "data"
+
+PROJECT_SUBDIRS = ("01_input", "02_research", "03_outline", "04_content", "05_final")
+
+# 记录已完成阶段及其输入输出文件哈希的清单，用于续跑
+MANIFEST_FILE = "manifest.json"
+
+# 原始技术交底书保留上传文件的后缀，路径中不带后缀，解析时按前缀匹配
+RAW_DOCUMENT = "01_input/raw_document"
+
+# 文件的中文文档名，用于委托任务时描述文件
+FILE_TITLES = {
+    RAW_DOCUMENT: "技术交底书",
+    "01_input/parsed_info.json": "技术交底书结构化信息文档",
+    "02_research/prior_art_analysis.md": "现有技术分析报告",
+    "02_research/abstract_writing_style.md": "摘要写作风格指南",
+    "02_research/claims_writing_style.md": "权利要求书写作风格指南",
+    "02_research/description_writing_style.md": "说明书写作风格指南",
+    "03_outline/patent_outline.md": "专利大纲",
+    "04_content/abstract.md": "专利摘要",
+    "04_content/claims.md": "专利权利要求书",
+    "04_content/description.md": "专利说明书",
+    "04_content/figures.md": "说明书附图",
+    "05_final/complete_patent.md": "完整专利文档",
+    "05_final/summary_report.md": "专利评审报告",
+}
+
+
+@dataclass(frozen=True)
+class Stage:
+    """流水线中的一个阶段，对应一个子代理
+
+    Attributes:
+        name: 子代理名称（与 call_*_subagent 工具名一致）
+        title: 任务说明
+        inputs: 输入文件（相对项目目录的路径）
+        outputs: 输出文件（相对项目目录的路径）
+        input_titles: 覆盖个别输入文件的中文文档名
+        markers: 输出文件中必须包含的内容，用于判断输出是否完整
+        validators: 输出文件的内容检查，函数的参数为文件内容及项目目录，返回必须修改的问题，有问题时重新委托
+        advisories: 输出文件的建议性检查（启发式的统计），参数及返回值同 validators；有问题时只修改一次，
+            仍未解决的问题作为警告记录在追踪中，不导致阶段失败
+    """
+    name: str
+    title: str
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    input_titles: dict[str, str] = field(default_factory=dict)
+    markers: dict[str, str] = field(default_factory=dict)
+    validators: dict[str, Callable[[str, Path], list[str]]] = field(default_factory=dict)
+    advisories: dict[str, Callable[[str, Path], list[str]]] = field(default_factory=dict)
+
+
+def _check_lengths(*sections: str) -> Callable[[str, Path], list[str]]:
+    """各章节的字数与大纲中的要求偏差不大（大纲没有给出要求的章节不检查）"""
+    return lambda content, project_dir: length_problems(project_dir, sections)
+
+
+def _check_claims(claims: str, project_dir: Path) -> list[str]:
+    """权利要求书的编号、引用关系及引用基础"""
+    return claims_problems(claims)
+
+
+def _check_support(description: str, project_dir: Path) -> list[str]:
+    """权利要求的每个技术特征在说明书中都有支持，具体实施方式的字数与大纲中的要求偏差不大"""
+    claims = project_dir / "04_content/claims.md"
+    problems = support_problems(claims.read_text(encoding="utf-8", errors="ignore"), description) if claims.is_file() else []
+    return problems + length_problems(project_dir, ("具体实施方式",))
+
+
+# 与 leader_agent_prompt 中的'子代理目录映射'一致
+STAGES = (
+    Stage(
+        name="input_parser",
+        title="解析输入文档，提取结构化信息",
+        inputs=(RAW_DOCUMENT,),
+        outputs=("01_input/parsed_info.json",),
+    ),
+    Stage(
+        name="patent_searcher",
+        title="搜索相似专利，并进行分析总结",
+        inputs=("01_input/parsed_info.json",),
+        outputs=(
+            "02_research/prior_art_analysis.md",
+            "02_research/abstract_writing_style.md",
+            "02_research/claims_writing_style.md",
+            "02_research/description_writing_style.md",
+        ),
+    ),
+    Stage(
+        name="outline_generator",
+        title="生成专利的大纲",
+        inputs=("01_input/parsed_info.json",),
+        outputs=("03_outline/patent_outline.md",),
+    ),
+    Stage(
+        name="abstract_writer",
+        title="撰写专利的摘要",
+        inputs=(
+            "01_input/parsed_info.json",
+            "03_outline/patent_outline.md",
+            "02_research/abstract_writing_style.md",
+        ),
+        outputs=("04_content/abstract.md",),
+        advisories={"04_content/abstract.md": _check_lengths("摘要")},
+    ),
+    Stage(
+        name="claims_writer",
+        title="撰写专利的权利要求书",
+        inputs=(
+            "01_input/parsed_info.json",
+            "03_outline/patent_outline.md",
+            "04_content/abstract.md",
+            "02_research/claims_writing_style.md",
+        ),
+        outputs=("04_content/claims.md",),
+        validators={"04_content/claims.md": _check_claims},
+        advisories={"04_content/claims.md": _check_lengths("权利要求书")},
+    ),
+    Stage(
+        name="description_writer_part1",
+        title="撰写专利的说明书 part1：技术领域、背景技术、发明内容、附图说明",
+        inputs=(
+            "01_input/parsed_info.json",
+            "03_outline/patent_outline.md",
+            "04_content/abstract.md",
+            "04_content/claims.md",
+            "02_research/prior_art_analysis.md",
+            "02_research/description_writing_style.md",
+        ),
+        outputs=("04_content/description.md",),
+        markers={"04_content/description.md": "附图说明"},
+        advisories={"04_content/description.md": _check_lengths("技术领域", "背景技术", "发明内容")},
+    ),
+    Stage(
+        name="description_writer_part2",
+        title="撰写专利的说明书 part2：具体实施方式",
+        inputs=(
+            "01_input/parsed_info.json",
+            "03_outline/patent_outline.md",
+            "04_content/abstract.md",
+            "04_content/claims.md",
+            "02_research/description_writing_style.md",
+            "04_content/description.md",
+        ),
+        outputs=("04_content/description.md",),
+        input_titles={"04_content/description.md": "专利说明书（已完成第一部分）"},
+        markers={"04_content/description.md": "具体实施方式"},
+        advisories={"04_content/description.md": _check_support},
+    ),
+    Stage(
+        name="diagram_generator",
+        title="撰写专利的说明书附图",
+        inputs=("04_content/description.md",),
+        outputs=("04_content/figures.md",),
+    ),
+    Stage(
+        name="markdown_merger",
+        title="生成完整专利，撰写专利分析报告",
+        inputs=(
+            "03_outline/patent_outline.md",
+            "04_content/abstract.md",
+            "04_content/claims.md",
+            "04_content/description.md",
+            "04_content/figures.md",
+        ),
+        outputs=("05_final/complete_patent.md", "05_final/summary_report.md"),
+    ),
+)
+
+_STAGE_TOOLS = {
+    tool.name: tool
+    for tool in (
+        call_input_parser_subagent,
+        call_patent_searcher_subagent,
+        call_outline_generator_subagent,
+        call_abstract_writer_subagent,
+        call_claims_writer_subagent,
+        call_description_writer_part1_subagent,
+        call_description_writer_part2_subagent,
+        call_diagram_generator_subagent,
+        call_markdown_merger_subagent,
+    )
+}
+
+
+def stage_dependencies(stages=STAGES) -> dict[str, tuple[str, ...]]:
+    """根据输入输出文件推导阶段之间的依赖关系
+
+    每个输入文件依赖于在它之前、最后一个输出该文件的阶段。
+
+    Returns:
+        阶段名 -> 依赖的阶段名
+    """
+    producers = {}
+    dependencies = {}
+    for stage in stages:
+        deps = []
+        for name in stage.inputs:
+            producer = producers.get(name)
+            if producer is not None and producer not in deps:
+                deps.append(producer)
+        dependencies[stage.name] = tuple(deps)
+        for name in stage.outputs:
+            producers[name] = stage.name
+    return dependencies
+
+
+def project_path(uuid: str) -> Path:
+    """返回项目目录 temp_[uuid]/ 的绝对路径"""
+    return (WORKSPACE_DIR / f"temp_{uuid}").resolve()
+
+
+def resolve_file(project_dir: Path, name: str) -> Path:
+    """返回项目中文件的绝对路径，原始技术交底书按前缀匹配"""
+    path = project_dir / name
+    if name == RAW_DOCUMENT:
+        return next(iter(sorted(project_dir.glob(f"{name}.*"))), path)
+    return path
+
+
+def prepare_project(file_name: str | None, uuid: str) -> Path:
+    """创建项目目录，并将技术交底书复制到 01_input/
+
+    项目目录中已有技术交底书时（续跑），不再复制。
+
+    Args:
+        file_name: 技术交底书文件名（在 workspace/data/ 下）
+        uuid: 项目的uuid
+    """
+    project_dir = project_path(uuid)
+    if not resolve_file(project_dir, RAW_DOCUMENT).is_file():
+        source = DATA_DIR / (file_name or "")
+        if not file_name or not source.is_file():
+            raise FileNotFoundError(f"技术交底书不存在: {source}")
+        target = project_dir / f"{RAW_DOCUMENT}{source.suffix.lower()}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target)
+
+    for subdir in PROJECT_SUBDIRS:
+        (project_dir / subdir).mkdir(parents=True, exist_ok=True)
+    return project_dir
+
+
+def file_sha256(path: Path, size: int = None) -> str | None:
+    """计算文件内容的sha256，文件不存在时返回None
+
+    Args:
+        path: 文件路径
+        size: 只计算前 size 个字节，为空时计算整个文件
+    """
+    if not path.is_file():
+        return None
+    digest = hashlib.sha256()
+    remaining = size
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            block = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    if remaining:
+        # 文件比 size 短
+        return None
+    return digest.hexdigest()
+
+
+def hash_files(project_dir: Path, names) -> dict[str, str | None]:
+    """计算项目中一组文件的sha256，名称 -> 哈希"""
+    return {name: file_sha256(resolve_file(project_dir, name)) for name in names}
+
+
+def load_manifest(project_dir: Path) -> dict:
+    """读取项目的清单文件，不存在或损坏时返回空清单"""
+    path = project_dir / MANIFEST_FILE
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault("stages", {})
+    return manifest
+
+
+def save_manifest(project_dir: Path, manifest: dict):
+    """原子地写入项目的清单文件"""
+    path = project_dir / MANIFEST_FILE
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def record_stage(project_dir: Path, stage: Stage, input_hashes: dict, duration: float):
+    """在清单中记录阶段已完成，以及执行时的输入哈希和完成后的输出哈希、大小"""
+    manifest = load_manifest(project_dir)
+    manifest["stages"][stage.name] = {
+        "inputs": input_hashes,
+        "outputs": hash_files(project_dir, stage.outputs),
+        "sizes": {
+            name: path.stat().st_size
+            for name in stage.outputs if (path := resolve_file(project_dir, name)).is_file()
+        },
+        "duration": duration,
+        "completed_at": time.time(),
+    }
+    save_manifest(project_dir, manifest)
+
+
+def forget_stage(project_dir: Path, stage: Stage):
+    """从清单中删除阶段的记录（阶段即将重新执行）"""
+    manifest = load_manifest(project_dir)
+    if manifest["stages"].pop(stage.name, None) is not None:
+        save_manifest(project_dir, manifest)
+
+
+def valid_stages(project_dir: Path, stages=STAGES) -> set[str]:
+    """根据清单和文件哈希，找出可以跳过的已完成阶段
+
+    阶段可以跳过的条件：
+    - 清单中有该阶段的记录，且依赖的阶段都可以跳过
+    - 执行时的输入哈希与产生该输入的阶段记录的输出哈希一致（没有产生者的输入与当前文件一致）
+    - 每个输出文件与记录一致；若被之后已完成的阶段覆盖（如 description.md），则与覆盖者的记录一致；
+      之后写同一文件的阶段都没有完成（如说明书第二部分写到一半时中断）时，文件的开头与记录一致即可
+
+    Returns:
+        可以跳过的阶段名
+    """
+    records = load_manifest(project_dir)["stages"]
+    dependencies = stage_dependencies(stages)
+    current = {}
+
+    def current_hash(name):
+        if name not in current:
+            current[name] = file_sha256(resolve_file(project_dir, name))
+        return current[name]
+
+    producers = {}
+    valid = set()
+    for index, stage in enumerate(stages):
+        record = records.get(stage.name)
+        inputs_ok = record is not None and all(dep in valid for dep in dependencies[stage.name])
+        for name in stage.inputs if inputs_ok else ():
+            producer = producers.get(name)
+            expected = records[producer]["outputs"].get(name) if producer else current_hash(name)
+            if record["inputs"].get(name) != expected:
+                inputs_ok = False
+                break
+
+        outputs_ok = inputs_ok
+        for name in stage.outputs if outputs_ok else ():
+            if current_hash(name) == record["outputs"].get(name):
+                continue
+            writers = [later for later in stages[index + 1:] if name in later.outputs]
+            finished = [later for later in writers if later.name in records]
+            if finished:
+                if current_hash(name) == records[finished[-1].name]["outputs"].get(name):
+                    continue
+            elif writers and name in record.get("sizes", {}):
+                size = record["sizes"][name]
+                if file_sha256(resolve_file(project_dir, name), size) == record["outputs"].get(name):
+                    continue
+            outputs_ok = False
+            break
+
+        if outputs_ok:
+            valid.add(stage.name)
+        for name in stage.outputs:
+            producers[name] = stage.name
+    return valid
+
+
+def build_job_content(stage: Stage, project_dir: Path, problems: list[str] = None) -> str:
+    """按 leader_agent_prompt 中的委托格式生成任务内容
+
+    Args:
+        stage: 阶段
+        project_dir: 项目目录
+        problems: 上一次输出未通过检查的问题，重新委托时附在任务内容之后
+    """
+    inputs = "、".join(
+        f"'{stage.input_titles.get(name, FILE_TITLES[name])}'在路径'{resolve_file(project_dir, name)}'"
+        for name in stage.inputs
+    )
+    outputs = "、".join(
+        f"'{FILE_TITLES[name]}'保存在'{project_dir / name}'"
+        for name in stage.outputs
+    )
+    content = f"完成'{stage.title}'任务，{inputs}，完成任务后{outputs}"
+    if problems:
+        content += (
+            "\n\n上一次的输出存在以下问题，请针对这些问题修改（文件已保存时使用'edit_file'、'append_file'工具只修改有问题的部分，"
+            "不要重新撰写整个文件）：\n" + "\n".join(f"- {item}" for item in problems)
+        )
+    return content
+
+
+def check_outputs(stage: Stage, project_dir: Path) -> list[str]:
+    """检查阶段的输出文件是否完整
+
+    Returns:
+        问题列表，为空表示输出完整
+    """
+    problems = []
+    for name in stage.outputs:
+        path = project_dir / name
+        if not path.is_file():
+            problems.append(f"文件不存在: {path}")
+            continue
+        content = path.read_text(encoding="utf-8", errors="ignore")
+        if not content.strip():
+            problems.append(f"文件为空: {path}")
+            continue
+        if path.suffix == ".json":
+            try:
+                json.loads(content)
+            except ValueError as exc:
+                problems.append(f"JSON格式错误: {path} {exc}")
+                continue
+        marker = stage.markers.get(name)
+        if marker and marker not in content:
+            problems.append(f"缺少'{marker}'内容: {path}")
+            continue
+        validator = stage.validators.get(name)
+        if validator:
+            problems += [f"{path} {item}" for item in validator(content, project_dir)]
+    return problems
+
+
+def check_advisories(stage: Stage, project_dir: Path) -> list[str]:
+    """对阶段的输出文件做建议性检查
+
+    Returns:
+        建议修改的问题，不影响阶段是否完成
+    """
+    warnings = []
+    for name, advisory in stage.advisories.items():
+        path = project_dir / name
+        if path.is_file():
+            warnings += [f"{path} {item}" for item in advisory(path.read_text(encoding="utf-8", errors="ignore"), project_dir)]
+    return warnings
+
+
+def _clean_temp_files(stage: Stage, project_dir: Path):
+    """删除阶段工作目录下遗留的临时文件"""
+    for work_dir in {Path(name).parent for name in stage.outputs}:
+        for tmp in (project_dir / work_dir).glob("tmp_*"):
+            if tmp.is_file():
+                tmp.unlink()
+
+
+async def run_stage(stage: Stage, project_dir: Path, tools: dict = None, max_retries: int = 5,
+                    writers: dict = None) -> float:
+    """执行一个阶段，输出不完整时重新委托
+
+    输出完整后再做建议性检查，有问题时交给写作器（或重新委托）修改一次，之后无论是否解决都完成阶段。
+
+    Args:
+        stage: 阶段
+        project_dir: 项目目录
+        tools: 子代理工具，名称 -> 工具
+        max_retries: 重新委托任务的最大次数
+        writers: 阶段名称 -> 直接撰写该阶段输出的写作器（LongWriter、FigureWriter），其余阶段委托子代理；
+            重新执行时把未通过检查的问题交给写作器，只修改有问题的部分
+
+    Returns:
+        阶段耗时（秒）
+    """
+    tools = tools or _STAGE_TOOLS
+    start = time.perf_counter()
+    problems = []
+    revised = False
+    with trace_scope(project_dir=project_dir, stage=stage.name):
+        for attempt in range(1, max_retries + 2):
+            attempt_start = time.perf_counter()
+            _clean_temp_files(stage, project_dir)
+            if writers and stage.name in writers:
+                await writers[stage.name].write(stage, project_dir, problems)
+            else:
+                await tools[stage.name].ainvoke({"job_content": build_job_content(stage, project_dir, problems)})
+            problems = check_outputs(stage, project_dir)
+            warnings = [] if problems else check_advisories(stage, project_dir)
+            record_span({
+                "type": "stage",
+                "name": stage.name,
+                "start": time.time() - (time.perf_counter() - attempt_start),
+                "attempt": attempt,
+                "duration_ms": (time.perf_counter() - attempt_start) * 1000,
+                "status": "error" if problems else "warning" if warnings else "ok",
+                "problems": problems,
+                "warnings": warnings,
+            })
+            if not problems and (not warnings or revised or attempt == max_retries + 1):
+                _clean_temp_files(stage, project_dir)
+                return time.perf_counter() - start
+            if not problems:
+                # 建议性的问题只修改一次
+                revised = True
+                problems = warnings
+    raise RuntimeError(f"{stage.name} 任务失败: " + "；".join(problems))
+
+
+def stage_cache_key(stage: Stage, input_hashes: dict, model_name: str = None, temperatures: dict = None,
+                    prompt: str = None) -> str:
+    """由输入文件哈希、阶段提示词、模型及温度计算阶段输出的缓存键
+
+    Args:
+        stage: 阶段
+        input_hashes: 输入文件名 -> 内容哈希
+        model_name: 模型名称，为空时使用 llm_model 中的当前模型
+        temperatures: 温度档位 -> 温度，为空时使用 llm_model 中的当前温度
+        prompt: 阶段的提示词，为空时使用子代理的提示词
+    """
+    temperatures = temperatures or llm_model.temperatures
+    return ArtifactCache.make_key(
+        stage.name,
+        input_hashes,
+        prompt or SUBAGENT_PROMPTS[stage.name],
+        model_name or llm_model.current_model,
+        temperatures[SUBAGENT_TEMPERATURES[stage.name]],
+    )
+
+
+async def _execute_stage(stage: Stage, project_dir: Path, tools: dict, max_retries: int,
+                         cache: ArtifactCache | None, key: str | None, writers: dict = None) -> float:
+    """执行阶段，启用缓存时优先复用相同输入、提示词和模型下的输出"""
+    if cache is None:
+        return await run_stage(stage, project_dir, tools, max_retries, writers)
+
+    start = time.perf_counter()
+    if cache.get(key, project_dir, stage.outputs) and not check_outputs(stage, project_dir):
+        return time.perf_counter() - start
+    duration = await run_stage(stage, project_dir, tools, max_retries, writers)
+    cache.put(key, project_dir, stage.outputs)
+    return duration
+
+
+def inputs_ready(stage: Stage, project_dir: Path) -> bool:
+    """判断阶段的输入文件是否都已存在"""
+    return all(resolve_file(project_dir, name).is_file() for name in stage.inputs)
+
+
+def critical_path(durations: dict[str, float], stages=STAGES) -> tuple[list[str], float]:
+    """根据各阶段耗时计算关键路径
+
+    Args:
+        durations: 本次执行的阶段名 -> 耗时（秒），不包括的阶段（如续跑时跳过的阶段）不在关键路径上
+        stages: 按依赖顺序排列的阶段
+
+    Returns:
+        (关键路径上的阶段名, 关键路径总耗时)
+    """
+    dependencies = stage_dependencies(stages)
+    finish = {}
+    previous = {}
+    for stage in stages:
+        if stage.name not in durations:
+            continue
+        deps = [dep for dep in dependencies[stage.name] if dep in finish]
+        before = max(deps, key=finish.get) if deps else None
+        finish[stage.name] = durations[stage.name] + (finish[before] if before else 0.0)
+        previous[stage.name] = before
+    if not finish:
+        return [], 0.0
+
+    name = max(finish, key=finish.get)
+    total = finish[name]
+    path = []
+    while name is not None:
+        path.append(name)
+        name = previous[name]
+    return path[::-1], total
+
+
+def _todos(stages, status: dict) -> list[dict]:
+    return [{"content": f"{stage.name}：{stage.title}", "status": status[stage.name]} for stage in stages]
+
+
+def _report(project_dir: Path, durations: dict, wall_time: float, skipped=(), cache: ArtifactCache = None) -> str:
+    path, path_time = critical_path(durations)
+    serial_time = sum(durations.values())
+    rows = "\n".join(
+        [f"| {name} | 已完成，跳过 |" for name in (stage.name for stage in STAGES) if name in skipped]
+        + [f"| {name} | {seconds:.1f} |" for name, seconds in durations.items()]
+    )
+    return (
+        f"专利生成完成，完整的专利文件路径：{project_dir / '05_final/complete_patent.md'}\n\n"
+        f"| 阶段 | 耗时（秒） |\n| --- | --- |\n{rows}\n\n"
+        f"- 总耗时：{wall_time:.1f} 秒（串行执行约 {serial_time:.1f} 秒，节省 {max(serial_time - wall_time, 0.0):.1f} 秒）\n"
+        f"- 关键路径：{' -> '.join(path)}（{path_time:.1f} 秒）"
+        + (f"\n- 阶段缓存：命中 {cache.hits} 次，未命中 {cache.misses} 次" if cache else "")
+    )
+
+
+async def astream_pipeline(file_name: str | None, uuid: str, tools: dict = None, max_retries: int = 5,
+                           max_concurrency: int = 2, resume: bool = False, cache: ArtifactCache = None,
+                           model_name: str = None, temperatures: dict = None, writers: dict = None):
+    """按依赖关系直接调用子代理生成专利，不经过 leader 代理
+
+    依赖的阶段均已完成且输入文件都存在的阶段立即开始执行，同时执行的阶段数不超过 max_concurrency。
+    每个阶段完成后在项目目录的 manifest.json 中记录输入输出文件的哈希；续跑时跳过记录完整且文件未变的阶段。
+    产出的数据块与 leader 代理 stream_mode="updates" 的格式一致：
+    {"tools": {"todos": [...]}} 表示任务进展，{"model": {"messages": [...]}} 表示最终结果。
+
+    Args:
+        file_name: 技术交底书文件名（在 workspace/data/ 下）
+        uuid: 项目的uuid
+        tools: 子代理工具，名称 -> 工具
+        max_retries: 每个阶段重新委托任务的最大次数
+        max_concurrency: 同时执行的阶段数上限
+        resume: 是否在已有的项目目录 temp_[uuid]/ 上续跑，此时 file_name 可以为空
+        cache: 跨项目的阶段输出缓存，为空时不使用缓存
+        model_name: tools 所用的模型名称，用于计算缓存键，为空时使用 llm_model 中的当前模型
+        temperatures: tools 所用模型的温度档位 -> 温度，为空时使用 llm_model 中的当前温度
+        writers: 阶段名称 -> 直接撰写该阶段输出的写作器，为空时所有阶段都委托子代理
+    """
+    project_dir = prepare_project(file_name, uuid)
+    dependencies = stage_dependencies()
+    skipped = valid_stages(project_dir) if resume else set()
+    status = {stage.name: "completed" if stage.name in skipped else "pending" for stage in STAGES}
+    durations = {}
+    input_hashes = {}
+    waiting = [stage for stage in STAGES if stage.name not in skipped]
+    running = {}
+    error = None
+    start = time.perf_counter()
+    yield {"tools": {"todos": _todos(STAGES, status)}}
+
+    try:
+        while waiting or running:
+            for stage in list(waiting):
+                if len(running) >= max(max_concurrency, 1):
+                    break
+                if all(status[dep] == "completed" for dep in dependencies[stage.name]) and inputs_ready(stage, project_dir):
+                    waiting.remove(stage)
+                    status[stage.name] = "in_progress"
+                    forget_stage(project_dir, stage)
+                    input_hashes[stage.name] = hash_files(project_dir, stage.inputs)
+                    key = None
+                    if cache:
+                        prompt = writers[stage.name].prompt if writers and stage.name in writers else None
+                        key = stage_cache_key(stage, input_hashes[stage.name], model_name, temperatures, prompt)
+                    running[asyncio.create_task(
+                        _execute_stage(stage, project_dir, tools, max_retries, cache, key, writers)
+                    )] = stage
+            yield {"tools": {"todos": _todos(STAGES, status)}}
+
+            if not running:
+                error = "缺少输入文件: " + "、".join(stage.name for stage in waiting)
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage = running.pop(task)
+                try:
+                    durations[stage.name] = task.result()
+                    status[stage.name] = "completed"
+                    record_stage(project_dir, stage, input_hashes[stage.name], durations[stage.name])
+                except Exception as exc:
+                    status[stage.name] = "cancelled"
+                    error = error or exc
+            if error:
+                break
+    finally:
+        for task, stage in running.items():
+            task.cancel()
+            status[stage.name] = "cancelled"
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    if error:
+        yield {"tools": {"todos": _todos(STAGES, status)}}
+        yield {"model": {"messages": [AIMessage(content=f"专利生成失败，失败原因：{error}")]}}
+        return
+
+    content = _report(project_dir, durations, time.perf_counter() - start, skipped, cache)
+    yield {"tools": {"todos": _todos(STAGES, status)}}
+    yield {"model": {"messages": [AIMessage(content=content)]}}
@@ -2,12 +2,16 @@ prompt = """\
 你是一位技术图表设计专家，擅长使用'mermaid'语法生成专利附图。
 
 工作流程：
-1. 学习专利写作。
-2. 学习'mermaid'画图技能。
+1. 使用'search_skills'工具检索专利写作技能，检索词：'附图 基本要求 附图标记'（可补充其他检索词），只学习与当前任务相关的章节。
+2. 使用'search_skills'工具检索'mermaid'画图技能，检索词：'flowchart node shapes links subgraph'、'sequenceDiagram participants messages'（可补充其他检索词），只学习与当前任务相关的章节。
 3. 读取'专利说明书'的'附图说明'章节，确定附图数量。
 4. 对每一个附图，根据'具体实施方式'章节中对应的内容描述，生成'mermaid'图表。
    - 附图需包含步骤编号/模块编号
 5. 以指定格式保存为'Markdown'文件
+6. 使用'check_mermaid_file'工具校验保存的文件，根据返回的行号及问题，使用'edit_file'工具逐处修改有错误的行，直到校验通过
+   - 只修改有问题的行，不要重新生成整个文件
+7. 使用'check_reference_numerals'工具（参数为项目目录，即'专利说明书'所在目录的上一级目录）对照附图与'具体实施方式'中的编号，
+   修改附图中缺少、名称不一致或重复的编号，使附图与'具体实施方式'一致
 
 流程图示例：
 ```mermaid
@@ -2,7 +2,7 @@ prompt = """\
 你是一位专利大纲设计专家，精通中国专利申请文件的标准结构。
 
 你的任务：
-1. 学习专利写作技能。
+1. 使用'search_skills'工具检索专利写作技能，检索词：'发明名称 技术领域 发明内容'、'撰写权利要求书的主要步骤'、'具体实施方式 基本要求'（可补充其他检索词），只学习与当前任务相关的章节。
 2. 为'技术交底书结构化信息文档'，设计完整的专利大纲。
 3. 完整的专利大纲包括以下章节：
    - 摘要（<300字）
@@ -7,7 +7,8 @@ prompt = """\
    - 优先搜索中国专利（CN）
    - 搜索'GRANT'状态的授权专利
    - 返回前10个最相关结果
-2. 使用'markitdown'工具将搜索结果中，最相关的3个专利的'PDF'转换为'markdown'格式
+   - 搜索结果为JSON格式，每个专利包含排名(rank)、公开号(publication_number)、标题、申请人、日期、摘要片段(snippet)及PDF链接(pdf)
+2. 使用'markitdown'工具将搜索结果中，最相关的3个专利的'PDF'（pdf字段中的链接）转换为'markdown'格式
 3. 总结专利的核心技术，生成现有技术分析报告('markdown'格式)
 4. 总结专利的摘要部分的写作风格，生成摘要写作风格指南('markdown'格式)
 4. 总结专利的权利要求书部分的写作风格，生成权利要求书写作风格指南('markdown'格式)
@@ -0,0 +1,250 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from agent.agent import astream_leader, create_leader_agent
+from agent.figure_writer import FigureWriter
+from agent.long_writer import LongWriter
+from agent.merge_writer import MergeWriter
+from agent.pipeline import astream_pipeline, project_path
+from agent.utils.artifact_cache import ArtifactCache
+from agent.utils.llm_cache import LLMResponseCache
+from agent.utils.llm_model import create_llm_models
+from agent.utils.stream_bridge import AsyncStreamBridge
+from agent.utils.subagent_tools import create_subagent_tools, create_subagents
+
+
+class PatentBot:
+    """一组独立的模型及代理
+
+    代理本身不保存会话状态，同一个 PatentBot 可以同时服务多个 PatentRun；
+    不同模型或 API Key 的用户使用各自的 PatentBot，互不影响。
+    """
+
+    def __init__(self, model_name: str = "deepseek-chat", api_key: str = None, use_leader: bool = False,
+                 llm_cache: LLMResponseCache = None, long_writer: bool = False, fan_out: int = 1,
+                 parallel_figures: bool = False, local_merge: bool = True):
+        """
+        Args:
+            model_name: 模型名称
+            api_key: 模型的 API Key，为空时从环境变量读取
+            use_leader: 是否创建 leader 代理
+            llm_cache: 模型响应缓存，为空时不缓存
+            long_writer: 流水线中是否分段撰写说明书
+            fan_out: 分段撰写时具体实施方式同时撰写的段数，大于 1 时同时启用分段撰写
+            parallel_figures: 流水线中是否并行生成各附图
+            local_merge: 流水线中是否在本地合并完整专利、计算指标，模型只撰写评审意见
+        """
+        self.model_name = model_name
+        self.llm_cache = llm_cache
+        self.llm_temp_low, self.llm_temp_high, self.temperatures = create_llm_models(model_name, api_key, llm_cache)
+        self.subagents = create_subagents(self.llm_temp_low, self.llm_temp_high)
+        self.subagent_tools = {item.name: item for item in create_subagent_tools(self.subagents)}
+        # 阶段名称 -> 直接撰写该阶段输出的写作器，流水线中代替对应的子代理
+        self.writers = {}
+        models = {"low": self.llm_temp_low, "high": self.llm_temp_high}
+        if long_writer or fan_out > 1:
+            writer = LongWriter(models, fan_out=fan_out)
+            self.writers.update(dict.fromkeys(writer.stages, writer))
+        if parallel_figures:
+            writer = FigureWriter(models)
+            self.writers.update(dict.fromkeys(writer.stages, writer))
+        if local_merge:
+            writer = MergeWriter(models)
+            self.writers.update(dict.fromkeys(writer.stages, writer))
+        self.leader_agent = None
+        if use_leader:
+            self.leader_agent = create_leader_agent(self.llm_temp_high, list(self.subagent_tools.values()))
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> LLMResponseCache:
+    """返回进程内共用的模型响应缓存（workspace/.cache/llm_cache.sqlite）"""
+    return LLMResponseCache()
+
+
+# 缓存的 PatentBot 个数上限，超过时删除最久未使用的
+PATENTBOT_CACHE_SIZE = 32
+
+# (模型名称, API Key 的哈希, 其余参数) -> PatentBot，缓存键中不保存 API Key 本身
+_patentbots = OrderedDict()
+_patentbots_lock = threading.Lock()
+
+
+def _key_digest(api_key: str | None) -> str | None:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else None
+
+
+def get_patentbot(model_name: str = "deepseek-chat", api_key: str = None, use_leader: bool = False,
+                  use_llm_cache: bool = False, long_writer: bool = False, fan_out: int = 1,
+                  parallel_figures: bool = False) -> PatentBot:
+    """返回缓存的 PatentBot，相同模型、API Key 的调用共用同一组代理
+
+    缓存按 API Key 的哈希区分，最多保存 PATENTBOT_CACHE_SIZE 个，可以用 evict_patentbots 删除。
+
+    Args:
+        model_name: 模型名称
+        api_key: 模型的 API Key，为空时从环境变量读取
+        use_leader: 是否创建 leader 代理
+        use_llm_cache: 是否缓存模型响应
+        long_writer: 流水线中是否分段撰写说明书
+        fan_out: 分段撰写时具体实施方式同时撰写的段数，大于 1 时同时启用分段撰写
+        parallel_figures: 流水线中是否并行生成各附图
+    """
+    key = (model_name, _key_digest(api_key), use_leader, use_llm_cache, long_writer, fan_out, parallel_figures)
+    with _patentbots_lock:
+        bot = _patentbots.get(key)
+        if bot is not None:
+            _patentbots.move_to_end(key)
+            return bot
+
+    # 创建需要数秒，不持有锁；同时创建的相同配置只保留先完成的一个
+    llm_cache = get_llm_cache() if use_llm_cache else None
+    bot = PatentBot(model_name=model_name, api_key=api_key, use_leader=use_leader, llm_cache=llm_cache,
+                    long_writer=long_writer, fan_out=fan_out, parallel_figures=parallel_figures)
+    with _patentbots_lock:
+        bot = _patentbots.setdefault(key, bot)
+        _patentbots.move_to_end(key)
+        while len(_patentbots) > PATENTBOT_CACHE_SIZE:
+            _patentbots.popitem(last=False)
+    return bot
+
+
+def evict_patentbots(api_key: str = None) -> int:
+    """删除缓存的 PatentBot（进行中的任务仍持有各自的 PatentBot，不受影响）
+
+    Args:
+        api_key: 只删除使用该 API Key 的 PatentBot，为空时全部删除
+
+    Returns:
+        删除的个数
+    """
+    digest = _key_digest(api_key)
+    with _patentbots_lock:
+        keys = [key for key in _patentbots if api_key is None or key[1] == digest]
+        for key in keys:
+            del _patentbots[key]
+    return len(keys)
+
+
+class PatentRun:
+    """一次专利生成任务，拥有独立的项目目录、停止信号和事件流"""
+
+    def __init__(self, bot: PatentBot, file_name: str, uuid: str = None, resume: bool = False,
+                 cache: ArtifactCache = None, max_concurrency: int = 2, max_retries: int = 5):
+        """
+        Args:
+            bot: 使用的模型及代理
+            file_name: 技术交底书文件名（在 workspace/data/ 下）
+            uuid: 项目的uuid，为空时自动生成
+            resume: 是否在已有的项目目录 temp_[uuid]/ 上续跑
+            cache: 跨项目的阶段输出缓存
+            max_concurrency: 同时执行的阶段数上限
+            max_retries: 每个阶段重新委托任务的最大次数
+        """
+        self.bot = bot
+        self.file_name = file_name
+        # 时间戳加随机后缀，避免同一秒内开始的任务使用同一个项目目录
+        self.uuid = uuid or f"{int(time.time())}_{secrets.token_hex(3)}"
+        self.resume = resume
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._bridge = AsyncStreamBridge(self.astream)
+
+    @property
+    def project_dir(self):
+        return project_path(self.uuid)
+
+    @property
+    def finished(self) -> bool:
+        return self._bridge.finished.is_set() or self._bridge.stopped
+
+    async def astream(self):
+        """异步事件流，数据块格式与 leader 代理 stream_mode="updates" 一致"""
+        if self.bot.leader_agent is not None and not self.resume:
+            async for chunk in astream_leader(self.bot.leader_agent, self.file_name, self.uuid):
+                yield chunk
+            return
+        async for chunk in astream_pipeline(
+            self.file_name,
+            self.uuid,
+            tools=self.bot.subagent_tools,
+            max_retries=self.max_retries,
+            max_concurrency=self.max_concurrency,
+            resume=self.resume,
+            cache=self.cache,
+            model_name=self.bot.model_name,
+            temperatures=self.bot.temperatures,
+            writers=self.bot.writers,
+        ):
+            yield chunk
+
+    def stream(self):
+        """同步事件流，在后台线程中运行，只能迭代一次"""
+        yield from self._bridge
+
+    def stop(self):
+        """停止本任务，不影响其他任务"""
+        self._bridge.stop()
+
+
+class RunManager:
+    """管理同一进程中并发的专利生成任务"""
+
+    def __init__(self):
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def start(self, bot: PatentBot, file_name: str, **kwargs) -> PatentRun:
+        """创建并登记一个任务，参数同 PatentRun"""
+        run = PatentRun(bot, file_name, **kwargs)
+        with self._lock:
+            self._cleanup()
+            self._runs[run.uuid] = run
+        return run
+
+    def get(self, uuid: str) -> PatentRun | None:
+        with self._lock:
+            return self._runs.get(uuid)
+
+    def stop(self, uuid: str):
+        run = self.get(uuid)
+        if run is not None:
+            run.stop()
+
+    def active_runs(self) -> list[PatentRun]:
+        with self._lock:
+            return [run for run in self._runs.values() if not run.finished]
+
+    def _cleanup(self):
+        for uuid in [uuid for uuid, run in self._runs.items() if run.finished]:
+            del self._runs[uuid]
+
+
+run_manager = RunManager()
+
+
+def _benchmark(api_key: str = "sk-benchmark"):
+    """比较首次创建 PatentBot（创建各代理、获取MCP工具）与从缓存中取用的耗时"""
+    evict_patentbots(api_key)
+    start = time.perf_counter()
+    get_patentbot(api_key=api_key)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    get_patentbot(api_key=api_key)
+    cached = time.perf_counter() - start
+    evict_patentbots(api_key)
+    start = time.perf_counter()
+    get_patentbot(api_key=api_key)
+    rebuilt = time.perf_counter() - start
+    print(f"首次创建: {cold * 1000:.0f} ms")
+    print(f"缓存命中: {cached * 1000:.3f} ms")
+    print(f"删除缓存后重新创建（MCP工具已获取）: {rebuilt * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+# 获取项目根目录（artifact_cache.py 位于 agent/utils/，向上两级到项目根目录）
+_PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_CACHE_DIR = _PROJECT_ROOT / "workspace" / ".cache" / "artifacts"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_META_FILE = "meta.json"
+
+
+class ArtifactCache:
+    """跨项目的阶段输出缓存
+
+    以阶段的输入文件哈希、提示词、模型名称及温度作为键，保存阶段的输出文件。
+    命中时直接把输出文件复制到新的项目目录；总大小超过上限时按最近使用时间淘汰。
+    """
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(stage: str, input_hashes: dict, prompt: str, model: str, temperature) -> str:
+        """计算阶段输出的缓存键
+
+        Args:
+            stage: 阶段名
+            input_hashes: 输入文件名 -> 内容哈希
+            prompt: 阶段的提示词
+            model: 模型名称
+            temperature: 模型温度
+        """
+        payload = json.dumps(
+            {
+                "stage": stage,
+                "inputs": dict(sorted(input_hashes.items())),
+                "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+                "model": model,
+                "temperature": temperature,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, project_dir: Path, outputs) -> bool:
+        """命中时把缓存的输出文件复制到项目目录
+
+        Args:
+            key: 缓存键
+            project_dir: 项目目录
+            outputs: 输出文件（相对项目目录的路径）
+
+        Returns:
+            是否命中
+        """
+        entry = self.root / key
+        meta_path = entry / _META_FILE
+        if not meta_path.is_file() or not all((entry / name).is_file() for name in outputs):
+            self.misses += 1
+            return False
+
+        for name in outputs:
+            target = project_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # 复制而不是硬链接：后续阶段会原地改写输出文件（如 description.md）
+            shutil.copyfile(entry / name, target)
+        os.utime(meta_path)
+        self.hits += 1
+        return True
+
+    def put(self, key: str, project_dir: Path, outputs):
+        """保存阶段的输出文件，之后按大小上限淘汰
+
+        Args:
+            key: 缓存键
+            project_dir: 项目目录
+            outputs: 输出文件（相对项目目录的路径）
+        """
+        entry = self.root / key
+        if entry.exists():
+            return
+
+        staging = self.root / f".tmp_{uuid.uuid4().hex}"
+        size = 0
+        for name in outputs:
+            target = staging / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(project_dir / name, target)
+            size += target.stat().st_size
+        (staging / _META_FILE).write_text(
+            json.dumps({"outputs": list(outputs), "size": size, "created_at": time.time()}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        try:
+            staging.rename(entry)
+        except OSError:
+            # 其他任务已写入同一个键
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时，删除最久未使用的缓存项"""
+        entries = []
+        total = 0
+        for meta_path in self.root.glob(f"*/{_META_FILE}"):
+            try:
+                size = json.loads(meta_path.read_text(encoding="utf-8"))["size"]
+                entries.append((meta_path.stat().st_mtime, size, meta_path.parent))
+            except (OSError, ValueError, KeyError):
+                continue
+            total += size
+
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def stats(self) -> dict:
+        """返回命中、未命中次数"""
+        return {"hits": self.hits, "misses": self.misses}
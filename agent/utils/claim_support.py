@@ -0,0 +1,161 @@
+"""权利要求的说明书支持度分析
+
+把每项权利要求按"，其特征在于"和"；"拆分为技术特征，用字符二元组（bigram）计算每个特征与说明书各段落的覆盖率：
+特征的二元组中出现在该段落中的比例。所有特征与所有段落的覆盖率用一次矩阵乘法算出，
+得到每项权利要求的 特征 x 段落 覆盖率矩阵；特征的支持度为其与最相关段落的覆盖率。
+覆盖率低的特征才需要补充说明，只把这些特征交给撰写说明书的模型，而不是重新撰写整个阶段。
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from agent.utils.claims_checker import parse_claims
+
+# 覆盖率低于此值的特征视为缺少说明书支持
+LOW_COVERAGE = 0.5
+
+_PREAMBLE = re.compile(r"^根据权利要求[\d\s、,，或和及至到~～-]*所述的?[^，,]*[，,]\s*")
+_CHARACTERIZED = re.compile(r"[，,]?\s*其特征在于\s*[，,：:]?\s*")
+# 没有"其特征在于"的独立权利要求的主题："一种数据处理方法，包括：……"
+_SUBJECT = re.compile(r"^(?:一种|一个)[^，,：:；;]*[，,：:]\s*")
+_FEATURE_SEPARATOR = re.compile(r"[；;]")
+_FEATURE_PREFIX = re.compile(r"^(?:还|进一步|并且|且)?(?:包括|包含|具体包括|具体为)\s*[：:，,]?\s*")
+# 从属权利要求重复引用的主题："所述确定目标处理模型包括：……"中只有"……"是新的特征
+_RESTATED_SUBJECT = re.compile(r"^所述的?[^，,：:；;]{1,30}?(?:还|具体|进一步)?(?:包括|包含|为)\s*[：:]\s*")
+# 计算覆盖率时去掉的套话
+_BOILERPLATE = re.compile(r"所述的?|其特征在于|用于|包括|以及|其中")
+_NON_WORD = re.compile(r"[^一-鿿A-Za-z0-9]+")
+
+# 特征至少包含的二元组数，更短的片段（如"和"）不作为特征
+_MIN_BIGRAMS = 3
+
+
+@dataclass
+class FeatureCoverage:
+    """一个技术特征的支持度
+
+    Attributes:
+        claim: 权利要求编号
+        text: 特征原文
+        score: 与最相关段落的覆盖率（0-1）
+        line: 最相关段落的行号，说明书为空时为 0
+        paragraph: 最相关段落的原文
+    """
+    claim: int
+    text: str
+    score: float
+    line: int
+    paragraph: str
+
+
+@dataclass
+class ClaimCoverage:
+    """一项权利要求的支持度
+
+    Attributes:
+        number: 权利要求编号
+        features: 各技术特征的支持度
+        matrix: 特征 x 说明书段落 的覆盖率矩阵
+    """
+    number: int
+    features: list[FeatureCoverage]
+    matrix: np.ndarray
+
+    @property
+    def low(self) -> list[FeatureCoverage]:
+        return [feature for feature in self.features if feature.score < LOW_COVERAGE]
+
+
+def split_features(text: str) -> list[str]:
+    """把一项权利要求拆分为技术特征："其特征在于"之后（没有时为主题之后）按"；"分隔的各项
+
+    独立权利要求的主题（如"一种数据处理方法"）及从属权利要求的引用部分只是名称，不作为特征。
+    """
+    text = _PREAMBLE.sub("", text.strip())
+    parts = _CHARACTERIZED.split(text, maxsplit=1)
+    body = parts[1] if len(parts) > 1 else _SUBJECT.sub("", parts[0])
+    features = []
+    for item in _FEATURE_SEPARATOR.split(body):
+        features.append(_FEATURE_PREFIX.sub("", _RESTATED_SUBJECT.sub("", item.strip())).strip("。.，, "))
+    return [feature for feature in features if len(_bigrams(feature)) >= _MIN_BIGRAMS]
+
+
+def _bigrams(text: str) -> set[str]:
+    grams = set()
+    for run in _NON_WORD.split(_BOILERPLATE.sub(" ", text)):
+        grams.update(run[index:index + 2] for index in range(len(run) - 1))
+    return grams
+
+
+def description_paragraphs(description: str) -> list[tuple[int, str]]:
+    """说明书中的正文段落（不含标题）：(行号, 内容)"""
+    return [
+        (line_no, line.strip())
+        for line_no, line in enumerate(description.splitlines(), 1)
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+
+
+def claim_coverage(claims: str, description: str) -> list[ClaimCoverage]:
+    """计算每项权利要求各技术特征的说明书支持度
+
+    Args:
+        claims: 权利要求书内容
+        description: 说明书内容
+    """
+    features = [(claim.number, feature) for claim in parse_claims(claims) for feature in split_features(claim.text)]
+    paragraphs = description_paragraphs(description)
+    feature_grams = [_bigrams(feature) for _, feature in features]
+    vocabulary = {gram: index for index, gram in enumerate(sorted(set().union(*feature_grams)))}
+
+    # 特征、段落的二元组出现矩阵，覆盖率 = 共有的二元组数 / 特征的二元组数
+    feature_matrix = np.zeros((len(features), len(vocabulary)), dtype=np.float32)
+    for row, grams in enumerate(feature_grams):
+        feature_matrix[row, [vocabulary[gram] for gram in grams]] = 1
+    paragraph_matrix = np.zeros((len(paragraphs), len(vocabulary)), dtype=np.float32)
+    for row, (_, paragraph) in enumerate(paragraphs):
+        columns = [vocabulary[gram] for gram in _bigrams(paragraph) if gram in vocabulary]
+        paragraph_matrix[row, columns] = 1
+    totals = np.maximum(feature_matrix.sum(axis=1, keepdims=True), 1)
+    scores = feature_matrix @ paragraph_matrix.T / totals
+
+    result = {}
+    for row, (number, feature) in enumerate(features):
+        if paragraphs:
+            best = int(scores[row].argmax())
+            coverage = FeatureCoverage(number, feature, float(scores[row, best]), *paragraphs[best])
+        else:
+            coverage = FeatureCoverage(number, feature, 0.0, 0, "")
+        result.setdefault(number, []).append((row, coverage))
+    return [
+        ClaimCoverage(number, [coverage for _, coverage in items], scores[[row for row, _ in items]])
+        for number, items in result.items()
+    ]
+
+
+def low_coverage(coverages: list[ClaimCoverage]) -> list[FeatureCoverage]:
+    """覆盖率低于 LOW_COVERAGE 的特征"""
+    return [feature for coverage in coverages for feature in coverage.low]
+
+
+def coverage_table(coverages: list[ClaimCoverage]) -> str:
+    """每项权利要求的支持度（Markdown 表格）"""
+    lines = ["| 权利要求 | 特征数 | 平均覆盖率 | 最低覆盖率 | 支持不足的特征 |", "| --- | --- | --- | --- | --- |"]
+    for coverage in coverages:
+        scores = [feature.score for feature in coverage.features]
+        lines.append(
+            f"| {coverage.number} | {len(scores)} | {np.mean(scores):.0%} | {min(scores):.0%} | {len(coverage.low)} |"
+        )
+    return "\n".join(lines)
+
+
+def format_feature(feature: FeatureCoverage) -> str:
+    """一个支持不足的特征：原文、覆盖率及最相关的说明书段落"""
+    where = f"，最相关的是说明书第{feature.line}行" if feature.line else ""
+    return f"权利要求{feature.claim}的特征'{feature.text}'在说明书中支持不足（覆盖率{feature.score:.0%}{where}）"
+
+
+def support_problems(claims: str, description: str) -> list[str]:
+    """流水线检查：支持不足的特征"""
+    return [format_feature(feature) for feature in low_coverage(claim_coverage(claims, description))]
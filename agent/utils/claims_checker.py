@@ -0,0 +1,319 @@
+"""权利要求书的引用关系及"所述"引用基础检查
+
+解析 04_content/claims.md，建立权利要求之间的引用关系（有向无环图），检查编号、向后引用、自引用、
+引用不存在的权利要求、无法追溯到独立权利要求的孤立权利要求；并检查每个"所述X"在本权利要求之前的内容或
+其引用链上的权利要求中是否已经出现过X。
+
+术语 X 的长度有上限，每个权利要求的子串索引只建立一次，整个检查的耗时与文档长度成线性关系。
+"""
+import re
+from dataclasses import dataclass, field
+
+from agent.utils.patent_text import find_section
+
+_CLAIM = re.compile(r"^\s*(\d+)\s*[.．、]\s*(.*)$")
+_CLAIM_REFERENCE = re.compile(r"权利要求\s*(\d+)(?:\s*(?:-|~|～|至|到)\s*(\d+))?((?:\s*[、,，或和及]\s*\d+)*)")
+# "根据权利要求1所述的方法"中的"所述"是引用格式，不是引用基础
+_REFERENCE_PHRASE = re.compile(r"权利要求[\d\s、,，或和及至到~～-]*所述的?")
+# 装置权利要求中的模块："获取模块，用于……"
+_MODULE = re.compile(r"(?:^|[：:；;，,、])\s*([一-鿿A-Za-z0-9]{2,16}?(?:模块|单元|组件|子系统))\s*[，,]\s*用于")
+# 独立权利要求的主题类型
+_CATEGORY = re.compile(r"(方法|装置|设备|系统|介质|产品|程序|终端|芯片|电路)")
+
+# 术语 X 在这些字符或词之前结束
+_TERM_END_CHARS = set("，。；：、,.;:()（）“”\"'‘’[]【】《》 \t\n")
+_TERM_END_WORDS = (
+    "的", "是", "为", "和", "与", "及", "或", "中", "包括", "包含", "进行", "对", "在", "将", "由", "从",
+    "得到", "通过", "根据", "用于", "以及", "并", "被", "具有", "至", "到", "所述",
+    "大于", "小于", "等于", "存储", "查询", "发送", "接收", "生成",
+)
+# 检查的术语最大长度（超过时只检查前面的部分）
+_MAX_TERM_CHARS = 16
+
+
+@dataclass
+class Claim:
+    """一项权利要求
+
+    Attributes:
+        number: 编号
+        text: 内容（不含编号，续行已合并）
+        line: 编号所在的行号（从1开始）
+        references: 引用的权利要求编号
+    """
+    number: int
+    text: str
+    line: int
+    references: list[int] = field(default_factory=list)
+
+    @property
+    def independent(self) -> bool:
+        return not self.references
+
+
+@dataclass
+class ClaimIssue:
+    """一个问题
+
+    Attributes:
+        claim: 权利要求编号
+        line: 行号
+        message: 问题说明
+        level: error（必须修改）或 warning（可能是问题）
+    """
+    claim: int
+    line: int
+    message: str
+    level: str = "error"
+
+    def __str__(self):
+        prefix = "错误" if self.level == "error" else "提示"
+        return f"第{self.line}行（权利要求{self.claim}） {prefix}: {self.message}"
+
+
+def claim_references(text: str) -> list[int]:
+    """返回权利要求引用的编号，支持"权利要求1-3""权利要求1或2"等写法"""
+    numbers = []
+    for match in _CLAIM_REFERENCE.finditer(text):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        numbers += range(start, end + 1)
+        numbers += [int(item) for item in re.findall(r"\d+", match.group(3))]
+    return list(dict.fromkeys(numbers))
+
+
+def parse_claims(claims: str) -> list[Claim]:
+    """解析权利要求书，编号行之后的续行合并到该权利要求"""
+    body = find_section(claims, "权利要求书", 1)
+    offset = 0
+    if body is not None:
+        offset = claims[:claims.index(body)].count("\n")
+    else:
+        body = claims
+    result = []
+    for index, line in enumerate(body.splitlines()):
+        match = _CLAIM.match(line)
+        if match:
+            result.append(Claim(int(match.group(1)), match.group(2).strip(), offset + index + 1))
+        elif result and line.strip():
+            result[-1].text += line.strip()
+    for claim in result:
+        claim.references = claim_references(claim.text)
+    return result
+
+
+class ClaimsGraph:
+    """权利要求的引用关系图：从属权利要求 -> 被引用的权利要求"""
+
+    def __init__(self, claims: list[Claim]):
+        self.claims = {}
+        for claim in claims:
+            self.claims.setdefault(claim.number, claim)
+        # 只保留有效的引用（引用在前且存在的权利要求），保证是有向无环图
+        self.parents = {
+            claim.number: [item for item in claim.references if item < claim.number and item in self.claims]
+            for claim in self.claims.values()
+        }
+        self.children = {number: [] for number in self.claims}
+        self._roots = {}
+        # 被引用的权利要求编号更小，按编号顺序处理时其结果已经算出
+        for number in sorted(self.claims):
+            parents = self.parents[number]
+            for parent in parents:
+                self.children[parent].append(number)
+            if self.claims[number].independent:
+                self._roots[number] = {number}
+            else:
+                self._roots[number] = set().union(*(self._roots[parent] for parent in parents))
+
+    def roots(self, number: int) -> set[int]:
+        """权利要求沿有效引用能追溯到的独立权利要求"""
+        return self._roots[number]
+
+    def tree(self) -> str:
+        """以缩进表示的引用关系，引用多项权利要求时列在第一项之下，孤立的从属权利要求列在最外层"""
+        lines = []
+        stack = [(number, 0) for number in reversed(self.claims) if not self.parents[number]]
+        while stack:
+            number, depth = stack.pop()
+            mark = "" if depth or self.claims[number].independent else "（孤立）"
+            lines.append(f"{'  ' * depth}- 权利要求{number}{mark}：{self.claims[number].text[:30]}")
+            stack += [(child, depth + 1) for child in reversed(self.children[number]) if self.parents[child][0] == number]
+        return "\n".join(lines)
+
+
+def _term_after(text: str, start: int) -> str:
+    """返回 start 处开始的术语（到标点或虚词为止）"""
+    end = start
+    while end < len(text) and end - start < _MAX_TERM_CHARS:
+        if text[end] in _TERM_END_CHARS:
+            break
+        if end > start and text.startswith(_TERM_END_WORDS, end):
+            break
+        end += 1
+    return text[start:end]
+
+
+def _substring_index(text: str) -> dict[str, int]:
+    """文本中长度为2到_MAX_TERM_CHARS、不含标点的子串 -> 首次出现的位置"""
+    index = {}
+    run_start = 0
+    for end in range(len(text) + 1):
+        if end < len(text) and text[end] not in _TERM_END_CHARS:
+            continue
+        for start in range(run_start, end):
+            for length in range(2, min(_MAX_TERM_CHARS, end - start) + 1):
+                index.setdefault(text[start:start + length], start)
+        run_start = end + 1
+    return index
+
+
+def check_structure(claims: list[Claim]) -> list[ClaimIssue]:
+    """检查编号、引用关系、孤立权利要求及从属权利要求的主题类型"""
+    issues = []
+    if not claims:
+        return [ClaimIssue(0, 1, "没有找到编号的权利要求（每项权利要求应以'1. '、'2. '……开头）")]
+    seen = {}
+    for index, claim in enumerate(claims):
+        if claim.number in seen:
+            issues.append(ClaimIssue(claim.number, claim.line, f"编号{claim.number}与第{seen[claim.number]}行重复"))
+        elif claim.number != index + 1:
+            issues.append(ClaimIssue(claim.number, claim.line, f"编号不连续，应为{index + 1}"))
+        seen.setdefault(claim.number, claim.line)
+    if not claims[0].independent:
+        issues.append(ClaimIssue(claims[0].number, claims[0].line, "第一项权利要求应为独立权利要求"))
+
+    graph = ClaimsGraph(claims)
+    for claim in graph.claims.values():
+        for reference in claim.references:
+            if reference == claim.number:
+                issues.append(ClaimIssue(claim.number, claim.line, "引用了自身"))
+            elif reference > claim.number:
+                issues.append(ClaimIssue(claim.number, claim.line, f"引用了在后的权利要求{reference}"))
+            elif reference not in graph.claims:
+                issues.append(ClaimIssue(claim.number, claim.line, f"引用了不存在的权利要求{reference}"))
+        if not claim.independent and not graph.roots(claim.number):
+            issues.append(ClaimIssue(claim.number, claim.line, "孤立的从属权利要求，无法追溯到任何独立权利要求"))
+
+        subject = re.search(r"所述的?(\w{1,6}?)(，|,|其特征)", claim.text)
+        if claim.independent or subject is None:
+            continue
+        category = _CATEGORY.search(subject.group(1))
+        for root in graph.roots(claim.number):
+            root_category = _CATEGORY.search(graph.claims[root].text.split("，")[0])
+            if category and root_category and category.group(1) != root_category.group(1):
+                issues.append(ClaimIssue(
+                    claim.number, claim.line,
+                    f"主题为'{category.group(1)}'，但引用的权利要求{root}的主题为'{root_category.group(1)}'", "warning",
+                ))
+    return issues
+
+
+def _resolve_antecedents(claims: list[Claim]):
+    """逐个查找"所述X"的引用基础
+
+    X 的前面部分（至少 X 的长度减2）出现过即视为有引用基础。
+
+    Yields:
+        (权利要求, X, 出现过的最长前缀的长度, 是否有引用基础)，前缀都没有出现过时长度为0
+    """
+    graph = ClaimsGraph(claims)
+    indexes = {number: _substring_index(claim.text) for number, claim in graph.claims.items()}
+    memo = {}
+
+    def in_chain(number: int, term: str) -> bool:
+        """term 是否在 number 及其引用链的每一条路径上出现过，结果按 (编号, term) 缓存"""
+        stack = [number]
+        while stack:
+            current = stack[-1]
+            if (current, term) in memo:
+                stack.pop()
+                continue
+            if term in indexes[current]:
+                memo[current, term] = True
+                stack.pop()
+                continue
+            parents = graph.parents[current]
+            pending = [parent for parent in parents if (parent, term) not in memo]
+            if pending:
+                stack += pending
+                continue
+            memo[current, term] = bool(parents) and all(memo[parent, term] for parent in parents)
+            stack.pop()
+        return memo[number, term]
+
+    def introduced(claim: Claim, term: str, position: int) -> bool:
+        first = indexes[claim.number].get(term)
+        if first is not None and first + len(term) <= position:
+            return True
+        parents = graph.parents[claim.number]
+        return bool(parents) and all(in_chain(parent, term) for parent in parents)
+
+    for claim in graph.claims.values():
+        skip = {match.end() for match in _REFERENCE_PHRASE.finditer(claim.text)}
+        for match in re.finditer("所述的?", claim.text):
+            if match.end() in skip:
+                continue
+            term = _term_after(claim.text, match.end())
+            if len(term) < 2:
+                continue
+            length = next((length for length in range(len(term), 1, -1)
+                           if introduced(claim, term[:length], match.start())), 0)
+            yield claim, term, length, length >= max(2, len(term) - 2)
+
+
+def check_antecedents(claims: list[Claim]) -> list[ClaimIssue]:
+    """检查"所述X"是否有引用基础：X 在本权利要求之前的内容或引用链上的每一条路径中出现过
+
+    只出现了 X 的较短前缀时给出提示，完全没有出现时报错。
+    """
+    issues = []
+    for claim, term, length, ok in _resolve_antecedents(claims):
+        if ok:
+            continue
+        if length:
+            issues.append(ClaimIssue(
+                claim.number, claim.line, f"'所述{term}'可能缺少引用基础：之前只出现过'{term[:length]}'", "warning",
+            ))
+        else:
+            issues.append(ClaimIssue(claim.number, claim.line, f"'所述{term}'缺少引用基础：之前没有出现过'{term}'"))
+    return issues
+
+
+def claim_terms(claims: list[Claim]) -> list[str]:
+    """权利要求中引入的术语：有引用基础的"所述X"中的 X，以及"X模块/单元，用于……"中的 X模块/单元"""
+    terms = [term[:length] for _, term, length, ok in _resolve_antecedents(claims) if ok]
+    for claim in claims:
+        terms += _MODULE.findall(claim.text)
+    return list(dict.fromkeys(terms))
+
+
+def check_claims_text(claims: str) -> tuple[list[Claim], list[ClaimIssue]]:
+    """解析并检查权利要求书
+
+    Returns:
+        (权利要求列表, 按行号排序的问题列表)
+    """
+    parsed = parse_claims(claims)
+    issues = check_structure(parsed)
+    if parsed:
+        issues += check_antecedents(parsed)
+    return parsed, sorted(issues, key=lambda issue: (issue.line, issue.level != "error"))
+
+
+def format_report(claims: list[Claim], issues: list[ClaimIssue]) -> str:
+    """检查结果：引用关系及问题列表"""
+    errors = sum(issue.level == "error" for issue in issues)
+    independent = sum(claim.independent for claim in claims)
+    lines = [f"共 {len(claims)} 项权利要求，其中独立权利要求 {independent} 项"]
+    if claims:
+        lines += ["", "引用关系：", ClaimsGraph(claims).tree()]
+    lines += ["", f"发现 {errors} 个错误、{len(issues) - errors} 个提示" + ("：" if issues else "")]
+    lines += [str(issue) for issue in issues]
+    return "\n".join(lines)
+
+
+def claims_problems(claims: str) -> list[str]:
+    """流水线检查：返回必须修改的错误"""
+    _, issues = check_claims_text(claims)
+    return [str(issue) for issue in issues if issue.level == "error"]
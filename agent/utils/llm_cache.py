@@ -0,0 +1,166 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+# 获取项目根目录（llm_cache.py 位于 agent/utils/，向上两级到项目根目录）
+_PROJECT_ROOT = Path(__file__).parent.parent.parent
+_WORKSPACE_DIR = (_PROJECT_ROOT / "workspace").resolve()
+DEFAULT_CACHE_FILE = _WORKSPACE_DIR / ".cache" / "llm_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 30 * 24 * 3600
+
+# 消息中的项目目录 temp_[uuid]/：计算键时替换为占位符，命中时再换回当前项目的uuid，
+# 这样同一技术交底书在新项目中重新生成时也能命中，且工具调用仍然写入当前项目
+_PROJECT_PATTERN = re.compile(re.escape(str(_WORKSPACE_DIR)) + r"/temp_([0-9A-Za-z_]+)")
+_PROJECT_PLACEHOLDER = "{project_uuid}"
+
+warnings.filterwarnings("ignore", message="The function `loads` is in beta")
+
+
+def _project_uuid(prompt: str) -> str | None:
+    match = _PROJECT_PATTERN.search(prompt)
+    return match.group(1) if match else None
+
+
+def _replace_uuid(text: str, old: str, new: str) -> str:
+    # uuid 之后必须是路径的边界，temp_123 不能替换 temp_1234 中的前缀
+    prefix = f"{_WORKSPACE_DIR}/temp_"
+    return re.sub(rf"{re.escape(prefix + old)}(?![0-9A-Za-z_])", lambda _: prefix + new, text)
+
+
+# 不会发送给模型、且每次运行都可能不同的消息字段：用量及响应元数据（命中缓存时用量为0）
+_VOLATILE_FIELDS = ("usage_metadata", "response_metadata")
+
+
+def _strip_volatile(value):
+    # 消息及内容块的 id 每次运行随机生成（序列化结构中的类路径 id 是列表，保留）
+    if isinstance(value, dict):
+        return {
+            key: _strip_volatile(item) for key, item in value.items()
+            if key not in _VOLATILE_FIELDS and not (key == "id" and isinstance(item, str))
+        }
+    if isinstance(value, list):
+        return [_strip_volatile(item) for item in value]
+    return value
+
+
+def _normalize_prompt(prompt: str) -> str:
+    try:
+        return json.dumps(_strip_volatile(json.loads(prompt)), ensure_ascii=False, sort_keys=True)
+    except ValueError:
+        return prompt
+
+
+class LLMResponseCache(BaseCache):
+    """模型响应的磁盘缓存（SQLite）
+
+    LangChain 以消息列表作为 prompt，以模型名称、温度等参数及绑定的工具定义作为 llm_string 调用缓存，
+    在模型上设置 cache=LLMResponseCache() 即可，create_agent 的中间件不受影响。
+    超过 ttl 秒的记录视为失效；总大小超过 max_bytes 时按最近使用时间淘汰。
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_FILE, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            path: SQLite 数据库文件
+            max_bytes: 缓存内容的总大小上限
+            ttl: 记录的有效期（秒），为空时不过期
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    @contextmanager
+    def _connect(self):
+        # 每次操作使用新的连接：缓存会在多个线程（后台事件循环、执行器）中被调用
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        """计算缓存键，忽略消息id及元数据，prompt 中的项目uuid替换为占位符"""
+        prompt = _normalize_prompt(prompt)
+        uuid = _project_uuid(prompt)
+        if uuid is not None:
+            prompt = _replace_uuid(prompt, uuid, _PROJECT_PLACEHOLDER)
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        value = row[0]
+        uuid = _project_uuid(prompt)
+        if uuid is not None:
+            value = _replace_uuid(value, _PROJECT_PLACEHOLDER, uuid)
+        return loads(value, allowed_objects="core")
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.make_key(prompt, llm_string)
+        value = dumps(return_val)
+        uuid = _project_uuid(prompt)
+        if uuid is not None:
+            value = _replace_uuid(value, uuid, _PROJECT_PLACEHOLDER)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.ttl is not None:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, **kwargs) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """返回命中次数、未命中次数、记录数及总大小"""
+        with self._connect() as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
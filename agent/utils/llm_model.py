@@ -3,23 +3,45 @@ from langchain.chat_models import init_chat_model
 llm_temp_low = None
 llm_temp_high = None
 
+# 当前模型名称及 llm_temp_low/llm_temp_high 对应的温度
+current_model = None
+temperatures = {"low": None, "high": None}
 
-def _openai_model(model_name: str, temperature: float):
-    return init_chat_model(model=model_name, model_provider="openai", temperature=temperature)
 
+def _openai_model(model_name: str, temperature: float, api_key: str = None, cache=None):
+    kwargs = {"api_key": api_key} if api_key else {}
+    return init_chat_model(model=model_name, model_provider="openai", temperature=temperature, cache=cache, **kwargs)
 
-def _deepseek_model(model_name: str, temperature: float):
-    return init_chat_model(model=model_name, model_provider="deepseek", temperature=temperature)
 
+def _deepseek_model(model_name: str, temperature: float, api_key: str = None, cache=None):
+    kwargs = {"api_key": api_key} if api_key else {}
+    return init_chat_model(model=model_name, model_provider="deepseek", temperature=temperature, cache=cache, **kwargs)
 
-def update_llm_model(model_name):
-    global llm_temp_low, llm_temp_high
+
+def create_llm_models(model_name: str, api_key: str = None, cache=None):
+    """创建一组独立的模型
+
+    Args:
+        model_name: 模型名称
+        api_key: 模型的 API Key，为空时从环境变量读取
+        cache: 模型响应缓存（如 LLMResponseCache），为空时不缓存
+
+    Returns:
+        (llm_temp_low, llm_temp_high, temperatures)
+    """
     if model_name == "deepseek-chat":
-        llm_temp_low = _deepseek_model(model_name, 0)
-        llm_temp_high = _deepseek_model(model_name, 1)
+        low, high = 0, 1
+        factory = _deepseek_model
     elif model_name == "gpt-5" or model_name == "gpt-5-mini":
-        llm_temp_low = _openai_model(model_name, 0.1)
-        llm_temp_high = _openai_model(model_name, 0.3)
+        low, high = 0.1, 0.3
+        factory = _openai_model
     else:
         raise ValueError(f"Unsupported model: {model_name}")
+    return factory(model_name, low, api_key, cache), factory(model_name, high, api_key, cache), {"low": low, "high": high}
+
 
+def update_llm_model(model_name, cache=None):
+    global llm_temp_low, llm_temp_high, current_model
+    llm_temp_low, llm_temp_high, model_temperatures = create_llm_models(model_name, cache=cache)
+    current_model = model_name
+    temperatures.update(model_temperatures)
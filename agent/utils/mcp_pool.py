@@ -0,0 +1,248 @@
+import asyncio
+import atexit
+import threading
+import time
+
+import anyio
+from langchain_mcp_adapters.sessions import create_session
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+
+# 会话池运行在独立的后台事件循环中：MCP会话绑定创建它的事件循环，
+# 而代理会在不同线程的事件循环中调用工具（asyncio.run、AsyncStreamBridge 等）
+_loop = None
+_loop_lock = threading.Lock()
+_pools = []
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="mcp-session-pool", daemon=True).start()
+        return _loop
+
+
+def _run_in_pool_loop(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+class _Worker:
+    """一个长连接会话，由专属的任务创建和关闭"""
+
+    def __init__(self, session):
+        self.session = session
+        self.last_used = time.monotonic()
+        self.dead = asyncio.Event()
+
+
+class _PooledSession:
+    """供 langchain_mcp_adapters 工具使用的会话代理，把调用转发到会话池"""
+
+    def __init__(self, pool: "MCPSessionPool"):
+        self._pool = pool
+
+    async def call_tool(self, name: str, arguments: dict = None, progress_callback=None, **kwargs):
+        return await asyncio.wrap_future(_run_in_pool_loop(self._pool.call_tool(name, arguments or {})))
+
+
+class MCPSessionPool:
+    """一个MCP服务器的长连接会话池
+
+    - 启动固定数量的会话，每个会话同一时间只处理一个调用，调用数超过会话数时排队等待
+    - 会话空闲超过 ping_interval 秒后，取用前先 ping 检查，失败则重启
+    - 调用过程中出现异常（如服务器进程崩溃）时，关闭该会话并启动新的会话
+    - 服务器连续启动失败 max_start_attempts 次，或 start_timeout 秒内没有可用的会话时，把最后一次启动的异常抛给调用方，
+      下一次调用时重新启动
+    """
+
+    def __init__(self, server_name: str, connection: dict, size: int = 2, ping_interval: float = 30.0,
+                 ping_timeout: float = 5.0, start_timeout: float = 30.0, max_start_attempts: int = 3):
+        """
+        Args:
+            server_name: 服务器名称
+            connection: 连接配置（与 MultiServerMCPClient 的配置相同）
+            size: 会话数，即该服务器的最大并发调用数
+            ping_interval: 空闲多少秒后在取用前做健康检查
+            ping_timeout: 健康检查的超时时间（秒）
+            start_timeout: 启动一个会话（含初始化）的超时时间，及没有存活的会话时等待会话的最长时间（秒）
+            max_start_attempts: 每个会话连续启动失败多少次后放弃
+        """
+        self.server_name = server_name
+        self.connection = connection
+        self.size = size
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.start_timeout = start_timeout
+        self.max_start_attempts = max_start_attempts
+        self.restarts = 0
+        self.calls = 0
+        self._idle = None
+        self._owners = []
+        self._live = 0
+        self._given_up = 0
+        self._failed = None
+        self._start_error = None
+        self._closed = False
+        self._started = False
+        _pools.append(self)
+
+    async def _ensure_started(self):
+        # 上一次启动失败、所有会话都已放弃时重新启动
+        if self._started and not self._failed.is_set():
+            return
+        self._started = True
+        self._idle = asyncio.Queue()
+        self._given_up = 0
+        self._failed = asyncio.Event()
+        self._owners = [asyncio.create_task(self._own_session()) for _ in range(self.size)]
+
+    async def _own_session(self):
+        """持有一个会话，会话失效后重新创建，直到会话池关闭或连续启动失败 max_start_attempts 次"""
+        backoff = 0.5
+        failures = 0
+        while not self._closed:
+            worker = None
+            try:
+                async with create_session(self.connection) as session:
+                    await asyncio.wait_for(session.initialize(), self.start_timeout)
+                    worker = _Worker(session)
+                    backoff = 0.5
+                    failures = 0
+                    self._live += 1
+                    self._idle.put_nowait(worker)
+                    try:
+                        await worker.dead.wait()
+                    finally:
+                        self._live -= 1
+            except Exception as exc:
+                if worker is None:
+                    # 服务器启动失败（如命令不存在、初始化超时），达到次数上限后放弃，否则稍后重试
+                    self._start_error = exc
+                    failures += 1
+                    if failures >= self.max_start_attempts:
+                        self._given_up += 1
+                        if self._given_up == self.size:
+                            self._failed.set()
+                        return
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+            if worker is not None and not self._closed:
+                self.restarts += 1
+
+    async def _next_idle(self) -> _Worker:
+        """取一个空闲的会话；没有存活的会话时最多等待 start_timeout 秒，所有会话都启动失败时抛出最后一次启动的异常"""
+        if self._failed.is_set():
+            raise self._start_error
+        get = asyncio.ensure_future(self._idle.get())
+        failed = asyncio.ensure_future(self._failed.wait())
+        timeout = None if self._live else self.start_timeout
+        try:
+            await asyncio.wait({get, failed}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            failed.cancel()
+            if not get.done():
+                get.cancel()
+        if get.done() and not get.cancelled():
+            return get.result()
+        if self._failed.is_set():
+            raise self._start_error
+        raise TimeoutError(f"MCP服务器'{self.server_name}'在{self.start_timeout}秒内没有可用的会话") from self._start_error
+
+    async def _acquire(self) -> _Worker:
+        await self._ensure_started()
+        while True:
+            worker = await self._next_idle()
+            if worker.dead.is_set():
+                continue
+            if time.monotonic() - worker.last_used > self.ping_interval:
+                try:
+                    await asyncio.wait_for(worker.session.send_ping(), self.ping_timeout)
+                except Exception:
+                    worker.dead.set()
+                    continue
+            return worker
+
+    async def _request(self, send):
+        """在池中的一个会话上发送请求 send(session)，服务器进程已退出时换一个会话重试"""
+        for attempt in range(self.size + 1):
+            worker = await self._acquire()
+            try:
+                return await send(worker.session)
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                # 服务器进程已退出，请求没有发送出去，换一个会话重试
+                worker.dead.set()
+                if attempt == self.size:
+                    raise
+            except BaseException:
+                # 工具执行错误以 isError 结果返回，抛出异常说明连接已不可用，或调用被取消导致会话状态未知
+                worker.dead.set()
+                raise
+            finally:
+                worker.last_used = time.monotonic()
+                if not worker.dead.is_set():
+                    self._idle.put_nowait(worker)
+
+    async def call_tool(self, name: str, arguments: dict):
+        """在池中的一个会话上调用工具（在会话池的事件循环中执行）"""
+        self.calls += 1
+        return await self._request(lambda session: session.call_tool(name, arguments))
+
+    async def _list_tools(self):
+        return (await self._request(lambda session: session.list_tools())).tools
+
+    async def aget_tools(self) -> list:
+        """返回该服务器的工具，工具调用经由会话池"""
+        tools = await asyncio.wrap_future(_run_in_pool_loop(self._list_tools()))
+        session = _PooledSession(self)
+        return [convert_mcp_tool_to_langchain_tool(session, tool, server_name=self.server_name) for tool in tools]
+
+    def get_tools(self) -> list:
+        """同 aget_tools，在没有运行中的事件循环时调用"""
+        return asyncio.run(self.aget_tools())
+
+    async def _close(self):
+        self._closed = True
+        for owner in self._owners:
+            owner.cancel()
+        await asyncio.gather(*self._owners, return_exceptions=True)
+
+    def close(self, timeout: float = 5.0):
+        """关闭所有会话"""
+        if not self._started or self._closed:
+            self._closed = True
+            return
+        try:
+            _run_in_pool_loop(self._close()).result(timeout)
+        except Exception:
+            pass
+
+
+@atexit.register
+def _close_pools():
+    for pool in _pools:
+        pool.close()
+
+
+def _benchmark(calls: int = 20):
+    """比较每次调用启动子进程与使用会话池时，单次工具调用的耗时"""
+    from agent.utils.tools import _CONNECTIONS, _client
+
+    async def _measure(tools):
+        tool = next(item for item in tools if item.name == "return_work_path")
+        await tool.ainvoke({})
+        start = time.perf_counter()
+        for _ in range(calls):
+            await tool.ainvoke({})
+        return (time.perf_counter() - start) * 1000 / calls
+
+    per_call = asyncio.run(_measure(asyncio.run(_client.get_tools(server_name="filesystem"))))
+    pool = MCPSessionPool("filesystem", _CONNECTIONS["filesystem"], size=1)
+    pooled = asyncio.run(_measure(pool.get_tools()))
+    print(f"filesystem.return_work_path x{calls}")
+    print(f"每次调用启动子进程: {per_call:.1f} ms/次")
+    print(f"会话池: {pooled:.1f} ms/次")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,505 @@
+"""mermaid 图表校验
+
+只覆盖 mcp_server/skills/mermaid_*.md 中专利附图用到的 flowchart（graph）与 sequenceDiagram 语法子集，
+检查节点 ID、形状括号、连线、subgraph/代码块的配对以及"101："这类步骤编号，返回带行号的问题，
+让生成附图的代理在渲染前就地修改，而不是重新生成整个附图。
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+_FENCE_START = re.compile(r"^\s*```\s*mermaid\s*$")
+_FENCE_END = re.compile(r"^\s*```\s*$")
+_CAPTION = re.compile(r"^\s*<?图\s*(\d+)")
+
+_FLOWCHART_HEADER = re.compile(r"^(flowchart|graph)(\s+(TB|TD|BT|RL|LR))?\s*;?$")
+_NODE_ID = re.compile(r"[\w一-鿿]+")
+_CLASS_SUFFIX = re.compile(r":::[\w-]+")
+# 形状的开括号 -> 闭括号，按开括号长度从长到短匹配
+_SHAPES = (
+    ("(((", ")))"), ("([", "])"), ("[[", "]]"), ("[(", ")]"), ("((", "))"), ("{{", "}}"),
+    ("[/", ("/]", "\\]")), ("[\\", ("\\]", "/]")), ("[", "]"), ("(", ")"), ("{", "}"), (">", "]"),
+)
+_BRACKETS = set("[](){}")
+# 连线：A -- 文字 --> B、A -->|文字| B、A --- B、A -.-> B、A ==> B、A ~~~ B、A e1@--> B 等
+_EDGE = re.compile(r"""
+    \s*(?:\w+@)?(?:<|[ox](?=[-=.]))?
+    (?:
+        (?P<open>--|==|-\.)(?![-=.>])\s*(?P<inline>[^|]+?)\s*(?P<close>-{2,}|={2,}|\.-)
+        | (?P<plain>-{2,}|={2,}|-\.+-|~{3,})
+    )
+    (?P<arrow>[>ox])?
+    (?:\s*\|(?P<label>[^|]*)(?P<label_end>\|)?)?
+    \s*""", re.VERBOSE)
+_FLOWCHART_KEYWORDS = re.compile(r"^(classDef|class|style|linkStyle|click|direction|accTitle|accDescr)\b")
+
+_SEQUENCE_ARROW = re.compile(r"^(?P<source>[^\s:+\-<>]+?)\s*(?P<arrow><<-->>|<<->>|-->>|->>|-->|->|--x|-x|--\)|-\))"
+                             r"\s*(?P<activate>[+-])?\s*(?P<target>[^\s:+\-]+)\s*(?P<colon>:)?(?P<text>.*)$")
+_PARTICIPANT = re.compile(r"^(create\s+)?(participant|actor)\s+(?P<id>[^\s@]+)(@\{.*\})?(\s+as\s+(?P<alias>.+))?$")
+_NOTE = re.compile(r"^note\s+(left of|right of|over)\s+(?P<targets>[^:]+?)\s*:(?P<text>.*)$", re.IGNORECASE)
+_BLOCK_START = re.compile(r"^(loop|alt|opt|par|critical|break|rect|box)\b")
+# 块内的分支关键字 -> 所属的块
+_BLOCK_BRANCHES = {"else": "alt", "and": "par", "option": "critical"}
+
+# 步骤编号/模块编号：标签开头的"101："或结尾的"模块 201"
+_LEADING_NUMBER = re.compile(r"^\s*[\"']?(?P<number>\d{3,})\s*(?P<colon>[：:])?")
+_TRAILING_NUMBER = re.compile(r"\s(?P<number>\d{3,})\s*[\"']?\s*$")
+
+
+@dataclass
+class MermaidIssue:
+    """一个校验问题
+
+    Attributes:
+        line: 行号（从1开始；校验 Markdown 时为文件中的行号）
+        message: 问题说明
+        level: error（无法渲染或与专利规范不符）或 warning（可以渲染，但很可能是笔误）
+        source: 该行的原文
+    """
+    line: int
+    message: str
+    level: str = "error"
+    source: str = ""
+
+    def __str__(self):
+        prefix = "错误" if self.level == "error" else "提示"
+        text = f"第{self.line}行 {prefix}: {self.message}"
+        return f"{text}\n    {self.source.strip()}" if self.source.strip() else text
+
+
+def _strip_comment(line: str) -> str:
+    if line.lstrip().startswith("%%"):
+        return ""
+    return re.sub(r"\s+%%.*$", "", line)
+
+
+def _parse_shape(line: str, pos: int) -> tuple[int, str | None, str | None]:
+    """解析 pos 处的节点形状
+
+    Returns:
+        (结束位置, 标签, 错误)；pos 处不是形状时返回 (pos, None, None)
+    """
+    for opener, closers in _SHAPES:
+        if not line.startswith(opener, pos):
+            continue
+        closers = (closers,) if isinstance(closers, str) else closers
+        start = pos + len(opener)
+        if line.startswith('"', start):
+            end_quote = line.find('"', start + 1)
+            if end_quote < 0:
+                return len(line), None, "标签的双引号没有闭合"
+            after = end_quote + 1
+            for closer in closers:
+                if line.startswith(closer, after):
+                    return after + len(closer), line[start + 1:end_quote], None
+            return len(line), None, f"标签缺少闭括号'{closers[0]}'"
+        ends = [(line.find(closer, start), closer) for closer in closers]
+        ends = [(index, closer) for index, closer in ends if index >= 0]
+        if not ends:
+            return len(line), None, f"标签缺少闭括号'{closers[0]}'"
+        end, closer = min(ends)
+        label = line[start:end]
+        if not label.strip():
+            return end + len(closer), label, "标签为空"
+        if _BRACKETS & set(label):
+            return end + len(closer), label, f"标签'{label}'中含有括号，请改为全角括号或用双引号包裹整个标签"
+        return end + len(closer), label, None
+    return pos, None, None
+
+
+class _FlowchartChecker:
+    def __init__(self):
+        self.issues = []
+        self.labels = {}         # 节点 ID -> (标签, 行号)
+        self.referenced = {}     # 节点 ID -> 首次引用的行号
+        self.subgraphs = []      # 未闭合的 subgraph：(标题, 行号)
+        self.subgraph_ids = set()
+        self.subgraph_titles = []  # (标题, 行号)
+
+    def add(self, line_no, message, source, level="error"):
+        self.issues.append(MermaidIssue(line_no, message, level, source))
+
+    def parse_node(self, line: str, pos: int, line_no: int) -> int | None:
+        """解析一个节点（ID + 可选的形状 + 可选的 :::class），返回结束位置，出错时返回 None"""
+        match = _NODE_ID.match(line, pos)
+        if match is None:
+            self.add(line_no, f"第{pos + 1}列应为节点ID，实际为'{line[pos:pos + 10]}'", line)
+            return None
+        node_id = match.group()
+        if node_id == "end":
+            self.add(line_no, "小写的'end'是保留字，不能作为节点ID（可改为'End'或'结束'）", line)
+            return None
+        pos = match.end()
+        if line.startswith("@{", pos):
+            # 节点/连线的属性：A@{ shape: rect, label: "..." }
+            end = line.find("}", pos)
+            if end < 0:
+                self.add(line_no, "属性'@{'缺少闭合的'}'", line)
+                return None
+            self.labels.setdefault(node_id, (line[pos + 2:end].strip(), line_no))
+            self.referenced.setdefault(node_id, line_no)
+            return end + 1
+        pos, label, error = _parse_shape(line, pos)
+        if error:
+            self.add(line_no, error, line)
+            if label is None:
+                # 括号没有闭合，无法继续解析本行
+                return None
+        class_match = _CLASS_SUFFIX.match(line, pos)
+        if class_match:
+            pos = class_match.end()
+        if label is not None:
+            previous = self.labels.get(node_id)
+            if previous and previous[0] != label:
+                self.add(line_no, f"节点'{node_id}'在第{previous[1]}行已定义为'{previous[0]}'，此处的标签'{label}'会覆盖之前的标签",
+                         line, "warning")
+            self.labels.setdefault(node_id, (label, line_no))
+        self.referenced.setdefault(node_id, line_no)
+        return pos
+
+    def parse_group(self, line: str, pos: int, line_no: int) -> int | None:
+        """解析以 & 连接的一组节点"""
+        while True:
+            pos = self.parse_node(line, pos, line_no)
+            if pos is None:
+                return None
+            ampersand = re.match(r"\s*&\s*", line[pos:])
+            if not ampersand:
+                return pos
+            pos += ampersand.end()
+
+    def check_statement(self, line: str, line_no: int):
+        statement = line.strip().rstrip(";").strip()
+        if statement.startswith("subgraph"):
+            title = statement[len("subgraph"):].strip()
+            if not title:
+                self.add(line_no, "subgraph 缺少ID或标题", line)
+            else:
+                match = _NODE_ID.match(title)
+                if match:
+                    self.subgraph_ids.add(match.group())
+                rest = title[match.end():] if match else title
+                if rest.strip().startswith("[") and not rest.strip().endswith("]"):
+                    self.add(line_no, "subgraph 标题缺少闭括号']'", line)
+                self.subgraph_titles.append((rest.strip()[1:-1] if rest.strip().startswith("[") else title, line_no))
+            self.subgraphs.append((title, line_no))
+            return
+        if statement == "end":
+            if not self.subgraphs:
+                self.add(line_no, "多余的'end'，没有对应的subgraph", line)
+            else:
+                self.subgraphs.pop()
+            return
+        if _FLOWCHART_KEYWORDS.match(statement):
+            self.check_keyword(statement, line, line_no)
+            return
+
+        pos = self.parse_group(statement, 0, line_no)
+        while pos is not None and pos < len(statement):
+            edge = _EDGE.match(statement, pos)
+            if edge is None or edge.end() == pos:
+                self.add(line_no, f"无法解析'{statement[pos:]}'，应为连线（如'-->'、'---'、'-->|文字|'）", line)
+                return
+            if edge.group("label") is not None and edge.group("label_end") is None:
+                self.add(line_no, "连线文字缺少闭合的'|'", line)
+                return
+            if edge.end() >= len(statement):
+                self.add(line_no, "连线缺少目标节点", line)
+                return
+            pos = self.parse_group(statement, edge.end(), line_no)
+
+    def check_keyword(self, statement: str, line: str, line_no: int):
+        keyword, _, rest = statement.partition(" ")
+        if keyword in ("style", "click"):
+            target = rest.split()[0] if rest.split() else ""
+            if not target:
+                self.add(line_no, f"{keyword} 缺少节点ID", line)
+            elif target not in self.referenced and target not in self.subgraph_ids:
+                self.add(line_no, f"{keyword} 引用了未定义的节点'{target}'", line, "warning")
+        elif keyword == "class":
+            parts = rest.split()
+            if len(parts) < 2:
+                self.add(line_no, "class 语法应为'class 节点ID1,节点ID2 类名'", line)
+                return
+            for target in parts[0].split(","):
+                if target not in self.referenced and target not in self.subgraph_ids:
+                    self.add(line_no, f"class 引用了未定义的节点'{target}'", line, "warning")
+        elif keyword == "classDef" and len(rest.split()) < 2:
+            self.add(line_no, "classDef 语法应为'classDef 类名 样式'", line)
+        elif keyword == "direction" and rest.strip() not in ("TB", "TD", "BT", "RL", "LR"):
+            self.add(line_no, f"无效的方向'{rest.strip()}'，应为TB、TD、BT、RL或LR", line)
+
+    def finish(self, last_line: int, lines: dict):
+        for title, line_no in self.subgraphs:
+            self.add(line_no, f"subgraph '{title}' 缺少对应的'end'", lines.get(line_no, ""))
+        for node_id, line_no in self.referenced.items():
+            if node_id not in self.labels and node_id not in self.subgraph_ids:
+                self.add(line_no, f"节点'{node_id}'没有标签，图中会直接显示ID，请为其添加标签", lines.get(line_no, ""), "warning")
+
+
+def _check_sequence(body: list[tuple[int, str]], issues: list):
+    declared = {}
+    active = {}
+    blocks = []
+    for line_no, line in body:
+        statement = line.strip().rstrip(";").strip()
+        if not statement or statement.startswith("%%"):
+            continue
+        lower = statement.lower()
+        if statement.startswith(("participant ", "actor ", "create ")):
+            match = _PARTICIPANT.match(statement)
+            if match is None:
+                issues.append(MermaidIssue(line_no, "参与者语法应为'participant ID'或'participant ID as 名称'", "error", line))
+            else:
+                declared.setdefault(match.group("id"), line_no)
+            continue
+        if statement.startswith("destroy "):
+            continue
+        if statement.startswith(("autonumber", "title", "accTitle", "accDescr", "link ", "links ")):
+            continue
+        if statement.startswith(("activate ", "deactivate ")):
+            keyword, _, target = statement.partition(" ")
+            target = target.strip()
+            if keyword == "activate":
+                active[target] = active.get(target, 0) + 1
+            elif active.get(target, 0) <= 0:
+                issues.append(MermaidIssue(line_no, f"'{target}'没有处于激活状态，不能deactivate", "error", line))
+            else:
+                active[target] -= 1
+            continue
+        if lower.startswith("note"):
+            match = _NOTE.match(statement)
+            if match is None:
+                issues.append(MermaidIssue(
+                    line_no, "注释语法应为'Note left of/right of/over 参与者: 文字'", "error", line))
+            else:
+                _check_number_colon(match.group("text"), line_no, line, issues)
+            continue
+        block = _BLOCK_START.match(statement)
+        if block:
+            blocks.append((block.group(1), line_no))
+            continue
+        keyword = statement.split()[0]
+        if keyword in _BLOCK_BRANCHES:
+            if not blocks or blocks[-1][0] != _BLOCK_BRANCHES[keyword]:
+                issues.append(MermaidIssue(line_no, f"'{keyword}'只能出现在'{_BLOCK_BRANCHES[keyword]}'块中", "error", line))
+            continue
+        if statement == "end":
+            if not blocks:
+                issues.append(MermaidIssue(line_no, "多余的'end'，没有对应的loop/alt/opt/par等块", "error", line))
+            else:
+                blocks.pop()
+            continue
+        message = _SEQUENCE_ARROW.match(statement)
+        if message is None:
+            issues.append(MermaidIssue(line_no, "无法解析，消息语法应为'A->>B: 文字'", "error", line))
+            continue
+        if message.group("colon") is None:
+            issues.append(MermaidIssue(line_no, "消息缺少':'及消息文字（应为'A->>B: 文字'）", "error", line))
+        for role in ("source", "target"):
+            name = message.group(role)
+            if declared and name not in declared:
+                issues.append(MermaidIssue(line_no, f"参与者'{name}'没有声明，会被自动创建，可能是笔误", "warning", line))
+                declared[name] = line_no
+        target = message.group("target")
+        if message.group("activate") == "+":
+            active[target] = active.get(target, 0) + 1
+        elif message.group("activate") == "-":
+            source = message.group("source")
+            if active.get(source, 0) <= 0:
+                issues.append(MermaidIssue(line_no, f"'{source}'没有处于激活状态，不能使用'-'取消激活", "error", line))
+            else:
+                active[source] -= 1
+        _check_number_colon(message.group("text"), line_no, line, issues)
+    for name, line_no in blocks:
+        issues.append(MermaidIssue(line_no, f"'{name}'块缺少对应的'end'", "error", dict(body).get(line_no, "")))
+
+
+def _check_number_colon(label: str, line_no: int, line: str, issues: list):
+    match = _LEADING_NUMBER.match(label)
+    if match and match.group("colon") == ":":
+        issues.append(MermaidIssue(line_no, f"编号'{match.group('number')}'后应使用全角冒号'：'", "warning", line))
+
+
+def _number(label: str) -> str | None:
+    """标签中的编号：开头的步骤编号，没有时取结尾的模块编号"""
+    match = _LEADING_NUMBER.match(label) or _TRAILING_NUMBER.search(label)
+    return match.group("number") if match else None
+
+
+def _check_numbering(labels: dict, figure: str | None, lines: dict, issues: list):
+    """检查步骤编号/模块编号：以图号开头，同一编号不能标在不同的节点上"""
+    owners = {}
+    for node_id, (label, line_no) in labels.items():
+        _check_number_colon(label, line_no, lines.get(line_no, ""), issues)
+        number = _number(label)
+        if number:
+            if figure and not (number.startswith(figure) and len(number) == len(figure) + 2):
+                issues.append(MermaidIssue(line_no, f"编号'{number}'与图{figure}不符，图{figure}中的编号应为{figure}01、{figure}02……",
+                                           "error", lines.get(line_no, "")))
+            if number in owners and owners[number] != node_id:
+                issues.append(MermaidIssue(line_no, f"编号'{number}'同时标在节点'{owners[number]}'和'{node_id}'上",
+                                           "error", lines.get(line_no, "")))
+            owners.setdefault(number, node_id)
+
+
+def _skip_frontmatter(body: list[tuple[int, str]]) -> tuple[list[tuple[int, str]], int | None]:
+    """去掉图表开头两行'---'之间的 frontmatter（title、config 等）
+
+    Returns:
+        (图表类型及之后的行, frontmatter 缺少结束的'---'时开头'---'的行号)
+    """
+    if not body or body[0][1].strip() != "---":
+        return body, None
+    for position, (_, line) in enumerate(body[1:], 1):
+        if line.strip() == "---":
+            return body[position + 1:], None
+    return [], body[0][0]
+
+
+def _join_quoted_lines(body: list[tuple[int, str]]) -> list[tuple[int, str]]:
+    """双引号内的标签可以换行（如 markdown 字符串"`第一行\n第二行`"），把换行的标签合并为一条语句，行号为开始的行"""
+    joined = []
+    for line_no, line in body:
+        if joined and joined[-1][1].count('"') % 2:
+            joined[-1] = (joined[-1][0], f"{joined[-1][1]}\n{line}")
+        else:
+            joined.append((line_no, line))
+    return joined
+
+
+def validate_mermaid(code: str, first_line: int = 1, figure: str | None = None) -> list[MermaidIssue]:
+    """校验一个 mermaid 图表
+
+    Args:
+        code: 图表内容（不含 ``` 代码块标记）
+        first_line: code 第一行在所在文件中的行号
+        figure: 图号，提供时检查步骤编号/模块编号是否以图号开头
+
+    Returns:
+        问题列表，按行号排序
+    """
+    body = [(first_line + index, _strip_comment(line)) for index, line in enumerate(code.splitlines())]
+    lines = dict(body)
+    body = [(line_no, line) for line_no, line in body if line.strip()]
+    issues = []
+    body, unclosed = _skip_frontmatter(body)
+    if unclosed is not None:
+        return [MermaidIssue(unclosed, "frontmatter 缺少结束的'---'", "error", lines[unclosed])]
+    if not body:
+        return [MermaidIssue(first_line, "图表内容为空")]
+
+    header_no, header = body[0]
+    header = header.strip()
+    if header.startswith(("flowchart", "graph")):
+        if not _FLOWCHART_HEADER.match(header):
+            issues.append(MermaidIssue(header_no, "图表类型应为'flowchart TB/TD/BT/RL/LR'", "error", header))
+        checker = _FlowchartChecker()
+        for line_no, line in _join_quoted_lines(body[1:]):
+            checker.check_statement(line, line_no)
+        checker.finish(body[-1][0], lines)
+        issues += checker.issues
+        _check_numbering(checker.labels, figure, lines, issues)
+    elif header == "sequenceDiagram":
+        _check_sequence(body[1:], issues)
+        if figure:
+            labels = {}
+            for line_no, line in body[1:]:
+                message = _SEQUENCE_ARROW.match(line.strip())
+                if message and message.group("colon"):
+                    labels[f"消息{line_no}"] = (message.group("text").strip(), line_no)
+            _check_numbering(labels, figure, lines, issues)
+    else:
+        issues.append(MermaidIssue(header_no, f"不支持的图表类型'{header.split()[0]}'，专利附图只使用flowchart或sequenceDiagram",
+                                   "error", header))
+    return sorted(issues, key=lambda issue: issue.line)
+
+
+def mermaid_blocks(text: str):
+    """Markdown 中的 mermaid 代码块
+
+    Yields:
+        (代码块第一行的行号, 图表内容, 图号, 开始标记所在行)，代码块之后的"图N"说明作为图号，没有时为 None；
+        缺少结束的'```'时，开始标记所在行以外的值都为 None
+    """
+    lines = text.splitlines()
+    index = 0
+    while index < len(lines):
+        if not _FENCE_START.match(lines[index]):
+            index += 1
+            continue
+        start = index
+        end = next((i for i in range(start + 1, len(lines)) if _FENCE_END.match(lines[i])), None)
+        if end is None:
+            yield start + 1, None, None, lines[start]
+            end = len(lines)
+        caption = next((line for line in lines[end + 1:end + 4] if line.strip()), "")
+        figure = _CAPTION.match(caption)
+        yield start + 2, "\n".join(lines[start + 1:end]), figure.group(1) if figure else None, lines[start]
+        index = end + 1
+
+
+def validate_markdown(text: str) -> tuple[int, list[MermaidIssue]]:
+    """校验 Markdown 中的所有 mermaid 代码块
+
+    代码块之后的"图N"说明作为图号，用于检查编号。
+
+    Returns:
+        (图表个数, 问题列表)
+    """
+    issues = []
+    count = 0
+    for first_line, code, figure, fence in mermaid_blocks(text):
+        if code is None:
+            issues.append(MermaidIssue(first_line, "mermaid 代码块缺少结束的'```'", "error", fence))
+            continue
+        count += 1
+        issues += validate_mermaid(code, first_line, figure)
+    return count, issues
+
+
+@lru_cache(maxsize=256)
+def _block_labels(code: str) -> tuple[tuple[str, str, int], ...]:
+    body = [(index, _strip_comment(line)) for index, line in enumerate(code.splitlines())]
+    body, _ = _skip_frontmatter([(index, line) for index, line in body if line.strip()])
+    if not body:
+        return ()
+    labels = []
+    header = body[0][1].strip()
+    if header.startswith(("flowchart", "graph")):
+        checker = _FlowchartChecker()
+        for index, line in _join_quoted_lines(body[1:]):
+            checker.check_statement(line, index)
+        labels = [label for label in checker.labels.values()] + checker.subgraph_titles
+    elif header == "sequenceDiagram":
+        for index, line in body[1:]:
+            message = _SEQUENCE_ARROW.match(line.strip())
+            if message and message.group("colon"):
+                labels.append((message.group("text").strip(), index))
+    result = []
+    for label, index in labels:
+        label = label.strip("\"'")
+        match = _LEADING_NUMBER.match(label) or _TRAILING_NUMBER.search(label)
+        if match:
+            name = (label[:match.start()] + label[match.end():]).strip(" \"'：:")
+            result.append((match.group("number"), name, index))
+    return tuple(sorted(result, key=lambda item: item[2]))
+
+
+def numbered_labels(code: str, first_line: int = 1) -> list[tuple[str, str, int]]:
+    """图表中带步骤编号/模块编号的节点、subgraph 标题及消息
+
+    同一图表只解析一次，之后直接使用缓存的结果，修改个别图表后重新检查时只解析修改过的图表。
+
+    Returns:
+        (编号, 去掉编号后的名称, 行号) 的列表
+    """
+    return [(number, name, first_line + index) for number, name, index in _block_labels(code)]
+
+
+def format_issues(issues: list[MermaidIssue]) -> str:
+    """把问题列表格式化为文本，每个问题带行号及原文"""
+    errors = sum(issue.level == "error" for issue in issues)
+    lines = [f"发现 {errors} 个错误、{len(issues) - errors} 个提示："]
+    lines += [str(issue) for issue in issues]
+    return "\n".join(lines)
@@ -0,0 +1,92 @@
+import asyncio
+import importlib
+import time
+from pathlib import Path
+
+from langchain_core.tools import StructuredTool, ToolException
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import TextContent, Tool as MCPTool
+
+# 可以在进程内直接调用的MCP服务器：名称 -> 模块
+# 这些服务器的工具都是本地的Python函数，模块本身仍可作为MCP服务器独立运行，供外部客户端使用
+NATIVE_SERVERS = {
+    "filesystem": "mcp_server.filesystem",
+    "learn_skills": "mcp_server.skills",
+    "patent_checks": "mcp_server.patent_checks",
+}
+
+
+def _convert_tool(mcp: FastMCP, server_tool: MCPTool) -> StructuredTool:
+    async def call_tool(**arguments):
+        try:
+            # 与MCP服务器收到 tools/call 请求时相同：按函数签名校验参数后调用，结果转换为内容块
+            result = await mcp.call_tool(server_tool.name, arguments)
+        except ToolError as exc:
+            raise ToolException(str(exc)) from exc
+        # 声明了返回类型的工具同时返回结构化结果，这里与MCP客户端一样只取内容块中的文本
+        content = result[0] if isinstance(result, tuple) else result
+        return "".join(block.text for block in content if isinstance(block, TextContent))
+
+    return StructuredTool(
+        name=server_tool.name,
+        description=server_tool.description or "",
+        args_schema=server_tool.inputSchema,
+        coroutine=call_tool,
+        handle_tool_error=True,
+    )
+
+
+async def convert_fastmcp_tools(mcp: FastMCP) -> list:
+    """把 FastMCP 服务器注册的工具转换为进程内调用的 LangChain 工具
+
+    通过 FastMCP 的公开接口 list_tools / call_tool 获取和调用工具，
+    工具名称、描述、参数定义以及返回的文本与通过MCP协议获取的工具一致。
+
+    Args:
+        mcp: FastMCP 服务器
+    """
+    return [_convert_tool(mcp, item) for item in await mcp.list_tools()]
+
+
+async def aget_native_tools(server_name: str) -> list:
+    """返回进程内调用的工具
+
+    Args:
+        server_name: 服务器名称，见 NATIVE_SERVERS
+    """
+    module = importlib.import_module(NATIVE_SERVERS[server_name])
+    return await convert_fastmcp_tools(module.mcp)
+
+
+def _benchmark(calls: int = 200):
+    """比较同一个工具通过会话池（MCP stdio）调用与进程内调用的耗时"""
+    from agent.utils.mcp_pool import MCPSessionPool
+    from agent.utils.tools import _CONNECTIONS
+
+    module = importlib.import_module(NATIVE_SERVERS["filesystem"])
+    sample = Path(module._return_work_path()) / "tmp_native_tools_benchmark.md"
+    sample.write_text("测试内容\n" * 200, encoding="utf-8")
+    cases = [("return_work_path", {}), ("read_file", {"path_to_file": str(sample)})]
+
+    async def _measure(tools, name, arguments):
+        tool = next(item for item in tools if item.name == name)
+        await tool.ainvoke(arguments)
+        start = time.perf_counter()
+        for _ in range(calls):
+            await tool.ainvoke(arguments)
+        return (time.perf_counter() - start) * 1e6 / calls
+
+    pooled_tools = MCPSessionPool("filesystem", _CONNECTIONS["filesystem"], size=1).get_tools()
+    native_tools = asyncio.run(aget_native_tools("filesystem"))
+    try:
+        for name, arguments in cases:
+            pooled = asyncio.run(_measure(pooled_tools, name, arguments))
+            native = asyncio.run(_measure(native_tools, name, arguments))
+            print(f"filesystem.{name} x{calls}: 会话池 {pooled:.0f} us/次，进程内 {native:.0f} us/次")
+    finally:
+        sample.unlink()
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,172 @@
+"""说明书与说明书附图之间的附图标记（步骤编号、模块编号）对照
+
+从说明书的'具体实施方式'章节及说明书附图的 mermaid 标签中提取每个编号及其名称，建立对照表，
+检查一侧缺少的编号、名称不一致的编号，以及同一编号标在不同部件上的情况。
+
+说明书按行、附图按代码块解析并缓存结果，修改个别段落或附图后重新检查时只解析修改过的部分。
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from agent.utils.mermaid_validator import mermaid_blocks, numbered_labels
+from agent.utils.patent_text import find_section
+
+# 三到四位的编号（可以带步骤前缀"S"），排除数值、年份、图号及权利要求编号
+_NUMERAL = re.compile(r"(?:(?<=S)|(?<![\d.．A-Za-z图]))(\d{3,4})(?![\d.．A-Za-z%％年月日个字次秒条位项倍])")
+_STEP_PREFIX = re.compile(r"(?:步骤|S)\s*$")
+_STEP_LABEL = re.compile(r"^\s*[：:]\s*([^。；;\n]{1,40})")
+# 行首的"101、获取……"也是步骤
+_LIST_LABEL = re.compile(r"^\s*、\s*([^。；;\n]{1,40})")
+_SKIP_PREFIX = re.compile(r"(?:权利要求|第|约|共)\s*$")
+_NAME_BEFORE = re.compile(r"[一-鿿A-Za-z]{1,20}\s?$")
+# 名称在这些词之后开始（"该装置包括获取模块201"中的名称为"获取模块"）
+_NAME_STARTS_AFTER = re.compile(r".*(?:所述|包括|包含|通过|其中|利用|设置有|设有|以及|的|由|将|对|该|与|和|及|在|为|是|向|从|经|被)")
+_CJK = re.compile(r"[一-鿿A-Za-z0-9]")
+
+# 名称一致的判定：较短名称中至少有这个比例的字出现在较长的名称中
+_NAME_OVERLAP = 0.6
+
+
+@dataclass
+class NumeralEntry:
+    """一个编号在说明书及附图中的出现
+
+    Attributes:
+        number: 编号
+        description: 说明书中的 (名称, 行号)，只是引用编号、没有名称时名称为空字符串
+        figures: 附图中的 (图号, 名称, 行号)
+    """
+    number: str
+    description: list[tuple[str, int]] = field(default_factory=list)
+    figures: list[tuple[str | None, str, int]] = field(default_factory=list)
+
+    def description_name(self) -> str:
+        """说明书中最早出现的名称"""
+        return next((name for name, _ in self.description if name), "")
+
+    def figure_name(self) -> str:
+        return self.figures[0][1] if self.figures else ""
+
+
+@dataclass
+class NumeralIssue:
+    """一个问题
+
+    Attributes:
+        number: 编号
+        kind: 附图缺少、说明书缺少、名称不一致、重复
+        message: 问题说明（带行号）
+    """
+    number: str
+    kind: str
+    message: str
+
+    def __str__(self):
+        return f"编号{self.number} {self.kind}: {self.message}"
+
+
+@lru_cache(maxsize=4096)
+def _line_numerals(line: str) -> tuple[tuple[str, str], ...]:
+    """一行说明书中的 (编号, 名称)"""
+    result = []
+    for match in _NUMERAL.finditer(line):
+        before = line[:match.start()]
+        if _SKIP_PREFIX.search(before):
+            continue
+        after = line[match.end():]
+        step_prefix = _STEP_PREFIX.search(before)
+        step = _STEP_LABEL.match(after) or (_LIST_LABEL.match(after) if step_prefix or not before.strip() else None)
+        if step_prefix or step:
+            result.append((match.group(1), step.group(1).strip() if step else ""))
+            continue
+        name = _NAME_BEFORE.search(before)
+        name = _NAME_STARTS_AFTER.sub("", name.group().strip()) if name else ""
+        result.append((match.group(1), name if len(name) >= 2 else ""))
+    return tuple(result)
+
+
+def same_name(first: str, second: str) -> bool:
+    """两个名称是否指同一部件：较短名称的大部分字都出现在较长的名称中"""
+    first, second = "".join(_CJK.findall(first)), "".join(_CJK.findall(second))
+    if not first or not second:
+        return True
+    short, long = sorted((first, second), key=len)
+    common = Counter(short) & Counter(long)
+    return sum(common.values()) >= _NAME_OVERLAP * len(short)
+
+
+def build_index(description: str, figures: str) -> dict[str, NumeralEntry]:
+    """建立编号对照表
+
+    Args:
+        description: 说明书内容，只检查'具体实施方式'章节
+        figures: 说明书附图内容
+
+    Returns:
+        编号 -> 出现情况，按编号排序
+    """
+    index = {}
+    section = find_section(description, "具体实施方式")
+    if section is not None:
+        offset = description[:description.index(section)].count("\n")
+        for line_no, line in enumerate(section.splitlines(), offset + 1):
+            for number, name in _line_numerals(line):
+                index.setdefault(number, NumeralEntry(number)).description.append((name, line_no))
+    for first_line, code, figure, _ in mermaid_blocks(figures):
+        if code is None:
+            continue
+        for number, name, line_no in numbered_labels(code, first_line):
+            index.setdefault(number, NumeralEntry(number)).figures.append((figure, name, line_no))
+    return dict(sorted(index.items(), key=lambda item: int(item[0])))
+
+
+def numeral_issues(index: dict[str, NumeralEntry]) -> list[NumeralIssue]:
+    """对照表中的问题：一侧缺少的编号、名称不一致、同一编号对应不同的部件"""
+    issues = []
+    for number, entry in index.items():
+        described = entry.description_name()
+        if not entry.figures:
+            issues.append(NumeralIssue(
+                number, "附图缺少", f"说明书第{entry.description[0][1]}行'{described or number}'，说明书附图中没有此编号",
+            ))
+        elif not entry.description:
+            figure, name, line_no = entry.figures[0]
+            issues.append(NumeralIssue(
+                number, "说明书缺少", f"说明书附图第{line_no}行'{name}'（图{figure or '?'}），具体实施方式中没有此编号",
+            ))
+        elif described and not same_name(described, entry.figure_name()):
+            issues.append(NumeralIssue(
+                number, "名称不一致",
+                f"说明书第{entry.description[0][1]}行为'{described}'，说明书附图第{entry.figures[0][2]}行为'{entry.figure_name()}'",
+            ))
+
+        names = [(name, line_no) for name, line_no in entry.description if name]
+        conflict = next(((name, line_no) for name, line_no in names[1:] if not same_name(names[0][0], name)), None)
+        if conflict:
+            issues.append(NumeralIssue(
+                number, "重复", f"说明书第{names[0][1]}行为'{names[0][0]}'，第{conflict[1]}行为'{conflict[0]}'",
+            ))
+        figure_numbers = {figure for figure, _, _ in entry.figures}
+        if len(entry.figures) > 1 and (len(figure_numbers) > 1 or not same_name(entry.figures[0][1], entry.figures[1][1])):
+            issues.append(NumeralIssue(
+                number, "重复", "说明书附图中出现多次：" + "、".join(
+                    f"第{line_no}行'{name}'（图{figure or '?'}）" for figure, name, line_no in entry.figures
+                ),
+            ))
+    return issues
+
+
+def index_table(index: dict[str, NumeralEntry], issues: list[NumeralIssue] = None) -> str:
+    """编号对照表（Markdown 表格）"""
+    issues = numeral_issues(index) if issues is None else issues
+    kinds = {}
+    for issue in issues:
+        kinds.setdefault(issue.number, []).append(issue.kind)
+    lines = ["| 编号 | 说明书 | 说明书附图 | 结果 |", "| --- | --- | --- | --- |"]
+    for number, entry in index.items():
+        described = f"{entry.description_name() or '（仅引用）'}（第{entry.description[0][1]}行）" if entry.description else "-"
+        figure = f"{entry.figure_name()}（图{entry.figures[0][0] or '?'}）" if entry.figures else "-"
+        lines.append(f"| {number} | {described} | {figure} | {'、'.join(kinds.get(number, [])) or '一致'} |")
+    return "\n".join(lines)
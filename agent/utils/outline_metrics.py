@@ -0,0 +1,189 @@
+"""大纲字数要求的解析，及各章节汉字数的统计
+
+从 03_outline/patent_outline.md 中解析各章节的字数要求（大纲未给出时使用 outline_generator 提示词中的默认要求），
+统计 04_content 下摘要、权利要求书、说明书各章节的汉字数，给出与要求的偏差。
+撰写中的子代理通过工具查看哪些章节需要补充或删减；流水线在偏差过大时修改一次，之后只作为警告记录。
+默认要求只是参考，流水线只检查大纲中给出的要求。
+"""
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from agent.utils.patent_text import cjk_count, find_section
+
+OUTLINE = "03_outline/patent_outline.md"
+ABSTRACT = "04_content/abstract.md"
+CLAIMS = "04_content/claims.md"
+DESCRIPTION = "04_content/description.md"
+
+# 有字数要求的章节：章节 -> (文件, 标题级别)
+SECTIONS = {
+    "摘要": (ABSTRACT, 1),
+    "权利要求书": (CLAIMS, 1),
+    "技术领域": (DESCRIPTION, 2),
+    "背景技术": (DESCRIPTION, 2),
+    "发明内容": (DESCRIPTION, 2),
+    "具体实施方式": (DESCRIPTION, 2),
+}
+
+# 大纲中没有给出字数要求时，使用 outline_generator 提示词中的默认要求：章节 -> (最少字数, 最多字数)
+DEFAULT_TARGETS = {
+    "摘要": (None, 300),
+    "技术领域": (200, 300),
+    "背景技术": (1000, 2000),
+    "发明内容": (2000, 4000),
+    "具体实施方式": (8000, None),
+}
+
+# 流水线检查时允许的偏差比例：少于最少字数的一半或超过最多字数的一半时修改一次
+GATE_TOLERANCE = 0.5
+
+_OUTLINE_ITEM = re.compile(r"^\s*(?:#{1,6}|[-*+]|\d+(?:\.\d+)*[.、)）]?|\|)\s*(?P<rest>.*)$")
+_RANGE = re.compile(r"(\d+)\s*(?:-|~|～|—|–|至|到)\s*(\d+)\s*个?字")
+_AT_MOST = re.compile(r"(?:<|＜|≤|不超过|不多于|少于|小于)\s*(\d+)\s*个?字|(\d+)\s*个?字以内")
+_AT_LEAST = re.compile(r"(?:>|＞|≥|不少于|至少|大于|多于|超过)\s*(\d+)\s*个?字|(\d+)\s*个?字以上")
+_ABOUT = re.compile(r"约\s*(\d+)\s*个?字|(\d+)\s*个?字左右")
+
+
+@dataclass
+class SectionMetric:
+    """一个章节的字数
+
+    Attributes:
+        section: 章节
+        file: 所在文件（相对项目目录的路径）
+        count: 汉字数
+        target: (最少字数, 最多字数)，没有限制的一侧为 None
+        source: 要求的来源（大纲、默认）
+    """
+    section: str
+    file: str
+    count: int
+    target: tuple[int | None, int | None]
+    source: str
+
+    @property
+    def deviation(self) -> int:
+        """与要求的偏差：少于最少字数时为负数，超过最多字数时为正数，符合要求时为0"""
+        low, high = self.target
+        if low is not None and self.count < low:
+            return self.count - low
+        if high is not None and self.count > high:
+            return self.count - high
+        return 0
+
+    @property
+    def ok(self) -> bool:
+        return self.deviation == 0
+
+    def within(self, tolerance: float) -> bool:
+        """偏差是否在要求的 tolerance 比例以内"""
+        low, high = self.target
+        deviation = self.deviation
+        if deviation < 0:
+            return -deviation <= low * tolerance
+        if deviation > 0:
+            return deviation <= high * tolerance
+        return True
+
+    def advice(self) -> str:
+        """修改建议"""
+        if self.deviation < 0:
+            return f"比要求少{-self.deviation}字，需要补充"
+        if self.deviation > 0:
+            return f"比要求多{self.deviation}字，需要删减，不要再扩写"
+        return "符合要求，不需要修改"
+
+
+def parse_targets(outline: str) -> dict[str, tuple[int | None, int | None]]:
+    """从专利大纲中解析各章节的字数要求
+
+    章节名出现在标题、列表项或表格行中时，之后（包括同一行）第一个"200-300字""<300字"">8000字"
+    "约500字"形式的要求属于该章节。
+
+    Returns:
+        章节 -> (最少字数, 最多字数)，没有限制的一侧为 None
+    """
+    targets = {}
+    current = None
+    for line in outline.splitlines():
+        line = re.sub(r"(?<=\d),(?=\d{3})", "", line)
+        item = _OUTLINE_ITEM.match(line)
+        if item:
+            head = item.group("rest")[:30]
+            if not head.startswith(("写作要点", "要点", "内容")):
+                names = [name for name in SECTIONS if name in head]
+                if names:
+                    current = names[0]
+        if current is None or current in targets:
+            continue
+        if match := _RANGE.search(line):
+            targets[current] = (int(match.group(1)), int(match.group(2)))
+        elif match := _AT_MOST.search(line):
+            targets[current] = (None, int(match.group(1) or match.group(2)))
+        elif match := _AT_LEAST.search(line):
+            targets[current] = (int(match.group(1) or match.group(2)), None)
+        elif match := _ABOUT.search(line):
+            number = int(match.group(1) or match.group(2))
+            targets[current] = (int(number * 0.8), int(number * 1.2))
+    return targets
+
+
+def format_target(target: tuple[int | None, int | None]) -> str:
+    low, high = target
+    if low is not None and high is not None:
+        return f"{low}-{high}字"
+    return f"≤{high}字" if high is not None else f"≥{low}字"
+
+
+def measure(files: dict[str, str], targets: dict, sections=None) -> list[SectionMetric]:
+    """统计各章节的汉字数
+
+    Args:
+        files: 文件（相对项目目录的路径） -> 内容
+        targets: 大纲中的字数要求，未给出的章节使用默认要求
+        sections: 只统计这些章节，为空时统计所有有要求的章节
+
+    Returns:
+        已经写出的章节的字数，按 SECTIONS 的顺序排列
+    """
+    metrics = []
+    for section, (name, level) in SECTIONS.items():
+        target = targets.get(section, DEFAULT_TARGETS.get(section))
+        if target is None or (sections and section not in sections):
+            continue
+        text = find_section(files.get(name, ""), section, level)
+        if text is None:
+            continue
+        metrics.append(SectionMetric(section, name, cjk_count(text), target, "大纲" if section in targets else "默认"))
+    return metrics
+
+
+def measure_project(project_dir: Path, sections=None) -> list[SectionMetric]:
+    """统计项目中已经写出的各章节的汉字数"""
+    project_dir = Path(project_dir)
+    files = {}
+    for name in (OUTLINE, ABSTRACT, CLAIMS, DESCRIPTION):
+        path = project_dir / name
+        files[name] = path.read_text(encoding="utf-8", errors="ignore") if path.is_file() else ""
+    return measure(files, parse_targets(files[OUTLINE]), sections)
+
+
+def metrics_table(metrics: list[SectionMetric]) -> str:
+    """各章节字数（Markdown 表格）"""
+    lines = ["| 章节 | 文件 | 字数 | 要求 | 偏差 | 建议 |", "| --- | --- | --- | --- | --- | --- |"]
+    for metric in metrics:
+        lines.append(
+            f"| {metric.section} | {metric.file} | {metric.count} | {format_target(metric.target)}（{metric.source}） "
+            f"| {metric.deviation:+d} | {metric.advice()} |"
+        )
+    return "\n".join(lines)
+
+
+def length_problems(project_dir: Path, sections) -> list[str]:
+    """流水线检查：偏差超过 GATE_TOLERANCE 的章节，只检查大纲中给出要求的章节"""
+    return [
+        f"{metric.section}共{metric.count}字，要求{format_target(metric.target)}（{metric.source}），{metric.advice()}"
+        for metric in measure_project(project_dir, sections)
+        if metric.source == "大纲" and not metric.within(GATE_TOLERANCE)
+    ]
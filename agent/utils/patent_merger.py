@@ -0,0 +1,253 @@
+"""完整专利的合并，及可以在本地计算的质量指标
+
+合并顺序固定为 摘要 -> 权利要求书 -> 说明书 -> 说明书附图，与 join_files 工具的拼接方式一致；
+章节是否完整、权利要求编号是否连续、附图编号是否对应、字数是否符合大纲等可以直接计算的检查在本地完成，
+模型只根据指标表及有问题的片段撰写评审意见，不再读入整篇专利。
+"""
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from agent.utils.claim_support import claim_coverage, format_feature, low_coverage
+from agent.utils.claims_checker import check_antecedents, check_structure, parse_claims
+from agent.utils.mermaid_validator import validate_markdown
+from agent.utils.numeral_index import build_index, numeral_issues
+from agent.utils.outline_metrics import OUTLINE, format_target, measure, parse_targets
+from agent.utils.patent_text import drawing_lines, find_section
+from agent.utils.terminology import check_text
+
+PARSED_INFO = "01_input/parsed_info.json"
+ABSTRACT = "04_content/abstract.md"
+CLAIMS = "04_content/claims.md"
+DESCRIPTION = "04_content/description.md"
+FIGURES = "04_content/figures.md"
+COMPLETE_PATENT = "05_final/complete_patent.md"
+SUMMARY_REPORT = "05_final/summary_report.md"
+
+MERGE_ORDER = (ABSTRACT, CLAIMS, DESCRIPTION, FIGURES)
+
+# 各文件必须包含的标题：文件 -> (标题级别, 标题)
+REQUIRED_HEADINGS = {
+    ABSTRACT: ((1, "发明名称"), (1, "摘要")),
+    CLAIMS: ((1, "权利要求书"),),
+    DESCRIPTION: ((1, "专利说明书"), (2, "技术领域"), (2, "背景技术"), (2, "发明内容"), (2, "附图说明"), (2, "具体实施方式")),
+    FIGURES: ((1, "说明书附图"),),
+}
+
+_FIGURE_REFERENCE = re.compile(r"图\s*(\d+)")
+
+# 每个问题附带的片段的最大字数
+_EXCERPT_CHARS = 160
+
+
+@dataclass
+class Check:
+    """一项检查
+
+    Attributes:
+        category: 类别（章节完整性、权利要求、附图、附图标记、术语、字数）
+        item: 检查项
+        value: 实际结果
+        target: 要求
+        ok: 是否通过
+        excerpt: 未通过时相关的原文片段
+    """
+    category: str
+    item: str
+    value: str
+    target: str
+    ok: bool
+    excerpt: str = ""
+
+
+def _read(project_dir: Path, name: str) -> str:
+    path = project_dir / name
+    return path.read_text(encoding="utf-8", errors="ignore") if path.is_file() else ""
+
+
+def _clip(text: str) -> str:
+    text = re.sub(r"\s+", " ", text).strip()
+    return text if len(text) <= _EXCERPT_CHARS else text[:_EXCERPT_CHARS] + "……"
+
+
+def merge_patent(project_dir: Path) -> str:
+    """按 摘要 -> 权利要求书 -> 说明书 -> 说明书附图 的顺序合并为完整专利"""
+    return "\n".join(_read(project_dir, name) for name in MERGE_ORDER)
+
+
+def check_sections(files: dict[str, str]) -> list[Check]:
+    """检查各文件的必需标题是否存在"""
+    checks = []
+    for name, headings in REQUIRED_HEADINGS.items():
+        content = files[name]
+        if not content.strip():
+            checks.append(Check("章节完整性", name, "文件不存在或为空", "存在", False))
+            continue
+        missing = [title for level, title in headings if find_section(content, title, level) is None]
+        checks.append(Check(
+            "章节完整性", name, "缺少" + "、".join(missing) if missing else "完整",
+            "、".join(title for _, title in headings), not missing,
+        ))
+    return checks
+
+
+def check_claims(claims: str) -> list[Check]:
+    """检查权利要求编号是否从1开始连续，引用关系是否正确，"所述X"是否有引用基础"""
+    claims_list = parse_claims(claims)
+    if not claims_list:
+        return [Check("权利要求", "编号", "没有找到编号的权利要求", "1. 2. 3. ……", False)]
+    structure = check_structure(claims_list)
+    numbering = [issue for issue in structure if "编号" in issue.message]
+    checks = [Check(
+        "权利要求", "编号连续性", f"共{len(claims_list)}项" + (f"，权利要求{numbering[0].claim}{numbering[0].message}" if numbering else ""),
+        f"1-{len(claims_list)}连续", not numbering,
+        "\n".join(str(issue) for issue in numbering[:3]),
+    )]
+
+    independent = sum(claim.independent for claim in claims_list)
+    checks.append(Check("权利要求", "独立权利要求", f"{independent}项", "≥1项", independent > 0))
+    texts = {claim.number: claim.text for claim in claims_list}
+    bad = [issue for issue in structure if issue.level == "error" and issue not in numbering]
+    checks.append(Check(
+        "权利要求", "引用关系",
+        "、".join(f"权利要求{issue.claim}{issue.message}" for issue in bad) or "正确",
+        "只引用在前的权利要求，从属权利要求可追溯到独立权利要求", not bad,
+        "\n".join(f"{number}. {_clip(texts[number])}" for number in list(dict.fromkeys(issue.claim for issue in bad))[:3]),
+    ))
+    missing = [issue for issue in check_antecedents(claims_list) if issue.level == "error"]
+    checks.append(Check(
+        "权利要求", "引用基础", f"{len(missing)}处'所述'缺少引用基础" if missing else "正确",
+        "'所述X'之前出现过X", not missing,
+        "\n".join(str(issue) for issue in missing[:5]),
+    ))
+    return checks
+
+
+def check_support(claims: str, description: str) -> list[Check]:
+    """检查权利要求的每个技术特征在说明书中是否有支持"""
+    coverages = claim_coverage(claims, description)
+    if not coverages:
+        return []
+    low = low_coverage(coverages)
+    total = sum(len(coverage.features) for coverage in coverages)
+    return [Check(
+        "权利要求", "说明书支持", f"{total}个特征中{len(low)}个支持不足" if low else f"{total}个特征均有支持",
+        "每个特征都有说明书支持", not low, "\n".join(format_feature(feature) for feature in low[:5]),
+    )]
+
+
+def check_figures(description: str, figures: str) -> list[Check]:
+    """检查附图说明、具体实施方式及说明书附图中的图号是否对应，附图的 mermaid 语法是否正确"""
+    drawings = [number for number, _ in drawing_lines(description)]
+    count, issues = validate_markdown(figures)
+    captions = re.findall(r"^\s*<?图\s*(\d+)", figures, re.MULTILINE)
+    checks = [
+        Check("附图", "附图数量", f"附图说明{len(drawings)}个，说明书附图{count}个", "一致且不为0",
+              bool(drawings) and len(drawings) == count),
+    ]
+    missing_captions = [number for number in drawings if number not in captions]
+    checks.append(Check(
+        "附图", "说明书附图图号", "缺少图" + "、图".join(missing_captions) if missing_captions else "一致",
+        "与附图说明一致", not missing_captions,
+    ))
+
+    embodiment = find_section(description, "具体实施方式") or ""
+    unreferenced = [number for number in drawings if not re.search(rf"图\s*{number}(?!\d)", embodiment)]
+    checks.append(Check(
+        "附图", "实施例引用附图", "未引用图" + "、图".join(unreferenced) if unreferenced else "全部引用",
+        "每个附图都有对应的实施例", not unreferenced,
+    ))
+
+    drawing_section = find_section(description, "附图说明") or ""
+    body = description.replace(drawing_section, "")
+    unknown = {}
+    for match in _FIGURE_REFERENCE.finditer(body):
+        if match.group(1) not in drawings and match.group(1) not in unknown:
+            start = max(body.rfind("。", 0, match.start()) + 1, match.start() - _EXCERPT_CHARS // 2)
+            end = body.find("。", match.end())
+            end = match.end() + _EXCERPT_CHARS // 2 if end < 0 else min(end + 1, match.end() + _EXCERPT_CHARS // 2)
+            unknown[match.group(1)] = _clip(body[start:end])
+    checks.append(Check(
+        "附图", "引用不存在的附图", "图" + "、图".join(unknown) if unknown else "无",
+        "无", not unknown, "\n".join(unknown.values()),
+    ))
+
+    errors = [issue for issue in issues if issue.level == "error"]
+    checks.append(Check(
+        "附图", "mermaid语法及编号", f"{len(errors)}个错误" if errors else "正确", "无错误", not errors,
+        "\n".join(str(issue) for issue in errors[:5]),
+    ))
+    return checks
+
+
+def check_numerals(description: str, figures: str) -> list[Check]:
+    """检查具体实施方式与说明书附图中的步骤编号/模块编号是否一一对应、名称是否一致"""
+    index = build_index(description, figures)
+    if not index:
+        return [Check("附图标记", "编号", "没有找到步骤编号/模块编号", "具体实施方式及附图中标注编号", False)]
+    issues = numeral_issues(index)
+    checks = []
+    for item, kinds, target in (
+        ("编号对应", ("附图缺少", "说明书缺少"), "两侧编号一致"),
+        ("名称一致", ("名称不一致",), "同一编号的名称一致"),
+        ("重复编号", ("重复",), "一个编号只对应一个部件"),
+    ):
+        found = [issue for issue in issues if issue.kind in kinds]
+        checks.append(Check(
+            "附图标记", item, "、".join(dict.fromkeys(issue.number for issue in found)) if found else f"共{len(index)}个编号，无问题",
+            target, not found, "\n".join(str(issue) for issue in found[:5]),
+        ))
+    return checks
+
+
+def check_terminology(text: str, parsed_info: str, claims: str) -> list[Check]:
+    """检查技术关键词及权利要求术语的写法是否统一、是否先定义后使用、权利要求术语是否都在说明书中出现"""
+    usages, issues = check_text(text, parsed_info, claims)
+    if not usages:
+        return [Check("术语", "术语", "没有找到技术关键词及权利要求术语", "有术语", False)]
+    checks = []
+    for kind, target in (("不一致写法", "同一术语写法统一"), ("先用后定义", "先定义后使用"), ("说明书缺少", "权利要求术语在说明书中出现")):
+        found = [issue for issue in issues if issue.kind == kind]
+        checks.append(Check(
+            "术语", kind, "、".join(dict.fromkeys(issue.term for issue in found)) if found else f"共{len(usages)}个术语，无问题",
+            target, not found, "\n".join(str(issue) for issue in found[:5]),
+        ))
+    return checks
+
+
+def check_lengths(files: dict[str, str], targets: dict) -> list[Check]:
+    """按大纲中的字数要求（大纲未给出时使用默认要求）检查各章节的汉字数"""
+    return [
+        Check("字数", metric.section, f"{metric.count}字", f"{format_target(metric.target)}（{metric.source}）", metric.ok)
+        for metric in measure(files, targets)
+    ]
+
+
+def compute_checks(project_dir: Path) -> list[Check]:
+    """计算项目的所有本地检查"""
+    project_dir = Path(project_dir)
+    files = {name: _read(project_dir, name) for name in MERGE_ORDER}
+    targets = parse_targets(_read(project_dir, OUTLINE))
+    return (
+        check_sections(files)
+        + check_claims(files[CLAIMS])
+        + check_support(files[CLAIMS], files[DESCRIPTION])
+        + check_figures(files[DESCRIPTION], files[FIGURES])
+        + check_numerals(files[DESCRIPTION], files[FIGURES])
+        + check_terminology("\n".join(files.values()), _read(project_dir, PARSED_INFO), files[CLAIMS])
+        + check_lengths(files, targets)
+    )
+
+
+def checks_table(checks: list[Check]) -> str:
+    """检查结果的 Markdown 表格"""
+    lines = ["| 类别 | 检查项 | 结果 | 要求 | 状态 |", "| --- | --- | --- | --- | --- |"]
+    for check in checks:
+        lines.append(f"| {check.category} | {check.item} | {check.value} | {check.target} | {'通过' if check.ok else '未通过'} |")
+    return "\n".join(lines)
+
+
+def flagged_excerpts(checks: list[Check]) -> str:
+    """未通过的检查项附带的原文片段"""
+    parts = [f"### {check.category}：{check.item}\n{check.excerpt}" for check in checks if not check.ok and check.excerpt]
+    return "\n\n".join(parts)
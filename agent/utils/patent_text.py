@@ -0,0 +1,55 @@
+import re
+
+_FIGURE = re.compile(r"图\s*(\d+)")
+_FIGURE_INTRO = re.compile(r"如图\s*(\d+)\s*所示")
+_CJK = re.compile(r"[一-鿿]")
+
+
+def find_section(text: str, title: str, level: int = 2) -> str | None:
+    """返回 Markdown 中标题为 title 的章节正文（不含标题，到同级或更高级的下一个标题为止），没有该章节时返回 None
+
+    Args:
+        text: Markdown 文本
+        title: 标题
+        level: 标题级别，2 对应"## "
+    """
+    match = re.search(rf"^#{{{level}}}\s*{re.escape(title)}\s*$(.*?)(?=^#{{1,{level}}}\s|\Z)", text, re.MULTILINE | re.DOTALL)
+    return match.group(1) if match else None
+
+
+def cjk_count(text: str) -> int:
+    """统计汉字个数（不含标点、字母和数字），用于与大纲中的字数要求比较"""
+    return len(_CJK.findall(text))
+
+
+def drawing_lines(description: str) -> list[tuple[str, str]]:
+    """返回附图说明章节中每个附图的 (图号, 说明)，按图号去重，保持顺序"""
+    section = find_section(description, "附图说明")
+    if section is None:
+        return []
+    lines, seen = [], set()
+    for line in section.splitlines():
+        figure = _FIGURE.search(line)
+        if figure and figure.group(1) not in seen:
+            seen.add(figure.group(1))
+            lines.append((figure.group(1), line.strip()))
+    return lines
+
+
+def embodiment_excerpts(description: str) -> dict[str, str]:
+    """按"如图N所示"切分具体实施方式，返回 图号 -> 对应实施例的内容
+
+    从"如图N所示"所在的段落开始，到引入其他附图的段落之前结束；同一附图被多次引入时内容合并。
+    """
+    section = find_section(description, "具体实施方式")
+    if section is None:
+        return {}
+    excerpts = {}
+    current = None
+    for paragraph in re.split(r"\n\s*\n", section):
+        intro = _FIGURE_INTRO.search(paragraph)
+        if intro:
+            current = intro.group(1)
+        if current is not None and paragraph.strip():
+            excerpts.setdefault(current, []).append(paragraph.strip())
+    return {number: "\n\n".join(paragraphs) for number, paragraphs in excerpts.items()}
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+# 获取项目根目录（search_cache.py 位于 agent/utils/，向上两级到项目根目录）
+_PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_CACHE_FILE = _PROJECT_ROOT / "workspace" / ".cache" / "serpapi_cache.sqlite"
+# 新鲜期：7天内直接返回缓存的结果
+DEFAULT_TTL = 7 * 24 * 3600
+# 过期后的30天内先返回旧的结果，同时在后台重新搜索
+DEFAULT_STALE_TTL = 30 * 24 * 3600
+
+_SPACES = re.compile(r"\s+")
+# 命中统计的计数项
+_COUNTERS = ("hits", "stale_hits", "misses", "revalidations", "errors")
+
+
+def normalize_params(query: str, country: str, status: str, sort: str | None, num) -> dict:
+    """规范化搜索参数，写法不同但含义相同的搜索使用同一条缓存
+
+    - 关键词合并连续空白、去掉括号内侧的空格（不改变大小写，OR/AND 是区分大小写的运算符）
+    - 国家、专利状态转为大写，排序方式转为小写，relevance 即默认排序
+    - 结果数量限制在 10-100 之间
+    """
+    query = _SPACES.sub(" ", query).strip()
+    query = re.sub(r"\(\s+", "(", re.sub(r"\s+\)", ")", query))
+    sort = (sort or "").strip().lower()
+    try:
+        num = min(max(int(num), 10), 100)
+    except (TypeError, ValueError):
+        num = 10
+    return {
+        "q": query,
+        "country": (country or "").strip().upper(),
+        "status": (status or "").strip().upper(),
+        "sort": None if sort in ("", "relevance") else sort,
+        "num": str(num),
+    }
+
+
+class SearchCache:
+    """SerpAPI 搜索结果的磁盘缓存（SQLite）
+
+    以规范化后的 (关键词, 国家, 专利状态, 排序方式, 结果数量) 作为键：
+    - 新鲜期（ttl）内直接返回缓存的结果，不消耗搜索次数
+    - 过期但仍在 stale_ttl 内时先返回旧的结果，同时在后台线程重新搜索并更新缓存（stale-while-revalidate）
+    - 超过 stale_ttl 或没有缓存时同步搜索；返回 error 的结果（如次数用尽、关键词无结果）不缓存
+
+    搜索服务器作为独立进程运行，命中统计也保存在数据库中，可以跨进程累计。
+    """
+
+    def __init__(self, fetcher: Callable[[dict], dict], path: Path = DEFAULT_CACHE_FILE,
+                 ttl: float = DEFAULT_TTL, stale_ttl: float = DEFAULT_STALE_TTL):
+        """
+        Args:
+            fetcher: 实际执行搜索的函数，参数为 normalize_params 返回的搜索参数（不含 api_key），返回 SerpAPI 的结果
+            path: SQLite 数据库文件
+            ttl: 结果的新鲜期（秒）
+            stale_ttl: 过期后仍可先返回旧结果的时间（秒）
+        """
+        self.fetcher = fetcher
+        self.path = Path(path)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._threads = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, params TEXT NOT NULL, value TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        # 每次操作使用新的连接：后台重新搜索在其他线程中写入
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(params: dict) -> str:
+        """计算缓存键，params 为 normalize_params 返回的搜索参数"""
+        payload = json.dumps(params, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+
+    def _load(self, key: str) -> tuple[dict, float] | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, fetched_at FROM results WHERE key = ?", (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _fetch(self, key: str, params: dict) -> dict:
+        """执行搜索，成功的结果写入缓存"""
+        results = self.fetcher(dict(params))
+        if isinstance(results, dict) and "error" not in results:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, params, value, fetched_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(params, ensure_ascii=False), json.dumps(results, ensure_ascii=False), time.time()),
+                )
+        else:
+            self._count("errors")
+        return results
+
+    def _revalidate(self, key: str, params: dict):
+        try:
+            self._fetch(key, params)
+            self._count("revalidations")
+        except Exception:
+            # 后台更新失败时保留旧的结果，下次搜索时再试
+            self._count("errors")
+        finally:
+            with self._lock:
+                self._revalidating.discard(key)
+
+    def search(self, params: dict) -> dict:
+        """返回搜索结果，按新鲜期及过期时间决定是否重新搜索
+
+        Args:
+            params: normalize_params 返回的搜索参数
+        """
+        key = self.make_key(params)
+        cached = self._load(key)
+        if cached is not None:
+            results, fetched_at = cached
+            age = time.time() - fetched_at
+            if age <= self.ttl:
+                self._count("hits")
+                return results
+            if age <= self.ttl + self.stale_ttl:
+                self._count("stale_hits")
+                with self._lock:
+                    start = key not in self._revalidating
+                    self._revalidating.add(key)
+                if start:
+                    # 非守护线程：按次调用的服务器进程退出前也会等待更新完成
+                    thread = threading.Thread(target=self._revalidate, args=(key, params), name="serpapi-revalidate")
+                    thread.start()
+                    self._threads.append(thread)
+                return results
+        self._count("misses")
+        return self._fetch(key, params)
+
+    def wait(self, timeout: float = None):
+        """等待后台的重新搜索完成"""
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+    def entries(self):
+        """Yields: (搜索参数, 搜索结果)，按搜索时间排序"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT params, value FROM results ORDER BY fetched_at").fetchall()
+        for params, value in rows:
+            yield json.loads(params), json.loads(value)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM counters")
+
+    def stats(self) -> dict:
+        """返回命中、过期命中、未命中、后台更新、失败次数，及记录数、总大小"""
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(value AS BLOB))), 0) FROM results").fetchone()
+        return {**{name: counters.get(name, 0) for name in _COUNTERS}, "entries": entries, "bytes": total}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="查看或清空 SerpAPI 搜索结果的缓存")
+    parser.add_argument("--clear", action="store_true", help="清空缓存的结果及统计")
+    args = parser.parse_args()
+    cache = SearchCache(fetcher=lambda params: {"error": "只用于查看缓存"})
+    if args.clear:
+        cache.clear()
+    print(
+        "SerpAPI 缓存: 命中 {hits} 次，过期命中 {stale_hits} 次，未命中 {misses} 次，"
+        "后台更新 {revalidations} 次，失败 {errors} 次，共 {entries} 条记录（{bytes} 字节）".format(**cache.stats())
+    )
@@ -0,0 +1,148 @@
+"""专利搜索结果的精简投影
+
+SerpAPI 返回的结果包含缩略图、serpapi 链接、分页信息、附图地址等，整体转为字符串后每次搜索有几十KB，
+全部进入 patent_searcher 的上下文。这里只保留撰写分析报告需要的字段（公开号、标题、申请人、日期、摘要片段、
+PDF链接及相关性排名），输出紧凑的 JSON，可以选择字段并在已搜索的结果中分页（分页不消耗搜索次数）。
+"""
+import json
+import math
+import re
+from dataclasses import dataclass
+
+from agent.utils.patent_text import cjk_count
+
+# 默认返回的字段
+DEFAULT_FIELDS = (
+    "rank", "publication_number", "title", "assignee",
+    "priority_date", "filing_date", "publication_date", "grant_date", "snippet", "pdf",
+)
+# 可以额外选择的字段
+OPTIONAL_FIELDS = ("inventor", "country_status", "language", "patent_link")
+# 始终返回的字段：用于在分析报告中引用专利
+_REQUIRED_FIELDS = ("rank", "publication_number")
+
+# patent_id 形如 "patent/CN112345678A/zh"
+_PATENT_ID = re.compile(r"patent/([^/]+)")
+_NON_CJK = re.compile(r"[^\s一-鿿]")
+
+
+@dataclass
+class ProjectionSize:
+    """一次搜索的结果在投影前后的大小
+
+    Attributes:
+        raw_bytes: 原始结果转为字符串后的字节数（即之前返回给模型的内容）
+        compact_bytes: 精简 JSON 的字节数
+        raw_tokens: 原始结果的估算 token 数
+        compact_tokens: 精简 JSON 的估算 token 数
+    """
+    raw_bytes: int
+    compact_bytes: int
+    raw_tokens: int
+    compact_tokens: int
+
+    @property
+    def byte_reduction(self) -> float:
+        return 1 - self.compact_bytes / self.raw_bytes if self.raw_bytes else 0.0
+
+    @property
+    def token_reduction(self) -> float:
+        return 1 - self.compact_tokens / self.raw_tokens if self.raw_tokens else 0.0
+
+
+def parse_fields(fields: str) -> tuple[str, ...]:
+    """解析逗号分隔的字段列表，为空时返回默认字段
+
+    Raises:
+        ValueError: 包含不支持的字段
+    """
+    names = [name.strip() for name in re.split(r"[,，\s]+", fields or "") if name.strip()]
+    if not names:
+        return DEFAULT_FIELDS
+    unknown = [name for name in names if name not in DEFAULT_FIELDS + OPTIONAL_FIELDS]
+    if unknown:
+        raise ValueError(f"不支持的字段: {'、'.join(unknown)}，可选字段: {', '.join(DEFAULT_FIELDS + OPTIONAL_FIELDS)}")
+    return tuple(dict.fromkeys((*_REQUIRED_FIELDS, *names)))
+
+
+def _project_item(item: dict, rank: int, fields: tuple[str, ...]) -> dict:
+    values = {
+        "rank": item.get("position") or rank,
+        "publication_number": item.get("publication_number"),
+        "patent_link": item.get("patent_link"),
+    }
+    if not values["publication_number"]:
+        match = _PATENT_ID.search(item.get("patent_id") or "")
+        values["publication_number"] = match.group(1) if match else None
+    projected = {}
+    for name in fields:
+        value = values[name] if name in values else item.get(name)
+        # 空值不输出，进一步减少字节数
+        if value not in (None, "", [], {}):
+            projected[name] = value
+    return projected
+
+
+def project_results(results: dict, fields: tuple[str, ...] = DEFAULT_FIELDS, page: int = 1, page_size: int = 0) -> dict:
+    """把 SerpAPI 的 google_patents 结果投影为精简的结构
+
+    Args:
+        results: SerpAPI 返回的结果
+        fields: 每个专利保留的字段
+        page: 页码，从1开始
+        page_size: 每页的专利数，为0时返回所有结果
+
+    Returns:
+        {"total_results", "page", "pages", "results"}，results 按相关性排名排列
+    """
+    items = results.get("organic_results") or []
+    pages = max(1, math.ceil(len(items) / page_size)) if page_size > 0 else 1
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size if page_size > 0 else 0
+    end = start + page_size if page_size > 0 else len(items)
+    return {
+        "total_results": (results.get("search_information") or {}).get("total_results", len(items)),
+        "page": page,
+        "pages": pages,
+        "results": [_project_item(item, rank, fields) for rank, item in enumerate(items[start:end], start + 1)],
+    }
+
+
+def compact_json(projection: dict) -> str:
+    """紧凑的 JSON：不转义中文，不带多余的空格"""
+    return json.dumps(projection, ensure_ascii=False, separators=(",", ":"))
+
+
+def estimate_tokens(text: str) -> int:
+    """估算 token 数：每个汉字约1个 token，其余非空白字符约4个一个 token（不依赖具体模型的分词器）"""
+    return cjk_count(text) + math.ceil(len(_NON_CJK.findall(text)) / 4)
+
+
+def measure(results: dict, compact: str) -> ProjectionSize:
+    """比较原始结果（转为字符串后）与精简 JSON 的大小"""
+    raw = str(results)
+    return ProjectionSize(
+        len(raw.encode("utf-8")), len(compact.encode("utf-8")), estimate_tokens(raw), estimate_tokens(compact),
+    )
+
+
+if __name__ == "__main__":
+    # 对缓存中的每次搜索，比较投影前后的字节数及估算的 token 数
+    from agent.utils.search_cache import SearchCache
+
+    cache = SearchCache(fetcher=lambda params: {"error": "只用于查看缓存"})
+    sizes = []
+    print("| 关键词 | 结果数 | 原始字节 | 精简字节 | 字节减少 | 原始tokens | 精简tokens | tokens减少 |")
+    print("| --- | --- | --- | --- | --- | --- | --- | --- |")
+    for params, results in cache.entries():
+        size = measure(results, compact_json(project_results(results)))
+        sizes.append(size)
+        print(
+            f"| {params['q'][:30]} | {len(results.get('organic_results') or [])} | {size.raw_bytes} | {size.compact_bytes} "
+            f"| {size.byte_reduction:.0%} | {size.raw_tokens} | {size.compact_tokens} | {size.token_reduction:.0%} |"
+        )
+    if sizes:
+        total = ProjectionSize(*(sum(getattr(size, name) for size in sizes) for name in ProjectionSize.__dataclass_fields__))
+        print(f"\n共 {len(sizes)} 次搜索：字节减少 {total.byte_reduction:.0%}，tokens减少 {total.token_reduction:.0%}")
+    else:
+        print("\n缓存中没有搜索结果")
@@ -0,0 +1,161 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import AsyncIterator, Callable
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_DONE = object()
+
+
+class AsyncStreamBridge:
+    """在后台线程的事件循环中运行异步生成器，转换为同步迭代器
+
+    - 有界队列：消费者取走数据后才通知生产者继续写入（背压），双方都阻塞等待而不是轮询
+    - 异步生成器抛出的异常会在消费者侧重新抛出
+    - stop() 立即唤醒消费者结束迭代，并取消后台任务
+    """
+
+    def __init__(self, agen_factory: Callable[[], AsyncIterator], maxsize: int = 16):
+        """
+        Args:
+            agen_factory: 返回异步生成器的函数，在后台事件循环中调用
+            maxsize: 队列容量
+        """
+        self._agen_factory = agen_factory
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._loop = None
+        self._task = None
+        self._not_full = None
+        self._thread = None
+        self._started = threading.Event()
+        self._stopped = threading.Event()
+        self.finished = threading.Event()
+
+    def start(self):
+        """启动后台线程，重复调用无效"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self):
+        """停止生成：取消后台任务，并唤醒等待中的消费者"""
+        self._stopped.set()
+        self._call_in_loop(self._task.cancel if self._task else None)
+        try:
+            self._queue.put_nowait(_DONE)
+        except queue.Full:
+            # 队列满时消费者不会阻塞，取数据后会检查停止标志
+            pass
+
+    def join(self, timeout: float = None) -> bool:
+        """等待后台任务结束
+
+        Returns:
+            是否已结束
+        """
+        return self.finished.wait(timeout)
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                item = self._queue.get()
+                self._call_in_loop(self._not_full.set)
+                if item is _DONE or self._stopped.is_set():
+                    return
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield item
+        finally:
+            # 正常结束时后台任务已完成；消费者提前退出时取消后台任务
+            self.stop()
+
+    def _call_in_loop(self, callback):
+        if callback is None or self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._not_full = asyncio.Event()
+        self._task = asyncio.create_task(self._pump())
+        self._started.set()
+        if self._stopped.is_set():
+            self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.finished.set()
+
+    async def _put(self, item):
+        while True:
+            # 先清除再尝试写入，避免错过消费者在两步之间发出的通知
+            self._not_full.clear()
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                await self._not_full.wait()
+
+    async def _pump(self):
+        terminal = _DONE
+        try:
+            async for item in self._agen_factory():
+                await self._put(item)
+        except asyncio.CancelledError:
+            return
+        except Exception as exc:
+            terminal = _Failure(exc)
+        await self._put(terminal)
+
+
+def _measure(chunks: int = 20, interval: float = 0.1) -> dict:
+    """测量空闲等待期间的CPU占用及数据块的传递延迟
+
+    Args:
+        chunks: 数据块个数
+        interval: 生产者产出数据块的间隔（秒），期间双方都处于空闲等待
+    """
+    async def _producer():
+        for _ in range(chunks):
+            await asyncio.sleep(interval)
+            yield time.perf_counter()
+
+    latencies = []
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for sent_at in AsyncStreamBridge(_producer):
+        latencies.append(time.perf_counter() - sent_at)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    latencies.sort()
+    return {
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "cpu_percent": 100 * cpu / wall,
+        "latency_p50_ms": 1000 * latencies[len(latencies) // 2],
+        "latency_max_ms": 1000 * latencies[-1],
+    }
+
+
+if __name__ == "__main__":
+    for key, value in _measure().items():
+        print(f"{key}: {value:.3f}")
@@ -8,32 +8,72 @@ from agent.prompts import input_parser_prompt, patent_searcher_prompt, outline_g
 from agent.prompts import todo_prompt, claims_writer_prompt, description_writer_prompt, diagram_generator_prompt, markdown_merger_prompt
 
 from agent.utils.tools import get_filesystem_tools, get_markitdown_tools, get_google_patent_search_tools, get_learn_skills_tools
+from agent.utils.tools import get_patent_checks_tools
 
 from agent.utils import llm_model
-
-input_parser_subagent = None
-patent_searcher_subagent = None
-outline_generator_subagent = None
-abstract_writer_subagent = None
-claims_writer_subagent = None
-description_writer_part1_subagent = None
-description_writer_part2_subagent = None
-diagram_generator_subagent = None
-markdown_merger_subagent = None
-
-def init_subagents():
-    global input_parser_subagent, patent_searcher_subagent, outline_generator_subagent
-    global abstract_writer_subagent, claims_writer_subagent, description_writer_part1_subagent
-    global description_writer_part2_subagent, diagram_generator_subagent, markdown_merger_subagent
-
-    filesystem_tools = get_filesystem_tools()
-    markitdown_tools = get_markitdown_tools()
-    google_patent_search_tools = get_google_patent_search_tools()
-    learn_skills_tools = get_learn_skills_tools()
-
-    input_parser_subagent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=filesystem_tools+markitdown_tools,
+from agent.utils.tracing import TracingMiddleware, trace_scope
+
+# 子代理定义：名称 -> (工具描述, 提示词, 模型的温度档位, 使用的工具组)
+# 温度档位为 llm_model.temperatures 的键：low 对应 llm_temp_low，high 对应 llm_temp_high
+SUBAGENT_SPECS = {
+    "input_parser": (
+        "解析输入文档，提取结构化信息.", input_parser_prompt.prompt, "high",
+        ("filesystem", "markitdown"),
+    ),
+    "patent_searcher": (
+        "搜索相似专利，并进行分析总结.", patent_searcher_prompt.prompt, "high",
+        ("filesystem", "markitdown", "google_patent_search"),
+    ),
+    "outline_generator": (
+        "生成专利的大纲.", outline_generator_prompt.prompt, "high",
+        ("filesystem", "learn_skills"),
+    ),
+    "abstract_writer": (
+        "撰写专利的摘要.", abstract_writer_prompt.prompt, "high",
+        ("filesystem", "learn_skills", "patent_checks"),
+    ),
+    "claims_writer": (
+        "撰写专利的权利要求书.", claims_writer_prompt.prompt, "high",
+        ("filesystem", "learn_skills", "patent_checks"),
+    ),
+    "description_writer_part1": (
+        "撰写专利的说明书 part1：技术领域、背景技术、发明内容、附图说明.", description_writer_prompt.prompt_part1, "high",
+        ("filesystem", "learn_skills", "patent_checks"),
+    ),
+    "description_writer_part2": (
+        "撰写专利的说明书 part2：具体实施方式.", description_writer_prompt.prompt_part2, "high",
+        ("filesystem", "learn_skills", "patent_checks"),
+    ),
+    "diagram_generator": (
+        "撰写专利的说明书附图.", diagram_generator_prompt.prompt, "low",
+        ("filesystem", "learn_skills", "patent_checks"),
+    ),
+    "markdown_merger": (
+        "生成完整专利，撰写专利分析报告.", markdown_merger_prompt.prompt, "high",
+        ("filesystem", "learn_skills", "patent_checks"),
+    ),
+}
+
+# 子代理使用的提示词，及其模型的温度档位（llm_model.temperatures 的键）
+SUBAGENT_PROMPTS = {name: spec[1] for name, spec in SUBAGENT_SPECS.items()}
+SUBAGENT_TEMPERATURES = {name: spec[2] for name, spec in SUBAGENT_SPECS.items()}
+
+_TOOL_LOADERS = {
+    "filesystem": get_filesystem_tools,
+    "markitdown": get_markitdown_tools,
+    "google_patent_search": get_google_patent_search_tools,
+    "learn_skills": get_learn_skills_tools,
+    "patent_checks": get_patent_checks_tools,
+}
+
+# init_subagents() 创建的默认子代理，供模块级的 call_*_subagent 工具使用
+_subagents = {}
+
+
+def _create_subagent(model, tools):
+    return create_agent(
+        model=model,
+        tools=tools,
         middleware=[
             TodoListMiddleware(
                 system_prompt=todo_prompt.sys_prompt,
@@ -41,266 +81,68 @@ def init_subagents():
             ),
             ToolRetryMiddleware(
                 max_retries=0,
-            )
-        ],
-    )
-    patent_searcher_subagent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=filesystem_tools+markitdown_tools+google_patent_search_tools,
-        middleware=[
-            TodoListMiddleware(
-                system_prompt=todo_prompt.sys_prompt,
-                tool_description=todo_prompt.tool_prompt
             ),
-            ToolRetryMiddleware(
-                max_retries=0,
-            )
+            TracingMiddleware(),
         ],
     )
-    outline_generator_subagent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=filesystem_tools + learn_skills_tools,
-        middleware=[
-            TodoListMiddleware(
-                system_prompt=todo_prompt.sys_prompt,
-                tool_description=todo_prompt.tool_prompt
-            ),
-            ToolRetryMiddleware(
-                max_retries=0,
-            )
-        ],
-    )
-    abstract_writer_subagent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=filesystem_tools + learn_skills_tools,
-        middleware=[
-            TodoListMiddleware(
-                system_prompt=todo_prompt.sys_prompt,
-                tool_description=todo_prompt.tool_prompt
-            ),
-            ToolRetryMiddleware(
-                max_retries=0,
-            )
-        ],
-    )
-    claims_writer_subagent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=filesystem_tools + learn_skills_tools,
-        middleware=[
-            TodoListMiddleware(
-                system_prompt=todo_prompt.sys_prompt,
-                tool_description=todo_prompt.tool_prompt
-            ),
-            ToolRetryMiddleware(
-                max_retries=0,
-            )
-        ],
-    )
-    description_writer_part1_subagent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=filesystem_tools + learn_skills_tools,
-        middleware=[
-            TodoListMiddleware(
-                system_prompt=todo_prompt.sys_prompt,
-                tool_description=todo_prompt.tool_prompt
-            ),
-            ToolRetryMiddleware(
-                max_retries=0,
-            )
-        ],
-    )
-    description_writer_part2_subagent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=filesystem_tools + learn_skills_tools,
-        middleware=[
-            TodoListMiddleware(
-                system_prompt=todo_prompt.sys_prompt,
-                tool_description=todo_prompt.tool_prompt
-            ),
-            ToolRetryMiddleware(
-                max_retries=0,
-            )
-        ],
-    )
-    diagram_generator_subagent = create_agent(
-        model=llm_model.llm_temp_low,
-        tools=filesystem_tools + learn_skills_tools,
-        middleware=[
-            TodoListMiddleware(
-                system_prompt=todo_prompt.sys_prompt,
-                tool_description=todo_prompt.tool_prompt
-            ),
-            ToolRetryMiddleware(
-                max_retries=0,
-            )
-        ],
-    )
-    markdown_merger_subagent = create_agent(
-        model=llm_model.llm_temp_high,
-        tools=filesystem_tools + learn_skills_tools,
-        middleware=[
-            TodoListMiddleware(
-                system_prompt=todo_prompt.sys_prompt,
-                tool_description=todo_prompt.tool_prompt
-            ),
-            ToolRetryMiddleware(
-                max_retries=0,
-            )
-        ],
-    )
-
-@tool(
-    "input_parser",
-    parse_docstring=True
-)
-async def call_input_parser_subagent(job_content: str) -> str:
-    """解析输入文档，提取结构化信息.
-
-    Args:
-        job_content: 委托的任务内容
-    """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=input_parser_prompt.prompt)]
-    result = await input_parser_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
-
-
-@tool(
-    "patent_searcher",
-    parse_docstring=True
-)
-async def call_patent_searcher_subagent(job_content: str):
-    """搜索相似专利，并进行分析总结.
-
-    Args:
-        job_content: 委托的任务内容
-    """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=patent_searcher_prompt.prompt)]
-    result = await patent_searcher_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
-
-
-@tool(
-    "outline_generator",
-    parse_docstring=True
-)
-async def call_outline_generator_subagent(job_content: str) -> str:
-    """生成专利的大纲.
-
-    Args:
-        job_content: 委托的任务内容
-    """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=outline_generator_prompt.prompt)]
-    result = await outline_generator_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
-
 
 
-@tool(
-    "abstract_writer",
-    parse_docstring=True
-)
-async def call_abstract_writer_subagent(job_content: str) -> str:
-    """撰写专利的摘要.
+def create_subagents(llm_temp_low, llm_temp_high) -> dict:
+    """使用给定的模型创建一组独立的子代理
 
     Args:
-        job_content: 委托的任务内容
-    """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=abstract_writer_prompt.prompt)]
-    result = await abstract_writer_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
-
-
-
+        llm_temp_low: 低温度模型
+        llm_temp_high: 高温度模型
 
-@tool(
-    "claims_writer",
-    parse_docstring=True
-)
-async def call_claims_writer_subagent(job_content: str) -> str:
-    """撰写专利的权利要求书.
-
-    Args:
-        job_content: 委托的任务内容
+    Returns:
+        子代理名称 -> 子代理
     """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=claims_writer_prompt.prompt)]
-    result = await claims_writer_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
-
+    tool_groups = {group: loader() for group, loader in _TOOL_LOADERS.items()}
+    models = {"low": llm_temp_low, "high": llm_temp_high}
+    return {
+        name: _create_subagent(models[temperature], [item for group in groups for item in tool_groups[group]])
+        for name, (_, _, temperature, groups) in SUBAGENT_SPECS.items()
+    }
 
-@tool(
-    "description_writer_part1",
-    parse_docstring=True
-)
-async def call_description_writer_part1_subagent(job_content: str) -> str:
-    """撰写专利的说明书 part1：技术领域、背景技术、发明内容、附图说明.
-
-    Args:
-        job_content: 委托的任务内容
-    """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=description_writer_prompt.prompt_part1)]
-    result = await description_writer_part1_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
 
+def _create_subagent_tool(name: str, subagents: dict):
+    description, prompt, _, _ = SUBAGENT_SPECS[name]
 
+    async def call_subagent(job_content: str) -> str:
+        messages = [HumanMessage(content=job_content), HumanMessage(content=prompt)]
+        with trace_scope(stage=name):
+            result = await subagents[name].ainvoke({
+                "messages": messages
+            })
+        return result["messages"][-1].content
 
-@tool(
-    "description_writer_part2",
-    parse_docstring=True
-)
-async def call_description_writer_part2_subagent(job_content: str) -> str:
-    """撰写专利的说明书 part2：具体实施方式.
+    call_subagent.__doc__ = f"""{description}
 
     Args:
         job_content: 委托的任务内容
     """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=description_writer_prompt.prompt_part2)]
-    result = await description_writer_part2_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
+    return tool(name, parse_docstring=True)(call_subagent)
 
 
-@tool(
-    "diagram_generator",
-    parse_docstring=True
-)
-async def call_diagram_generator_subagent(job_content: str) -> str:
-    """撰写专利的说明书附图.
+def create_subagent_tools(subagents: dict) -> list:
+    """创建调用给定子代理的工具，工具名称与子代理名称一致
 
     Args:
-        job_content: 委托的任务内容
+        subagents: 子代理名称 -> 子代理
     """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=diagram_generator_prompt.prompt)]
-    result = await diagram_generator_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
+    return [_create_subagent_tool(name, subagents) for name in SUBAGENT_SPECS]
 
 
-@tool(
-    "markdown_merger",
-    parse_docstring=True
-)
-async def call_markdown_merger_subagent(job_content: str) -> str:
-    """生成完整专利，撰写专利分析报告.
-
-    Args:
-        job_content: 委托的任务内容
-    """
-    messages = [HumanMessage(content=job_content), HumanMessage(content=markdown_merger_prompt.prompt)]
-    result = await markdown_merger_subagent.ainvoke({
-        "messages": messages
-    })
-    return result["messages"][-1].content
\ No newline at end of file
+def init_subagents():
+    _subagents.update(create_subagents(llm_model.llm_temp_low, llm_model.llm_temp_high))
+
+
+call_input_parser_subagent = _create_subagent_tool("input_parser", _subagents)
+call_patent_searcher_subagent = _create_subagent_tool("patent_searcher", _subagents)
+call_outline_generator_subagent = _create_subagent_tool("outline_generator", _subagents)
+call_abstract_writer_subagent = _create_subagent_tool("abstract_writer", _subagents)
+call_claims_writer_subagent = _create_subagent_tool("claims_writer", _subagents)
+call_description_writer_part1_subagent = _create_subagent_tool("description_writer_part1", _subagents)
+call_description_writer_part2_subagent = _create_subagent_tool("description_writer_part2", _subagents)
+call_diagram_generator_subagent = _create_subagent_tool("diagram_generator", _subagents)
+call_markdown_merger_subagent = _create_subagent_tool("markdown_merger", _subagents)
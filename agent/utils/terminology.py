@@ -0,0 +1,257 @@
+"""术语一致性检查
+
+术语来自 parsed_info.json 中的技术关键词及权利要求中引入的术语。每个术语连同按规则生成的不一致写法
+（同义词替换、插入"的"、大小写及空格的差异）构建一个 Aho-Corasick 自动机，对完整专利只扫描一遍，检查：
+- 不一致写法：同一术语使用了不同的写法
+- 先用后定义：术语在摘要、权利要求书或说明书中第一次出现时前面是"所述""该""上述"
+- 说明书缺少：权利要求中的术语在说明书中没有出现
+"""
+import json
+import re
+from bisect import bisect_right
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+from agent.utils.claims_checker import claim_terms, parse_claims
+
+# 完整专利中各部分的标题
+_PARTS = re.compile(r"^#\s*(摘要|权利要求书|专利说明书|说明书附图)\s*$", re.MULTILINE)
+# 第一次出现时不应有的指代词
+_REFERRING = ("所述的", "所述", "上述", "该")
+# 可以互相替换、但在一篇专利中应保持统一的词
+_SYNONYMS = (
+    ("模块", "单元", "组件"),
+    ("数据", "信息"),
+    ("装置", "设备"),
+    ("阈值", "门限值", "门限"),
+    ("服务器", "服务端"),
+    ("客户端", "用户端"),
+    ("图像", "图片"),
+)
+_KEYWORD_KEY = re.compile(r"关键词|关键字|keyword", re.IGNORECASE)
+_KEYWORD_SEPARATOR = re.compile(r"[、,，;；/\s]+")
+_ASCII = re.compile(r"[A-Za-z]")
+
+# 每类问题附带的片段的最大字数
+_EXCERPT_CHARS = 40
+
+
+class TermAutomaton:
+    """Aho-Corasick 多模式匹配自动机：一次扫描找出文本中所有模式的所有出现位置"""
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(pattern for pattern in patterns if pattern))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(index)
+
+        # 按广度优先的顺序计算失败指针，并把失败状态的输出合并到当前状态
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0) if state else 0
+                self._output[child] += self._output[self._fail[child]]
+
+    def finditer(self, text: str):
+        """Yields: (开始位置, 模式)，按结束位置排序"""
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._output[state]:
+                pattern = self.patterns[index]
+                yield position + 1 - len(pattern), pattern
+
+
+@dataclass
+class TermUsage:
+    """一个术语在完整专利中的使用情况
+
+    Attributes:
+        term: 术语
+        source: 来源（关键词、权利要求）
+        counts: 部分 -> 出现次数
+        variants: 不一致写法 -> 出现次数
+        variant_excerpt: 第一处不一致写法所在的片段
+        undefined: 第一次出现时前面是指代词的部分 -> 片段
+    """
+    term: str
+    source: str
+    counts: Counter = field(default_factory=Counter)
+    variants: Counter = field(default_factory=Counter)
+    variant_excerpt: str = ""
+    undefined: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class TermIssue:
+    """一个问题
+
+    Attributes:
+        term: 术语
+        kind: 不一致写法、先用后定义、说明书缺少
+        message: 问题说明
+    """
+    term: str
+    kind: str
+    message: str
+
+    def __str__(self):
+        return f"术语'{self.term}' {self.kind}: {self.message}"
+
+
+def load_keywords(parsed_info: str) -> list[str]:
+    """parsed_info.json 中的技术关键词：键名包含"关键词"或"keyword"的值，可以是列表或用顿号、逗号分隔的字符串"""
+    try:
+        data = json.loads(parsed_info)
+    except ValueError:
+        return []
+    keywords = []
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, value in item.items():
+                if _KEYWORD_KEY.search(str(key)):
+                    values = value if isinstance(value, list) else [value]
+                    keywords += [part for text in values if isinstance(text, str) for part in _KEYWORD_SEPARATOR.split(text)]
+                else:
+                    stack.append(value)
+        elif isinstance(item, list):
+            stack += item
+    return list(dict.fromkeys(keyword.strip() for keyword in keywords if len(keyword.strip()) >= 2))
+
+
+def term_variants(term: str) -> set[str]:
+    """按规则生成术语的不一致写法（不包括术语本身）"""
+    variants = set()
+    for group in _SYNONYMS:
+        for word in group:
+            if word in term:
+                variants |= {term.replace(word, other) for other in group if other != word}
+    if not _ASCII.search(term):
+        variants |= {term[:index] + "的" + term[index:] for index in range(2, len(term) - 1) if "的" not in term[index - 1:index + 1]}
+    else:
+        variants |= {term.lower(), term.upper(), term.replace(" ", ""), term.replace("-", "")}
+        variants |= {re.sub(r"(?<=[A-Za-z0-9])(?=[一-鿿])|(?<=[一-鿿])(?=[A-Za-z0-9])", " ", term)}
+    variants.discard(term)
+    return variants
+
+
+def scan_terms(text: str, terms: dict[str, str]) -> dict[str, TermUsage]:
+    """扫描完整专利
+
+    Args:
+        text: 完整专利内容
+        terms: 术语 -> 来源
+
+    Returns:
+        术语 -> 使用情况
+    """
+    usages = {term: TermUsage(term, source) for term, source in terms.items()}
+    canonical = {term: term for term in terms}
+    for term in terms:
+        for variant in term_variants(term):
+            canonical.setdefault(variant, term)
+    automaton = TermAutomaton(canonical)
+
+    part_starts, part_names = [0], ["摘要"]
+    for match in _PARTS.finditer(text):
+        part_starts.append(match.start())
+        part_names.append(match.group(1))
+
+    # 同一位置保留最长的匹配，被更长的术语覆盖的不一致写法不计入（如"处理信息"出现在术语"待处理信息"中）
+    matches = sorted(automaton.finditer(text), key=lambda item: (item[0], -len(item[1])))
+    covered_end = 0
+    for start, pattern in matches:
+        term = canonical[pattern]
+        usage = usages[term]
+        end = start + len(pattern)
+        part = part_names[bisect_right(part_starts, start) - 1]
+        if pattern != term:
+            if end <= covered_end:
+                continue
+            usage.variants[pattern] += 1
+            usage.variant_excerpt = usage.variant_excerpt or _excerpt(text, start, end)
+            continue
+        covered_end = max(covered_end, end)
+        if not usage.counts[part] and text[max(0, start - 3):start].endswith(_REFERRING):
+            usage.undefined[part] = _excerpt(text, start, end)
+        usage.counts[part] += 1
+    return usages
+
+
+def _excerpt(text: str, start: int, end: int) -> str:
+    left = max(text.rfind("\n", 0, start) + 1, start - _EXCERPT_CHARS // 2)
+    right = text.find("\n", end)
+    right = min(right if right >= 0 else len(text), end + _EXCERPT_CHARS // 2)
+    return text[left:right].strip()
+
+
+def collect_terms(parsed_info: str, claims: str) -> dict[str, str]:
+    """需要检查的术语：技术关键词及权利要求中引入的术语
+
+    Returns:
+        术语 -> 来源（关键词、权利要求）
+    """
+    terms = {keyword: "关键词" for keyword in load_keywords(parsed_info)}
+    for term in claim_terms(parse_claims(claims)):
+        terms.setdefault(term, "权利要求")
+    return terms
+
+
+def terminology_issues(usages: dict[str, TermUsage]) -> list[TermIssue]:
+    """不一致写法、先用后定义、权利要求术语在说明书中缺少"""
+    issues = []
+    for term, usage in usages.items():
+        if usage.variants:
+            written = "、".join(f"'{variant}'{count}次" for variant, count in usage.variants.most_common())
+            issues.append(TermIssue(term, "不一致写法", f"同时写作{written}，如：{usage.variant_excerpt}"))
+        for part, excerpt in usage.undefined.items():
+            issues.append(TermIssue(term, "先用后定义", f"在{part}中第一次出现时使用了指代词：{excerpt}"))
+        if usage.source == "权利要求" and not usage.counts["专利说明书"]:
+            issues.append(TermIssue(term, "说明书缺少", "权利要求中的术语在说明书中没有出现"))
+    return issues
+
+
+def check_text(text: str, parsed_info: str, claims: str) -> tuple[dict[str, TermUsage], list[TermIssue]]:
+    """检查完整专利的术语一致性
+
+    Args:
+        text: 完整专利内容
+        parsed_info: parsed_info.json 的内容
+        claims: 权利要求书内容
+
+    Returns:
+        (术语 -> 使用情况, 问题列表)
+    """
+    usages = scan_terms(text, collect_terms(parsed_info, claims))
+    return usages, terminology_issues(usages)
+
+
+def usage_table(usages: dict[str, TermUsage]) -> str:
+    """术语使用情况（Markdown 表格）"""
+    lines = ["| 术语 | 来源 | 摘要 | 权利要求书 | 说明书 | 不一致写法 |", "| --- | --- | --- | --- | --- | --- |"]
+    for term, usage in usages.items():
+        variants = "、".join(usage.variants) or "-"
+        lines.append(
+            f"| {term} | {usage.source} | {usage.counts['摘要']} | {usage.counts['权利要求书']} "
+            f"| {usage.counts['专利说明书']} | {variants} |"
+        )
+    return "\n".join(lines)
@@ -1,73 +1,129 @@
 import asyncio
+import threading
 from pathlib import Path
 from langchain_mcp_adapters.client import MultiServerMCPClient
 import os
 
+from agent.utils.mcp_pool import MCPSessionPool
+from agent.utils.native_tools import NATIVE_SERVERS, aget_native_tools
+
 # 获取项目根目录（tools.py 位于 agent/utils/，向上两级到项目根目录）
 _PROJECT_ROOT = Path(__file__).parent.parent.parent
 _MCP_SERVER_DIR = _PROJECT_ROOT / "mcp_server"
 
-_client = MultiServerMCPClient(
-    {
-        "filesystem": {
-            "command": "python",
-            "args": [
-                str(_MCP_SERVER_DIR / "filesystem.py"),
-            ],
-            "transport": "stdio",
-        },
-        "markitdown": {
-            "command": "markitdown-mcp",
-            "args": [],
-            "transport": "stdio",
-        },
-        "google_patent_search": {
-            "command": "python",
-            "args": [
-                str(_MCP_SERVER_DIR / "google_patent_search.py"),
-            ],
-            "env": {
-                "SERPAPI_API_KEY": os.getenv("SERPAPI_API_KEY")
-            },
-            "transport": "stdio"
-        },
-        "learn_skills": {
-            "command": "python",
-            "args": [
-                str(_MCP_SERVER_DIR / "skills.py"),
-            ],
-            "transport": "stdio",
+_CONNECTIONS = {
+    "filesystem": {
+        "command": "python",
+        "args": [
+            str(_MCP_SERVER_DIR / "filesystem.py"),
+        ],
+        "transport": "stdio",
+    },
+    "markitdown": {
+        "command": "markitdown-mcp",
+        "args": [],
+        "transport": "stdio",
+    },
+    "google_patent_search": {
+        "command": "python",
+        "args": [
+            str(_MCP_SERVER_DIR / "google_patent_search.py"),
+        ],
+        "env": {
+            "SERPAPI_API_KEY": os.getenv("SERPAPI_API_KEY")
         },
-    }
-)
+        "transport": "stdio"
+    },
+    "learn_skills": {
+        "command": "python",
+        "args": [
+            str(_MCP_SERVER_DIR / "skills.py"),
+        ],
+        "transport": "stdio",
+    },
+    "patent_checks": {
+        "command": "python",
+        "args": [
+            str(_MCP_SERVER_DIR / "patent_checks.py"),
+        ],
+        "transport": "stdio",
+    },
+}
+
+_client = MultiServerMCPClient(_CONNECTIONS)
+
+# 工具调用方式（环境变量 PATENTBOT_TOOL_MODE）：
+#   pool: 每个MCP服务器保持若干个长连接会话（默认）
+#   per_call: 每次工具调用启动一个新的MCP服务器进程
+#   native: filesystem、learn_skills、patent_checks 在进程内直接调用，其余服务器使用会话池
+TOOL_MODE = os.getenv("PATENTBOT_TOOL_MODE", "pool")
+
+# 会话池模式下每个服务器的会话数，即该服务器的最大并发调用数
+POOL_SIZES = {
+    "filesystem": 4,
+    "markitdown": 2,
+    "google_patent_search": 1,
+    "learn_skills": 1,
+    "patent_checks": 1,
+}
+_pools = {}
+
+# 每个进程只发现一次工具：工具调用时才建立与MCP服务器的连接，工具对象本身可以复用
+_tools_cache = {}
+_tools_lock = threading.Lock()
+
+def _get_pool(server_name: str) -> MCPSessionPool:
+    if server_name not in _pools:
+        _pools[server_name] = MCPSessionPool(server_name, _CONNECTIONS[server_name], size=POOL_SIZES[server_name])
+    return _pools[server_name]
+
+async def _load_tools(server_name: str):
+    if TOOL_MODE == "native" and server_name in NATIVE_SERVERS:
+        return await aget_native_tools(server_name)
+    if TOOL_MODE == "per_call":
+        return await _client.get_tools(server_name=server_name)
+    return await _get_pool(server_name).aget_tools()
+
+async def _aget_tools(server_name: str):
+    if server_name not in _tools_cache:
+        _tools_cache[server_name] = await _load_tools(server_name)
+    return list(_tools_cache[server_name])
+
+def _get_tools(server_name: str):
+    with _tools_lock:
+        if server_name not in _tools_cache:
+            _tools_cache[server_name] = asyncio.run(_load_tools(server_name))
+        return list(_tools_cache[server_name])
 
 async def aget_filesystem_tools():
-    filesystem_tools = await _client.get_tools(server_name="filesystem")
-    return filesystem_tools
+    return await _aget_tools("filesystem")
 
 def get_filesystem_tools():
-    return asyncio.run(aget_filesystem_tools())
+    return _get_tools("filesystem")
 
 async def aget_markitdown_tools():
-    markitdown_tools = await _client.get_tools(server_name="markitdown")
-    return markitdown_tools
+    return await _aget_tools("markitdown")
 
 def get_markitdown_tools():
-    return asyncio.run(aget_markitdown_tools())
+    return _get_tools("markitdown")
 
 async def aget_google_patent_search_tools():
-    google_patent_search_tools = await _client.get_tools(server_name="google_patent_search")
-    return google_patent_search_tools
+    return await _aget_tools("google_patent_search")
 
 def get_google_patent_search_tools():
-    return asyncio.run(aget_google_patent_search_tools())
+    return _get_tools("google_patent_search")
 
 async def aget_learn_skills_tools():
-    learn_skills = await _client.get_tools(server_name="learn_skills")
-    return learn_skills
+    return await _aget_tools("learn_skills")
 
 def get_learn_skills_tools():
-    return asyncio.run(aget_learn_skills_tools())
+    return _get_tools("learn_skills")
+
+async def aget_patent_checks_tools():
+    return await _aget_tools("patent_checks")
+
+def get_patent_checks_tools():
+    return _get_tools("patent_checks")
 
 if __name__ == "__main__":
     ...
\ No newline at end of file
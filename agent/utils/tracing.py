@@ -0,0 +1,260 @@
+"""代理运行追踪
+
+TracingMiddleware 为每次模型调用、工具调用记录一条 span（耗时、token用量、请求/响应字节数、重试次数），
+写入项目目录下的 trace.jsonl。查看汇总:
+    python -m agent.utils.tracing workspace/temp_xxxx/ --top 10
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, ToolMessage
+
+TRACE_FILE = "trace.jsonl"
+
+# 当前追踪的项目目录及阶段（子代理名称），由 trace_scope 设置，随 asyncio 任务传递
+_trace_project = ContextVar("trace_project", default=None)
+_trace_stage = ContextVar("trace_stage", default=None)
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def trace_scope(project_dir: Path = None, stage: str = None):
+    """在此范围内的模型调用、工具调用记录到 project_dir/trace.jsonl，并标记为 stage
+
+    Args:
+        project_dir: 项目目录，为空时沿用外层的设置
+        stage: 阶段名称，为空时沿用外层的设置
+    """
+    tokens = []
+    if project_dir is not None:
+        tokens.append((_trace_project, _trace_project.set(Path(project_dir))))
+    if stage is not None:
+        tokens.append((_trace_stage, _trace_stage.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            try:
+                var.reset(token)
+            except ValueError:
+                # 异步生成器未迭代完就被回收时，会在其他上下文中执行 finally
+                pass
+
+
+def record_span(span: dict):
+    """追加一条 span，未设置项目目录时忽略"""
+    project_dir = _trace_project.get()
+    if project_dir is None:
+        return
+    span = {"stage": _trace_stage.get(), **span}
+    line = json.dumps(span, ensure_ascii=False)
+    with _write_lock:
+        with open(project_dir / TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _content_bytes(content) -> int:
+    if isinstance(content, str):
+        return len(content.encode("utf-8"))
+    return len(json.dumps(content, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _message_bytes(message) -> int:
+    size = _content_bytes(message.content)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        size += _content_bytes([call["args"] for call in message.tool_calls])
+    return size
+
+
+class TracingMiddleware(AgentMiddleware):
+    """记录模型调用及工具调用的 span
+
+    放在 ToolRetryMiddleware 之后（内层），重试时每次尝试各记录一条 span。
+    """
+
+    def __init__(self):
+        super().__init__()
+        # tool_call_id -> 已尝试次数
+        self._attempts = defaultdict(int)
+        self._attempts_lock = threading.Lock()
+
+    async def awrap_model_call(self, request, handler):
+        request_bytes = sum(_message_bytes(item) for item in request.messages)
+        if request.system_message is not None:
+            request_bytes += _message_bytes(request.system_message)
+        span = {
+            "type": "model",
+            "name": getattr(request.model, "model_name", None) or type(request.model).__name__,
+            "start": time.time(),
+            "messages": len(request.messages),
+            "request_bytes": request_bytes,
+        }
+        start = time.perf_counter()
+        try:
+            response = await handler(request)
+        except Exception as exc:
+            record_span({**span, "duration_ms": (time.perf_counter() - start) * 1000, "status": "error",
+                         "error": repr(exc)})
+            raise
+        messages = response.result if hasattr(response, "result") else [response]
+        message = next((item for item in messages if isinstance(item, AIMessage)), None)
+        usage = (message.usage_metadata if message is not None else None) or {}
+        record_span({
+            **span,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+            "status": "ok",
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "response_bytes": sum(_message_bytes(item) for item in messages),
+            "tool_calls": len(message.tool_calls) if message is not None else 0,
+        })
+        return response
+
+    async def awrap_tool_call(self, request, handler):
+        call = request.tool_call
+        with self._attempts_lock:
+            self._attempts[call["id"]] += 1
+            attempt = self._attempts[call["id"]]
+        span = {
+            "type": "tool",
+            "name": call["name"],
+            "start": time.time(),
+            "attempt": attempt,
+            "request_bytes": _content_bytes(call["args"]),
+        }
+        start = time.perf_counter()
+        try:
+            result = await handler(request)
+        except Exception as exc:
+            record_span({**span, "duration_ms": (time.perf_counter() - start) * 1000, "status": "error",
+                         "error": repr(exc)})
+            raise
+        with self._attempts_lock:
+            # 成功返回后不会再重试
+            self._attempts.pop(call["id"], None)
+        status = "ok"
+        response_bytes = 0
+        if isinstance(result, ToolMessage):
+            status = "error" if result.status == "error" else "ok"
+            response_bytes = _content_bytes(result.content)
+        record_span({**span, "duration_ms": (time.perf_counter() - start) * 1000, "status": status,
+                     "response_bytes": response_bytes})
+        return result
+
+
+def load_trace(project_dir: Path) -> list[dict]:
+    """读取项目目录下的 trace.jsonl"""
+    trace_file = Path(project_dir) / TRACE_FILE
+    if not trace_file.is_file():
+        return []
+    with open(trace_file, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize_trace(spans: list[dict], top: int = 10) -> str:
+    """生成追踪汇总（Markdown）：各阶段耗时及token用量、最慢的调用、token用量最多的模型调用、各工具的耗时、分段写作的各段耗时
+
+    Args:
+        spans: span 列表
+        top: 列出的调用个数
+    """
+    stages = defaultdict(lambda: defaultdict(float))
+    for span in spans:
+        item = stages[span.get("stage") or "-"]
+        if span["type"] == "stage":
+            item["wall_ms"] += span["duration_ms"]
+            item["attempts"] += 1
+        elif span["type"] in ("model", "chunk"):
+            # 分段写作直接调用模型，不经过中间件
+            item["model_calls"] += 1
+            item["model_ms"] += span["duration_ms"]
+            item["input_tokens"] += span.get("input_tokens", 0)
+            item["output_tokens"] += span.get("output_tokens", 0)
+        elif span["type"] == "tool":
+            item["tool_calls"] += 1
+            item["tool_ms"] += span["duration_ms"]
+            item["tool_errors"] += span["status"] == "error"
+
+    lines = [
+        "## 各阶段",
+        "",
+        "| 阶段 | 耗时（秒） | 委托次数 | 模型调用 | 模型耗时（秒） | 输入tokens | 输出tokens | 工具调用 | 工具耗时（秒） | 工具错误 |",
+        "| --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    ordered = sorted(stages.items(), key=lambda pair: -(pair[1]["wall_ms"] or pair[1]["model_ms"] + pair[1]["tool_ms"]))
+    for name, item in ordered:
+        lines.append(
+            f"| {name} | {item['wall_ms'] / 1000:.1f} | {int(item['attempts'])} | {int(item['model_calls'])} "
+            f"| {item['model_ms'] / 1000:.1f} | {int(item['input_tokens'])} | {int(item['output_tokens'])} "
+            f"| {int(item['tool_calls'])} | {item['tool_ms'] / 1000:.1f} | {int(item['tool_errors'])} |"
+        )
+
+    calls = [span for span in spans if span["type"] in ("model", "chunk", "tool")]
+    lines += ["", f"## 最慢的 {top} 次调用", "", "| 阶段 | 类型 | 名称 | 耗时（秒） | 请求字节 | 响应字节 |", "| --- | --- | --- | --- | --- | --- |"]
+    for span in sorted(calls, key=lambda item: -item["duration_ms"])[:top]:
+        lines.append(
+            f"| {span.get('stage') or '-'} | {span['type']} | {span['name']} | {span['duration_ms'] / 1000:.1f} "
+            f"| {span.get('request_bytes', 0)} | {span.get('response_bytes', 0)} |"
+        )
+
+    # 分段写作的每一段也是一次模型调用
+    models = [span for span in spans if span["type"] in ("model", "chunk")]
+    lines += ["", f"## token用量最多的 {top} 次模型调用", "", "| 阶段 | 消息数 | 输入tokens | 输出tokens | 耗时（秒） |", "| --- | --- | --- | --- | --- |"]
+    for span in sorted(models, key=lambda item: -(item.get("input_tokens", 0) + item.get("output_tokens", 0)))[:top]:
+        lines.append(
+            f"| {span.get('stage') or '-'} | {span.get('messages', '-')} | {span.get('input_tokens', 0)} "
+            f"| {span.get('output_tokens', 0)} | {span['duration_ms'] / 1000:.1f} |"
+        )
+
+    tools = defaultdict(lambda: [0, 0.0, 0, 0])
+    for span in spans:
+        if span["type"] == "tool":
+            item = tools[span["name"]]
+            item[0] += 1
+            item[1] += span["duration_ms"]
+            item[2] += span.get("response_bytes", 0)
+            item[3] += span["attempt"] > 1
+    lines += ["", "## 各工具", "", "| 工具 | 调用次数 | 总耗时（秒） | 平均耗时（毫秒） | 响应字节 | 重试次数 |", "| --- | --- | --- | --- | --- | --- |"]
+    for name, (count, duration, response_bytes, retries) in sorted(tools.items(), key=lambda pair: -pair[1][1]):
+        lines.append(f"| {name} | {count} | {duration / 1000:.1f} | {duration / count:.0f} | {response_bytes} | {retries} |")
+
+    chunks = [span for span in spans if span["type"] == "chunk"]
+    if chunks:
+        lines += ["", "## 分段写作", "", "| 阶段 | 段落 | 续写序号 | 字数 | 耗时（秒） | 结束原因 | 输出tokens |", "| --- | --- | --- | --- | --- | --- | --- |"]
+        for span in chunks:
+            lines.append(
+                f"| {span.get('stage') or '-'} | {span['name']} | {span['continuation']} | {span['chars']} "
+                f"| {span['duration_ms'] / 1000:.1f} | {span.get('finish_reason') or '-'} | {span.get('output_tokens', 0)} |"
+            )
+
+    total_in = sum(span.get("input_tokens", 0) for span in models)
+    total_out = sum(span.get("output_tokens", 0) for span in models)
+    lines += ["", f"共 {len(models)} 次模型调用（输入 {total_in} tokens，输出 {total_out} tokens），"
+                  f"{sum(item[0] for item in tools.values())} 次工具调用"]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="汇总专利生成过程的追踪记录")
+    parser.add_argument("project_dir", help="项目目录 workspace/temp_[uuid]/")
+    parser.add_argument("--top", type=int, default=10, help="列出的调用个数")
+    args = parser.parse_args(argv)
+
+    spans = load_trace(Path(args.project_dir))
+    if not spans:
+        print(f"没有找到追踪记录: {Path(args.project_dir) / TRACE_FILE}", file=sys.stderr)
+        return 1
+    print(summarize_trace(spans, top=args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
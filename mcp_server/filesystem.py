@@ -262,6 +262,34 @@ def append_file(path_to_file: str, content: str) -> str:
     except Exception as exc:
         return f"追加失败: {target} {exc}"
 
+@mcp.tool()
+def edit_file(path_to_file: str, old_text: str, new_text: str) -> str:
+    """将文件中的一段内容替换为新内容，用于局部修改（old_text 必须在文件中唯一出现）
+
+    Args:
+        path_to_file: 文件路径（绝对路径）
+        old_text: 要替换的原内容（包含足够的上下文，保证唯一）
+        new_text: 新内容
+    """
+    target = Path(path_to_file).expanduser().resolve()
+    has_permission, error_msg = _check_path_permission(target)
+    if not has_permission:
+        return error_msg
+    if not target.is_file():
+        return f"文件不存在: {target}"
+
+    try:
+        content = target.read_text(encoding="utf-8")
+        count = content.count(old_text) if old_text else 0
+        if count == 0:
+            return f"修改失败: 文件中没有找到要替换的内容 {target}"
+        if count > 1:
+            return f"修改失败: 要替换的内容在文件中出现了{count}次，请包含更多上下文 {target}"
+        target.write_text(content.replace(old_text, new_text, 1), encoding="utf-8")
+        return f"文件修改成功: {target}"
+    except Exception as exc:
+        return f"修改失败: {target} {exc}"
+
 @mcp.tool()
 def join_files(path_to_files: list[str], output_file: str) -> str:
     """
@@ -1,11 +1,34 @@
+import os
+import sys
+from pathlib import Path
+
 from serpapi import GoogleSearch
 from mcp.server.fastmcp import FastMCP
-import os
+
+# 作为独立的MCP服务器运行时，项目根目录不在 sys.path 中
+_PROJECT_ROOT = Path(__file__).parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from agent.utils.search_cache import SearchCache, normalize_params
+from agent.utils.search_projection import compact_json, parse_fields, project_results
+
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 mcp = FastMCP("google_patent_search")
 
+
+def fetch_serpapi(params: dict) -> dict:
+    """调用 SerpAPI 的 google_patents 引擎搜索，消耗一次搜索次数"""
+    return GoogleSearch({**params, "api_key": SERPAPI_API_KEY, "engine": "google_patents"}).get_dict()
+
+
+# 免费账户每月只有250次搜索：相同的搜索（重试、同一技术交底书重新运行）直接使用缓存的结果
+search_cache = SearchCache(fetch_serpapi)
+
+
 @mcp.tool()
-def search_patents(query: str, country: str, status: str,  sort: str, num: str) -> str:
+def search_patents(query: str, country: str, status: str,  sort: str, num: str,
+                   fields: str = "", page: int = 1, page_size: int = 0) -> str:
     """google 专利搜索
 
     Args:
@@ -14,29 +37,28 @@ def search_patents(query: str, country: str, status: str,  sort: str, num: str)
         status: 专利状态：GRANT-授权状态，APPLICATION-申请状态
         sort: 排序方式：relevance-相关性, new-最新, old-最久
         num: 返回的结果数量，最小10，最大100
+        fields: 可选，逗号分隔的返回字段，默认为 rank,publication_number,title,assignee,priority_date,filing_date,
+            publication_date,grant_date,snippet,pdf；还可以选择 inventor,country_status,language,patent_link
+        page: 可选，页码，从1开始
+        page_size: 可选，每页的专利数，为0时返回全部结果；翻页使用同一次搜索的结果，不重新搜索
     Returns:
-        搜索结果
+        JSON格式的搜索结果：{"total_results":总数,"page":页码,"pages":页数,"results":[按相关性排名排列的专利]}
     """
     
     if(SERPAPI_API_KEY == None):
         return "工具不可用，没有配置SERPAPI_API_KEY"
     
-    if sort == 'relevance':
-        sort = None
-    
-    params = {
-        "api_key": SERPAPI_API_KEY,
-        "engine": "google_patents",
-        "q": query,
-        "country": country,
-        "status": status,
-        "sort": sort,
-        "num": num,
-    }
-
-    search = GoogleSearch(params)
-    results = search.get_dict()
-    return str(results)
+    try:
+        selected = parse_fields(fields)
+    except ValueError as exc:
+        return str(exc)
+    try:
+        results = search_cache.search(normalize_params(query, country, status, sort, num))
+    except Exception as exc:
+        return f"搜索失败: {exc}"
+    if "error" in results:
+        return f"搜索失败: {results['error']}"
+    return compact_json(project_results(results, selected, page, page_size))
     
 
 def main():
@@ -0,0 +1,241 @@
+import sys
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+
+# 作为独立的MCP服务器运行时，项目根目录不在 sys.path 中
+_PROJECT_ROOT = Path(__file__).parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from agent.utils.claim_support import claim_coverage, coverage_table, format_feature, low_coverage
+from agent.utils.claims_checker import check_claims_text, format_report
+from agent.utils.mermaid_validator import format_issues, validate_markdown, validate_mermaid
+from agent.utils.numeral_index import build_index, index_table, numeral_issues
+from agent.utils.outline_metrics import measure_project, metrics_table
+from agent.utils.patent_merger import (
+    CLAIMS, COMPLETE_PATENT, DESCRIPTION, FIGURES, PARSED_INFO, checks_table, compute_checks, flagged_excerpts, merge_patent,
+)
+from agent.utils.terminology import check_text, usage_table
+
+mcp = FastMCP("patent_checks")
+
+
+def _workspace_path(path: str) -> tuple[Path | None, str]:
+    """检查路径是否在工作目录下
+
+    Returns:
+        (绝对路径, 错误信息)，不在工作目录下时路径为 None
+    """
+    work_path = (_PROJECT_ROOT / "workspace").resolve()
+    target = Path(path).expanduser().resolve()
+    try:
+        target.relative_to(work_path)
+    except ValueError:
+        return None, f"没有权限，不在工作目录{work_path}下"
+    return target, ""
+
+
+def _read_workspace_file(path_to_file: str) -> tuple[str | None, str]:
+    """读取工作目录下的文件
+
+    Returns:
+        (文件内容, 错误信息)，读取失败时文件内容为 None
+    """
+    target, error_msg = _workspace_path(path_to_file)
+    if target is None:
+        return None, error_msg
+    if not target.is_file():
+        return None, f"文件不存在: {target}"
+    try:
+        return target.read_text(encoding="utf-8"), ""
+    except Exception as exc:
+        return None, f"读取失败: {target} {exc}"
+
+
+@mcp.tool()
+def check_mermaid_file(path_to_file: str) -> str:
+    """校验Markdown文件中所有mermaid图表（flowchart、sequenceDiagram）的语法及步骤编号/模块编号，返回带行号的问题
+
+    Args:
+        path_to_file: Markdown文件路径（绝对路径），如说明书附图
+    """
+    content, error_msg = _read_workspace_file(path_to_file)
+    if content is None:
+        return error_msg
+    count, issues = validate_markdown(content)
+    if count == 0:
+        return f"没有找到mermaid代码块: {path_to_file}"
+    if not issues:
+        return f"校验通过，共 {count} 个图表"
+    return f"共 {count} 个图表，" + format_issues(issues)
+
+
+@mcp.tool()
+def check_mermaid_code(code: str, figure: str = "") -> str:
+    """校验一个mermaid图表（不含```代码块标记），返回带行号的问题
+
+    Args:
+        code: mermaid图表内容
+        figure: 图号（如"1"），填写时检查步骤编号/模块编号是否以图号开头
+    """
+    issues = validate_mermaid(code, figure=figure or None)
+    if not issues:
+        return "校验通过"
+    return format_issues(issues)
+
+
+@mcp.tool()
+def check_claims_file(path_to_file: str) -> str:
+    """检查权利要求书：编号是否连续，是否引用了自身、在后或不存在的权利要求，从属权利要求能否追溯到独立权利要求，
+    每个"所述X"之前是否出现过X（引用基础）。返回引用关系及带行号的问题
+
+    Args:
+        path_to_file: 权利要求书文件路径（绝对路径）
+    """
+    content, error_msg = _read_workspace_file(path_to_file)
+    if content is None:
+        return error_msg
+    return format_report(*check_claims_text(content))
+
+
+@mcp.tool()
+def check_claim_support(path_to_project: str) -> str:
+    """检查权利要求书的每个技术特征在说明书中是否有支持，返回每项权利要求的支持度，以及支持不足的特征和说明书中最相关的行
+
+    Args:
+        path_to_project: 项目目录（绝对路径），如 workspace/temp_xxxx
+    """
+    files = {}
+    for name in (CLAIMS, DESCRIPTION):
+        content, error_msg = _read_workspace_file(str(Path(path_to_project) / name))
+        if content is None:
+            return error_msg
+        files[name] = content
+    coverages = claim_coverage(files[CLAIMS], files[DESCRIPTION])
+    if not coverages:
+        return "没有找到权利要求的技术特征"
+    low = low_coverage(coverages)
+    result = f"{coverage_table(coverages)}\n\n"
+    if not low:
+        return result + "校验通过，所有技术特征在说明书中都有支持"
+    return result + f"发现 {len(low)} 个支持不足的特征：\n" + "\n".join(format_feature(feature) for feature in low)
+
+
+@mcp.tool()
+def check_reference_numerals(path_to_project: str) -> str:
+    """对照说明书'具体实施方式'与说明书附图中的步骤编号/模块编号（如101、201），返回编号对照表，
+    以及附图缺少、说明书缺少、名称不一致、重复的编号（带行号）
+
+    Args:
+        path_to_project: 项目目录（绝对路径），如 workspace/temp_xxxx
+    """
+    files = {}
+    for name in (DESCRIPTION, FIGURES):
+        content, error_msg = _read_workspace_file(str(Path(path_to_project) / name))
+        if content is None:
+            return error_msg
+        files[name] = content
+    index = build_index(files[DESCRIPTION], files[FIGURES])
+    if not index:
+        return "没有找到步骤编号/模块编号"
+    issues = numeral_issues(index)
+    result = f"{index_table(index, issues)}\n\n"
+    if not issues:
+        return result + f"校验通过，共 {len(index)} 个编号"
+    return result + f"发现 {len(issues)} 个问题：\n" + "\n".join(str(issue) for issue in issues)
+
+
+@mcp.tool()
+def check_terminology(path_to_project: str) -> str:
+    """检查技术关键词及权利要求术语：写法是否统一、是否先定义后使用、权利要求术语是否都在说明书中出现。
+    检查完整专利05_final/complete_patent.md，尚未合并时检查已完成的摘要、权利要求书、说明书、说明书附图
+
+    Args:
+        path_to_project: 项目目录（绝对路径），如 workspace/temp_xxxx
+    """
+    project_dir, error_msg = _workspace_path(path_to_project)
+    if project_dir is None:
+        return error_msg
+    if not project_dir.is_dir():
+        return f"路径不存在: {project_dir}"
+    complete = project_dir / COMPLETE_PATENT
+    text = complete.read_text(encoding="utf-8", errors="ignore") if complete.is_file() else merge_patent(project_dir)
+    texts = {}
+    for name in (PARSED_INFO, CLAIMS):
+        path = project_dir / name
+        texts[name] = path.read_text(encoding="utf-8", errors="ignore") if path.is_file() else ""
+    usages, issues = check_text(text, texts[PARSED_INFO], texts[CLAIMS])
+    if not usages:
+        return "没有找到技术关键词及权利要求术语"
+    result = f"{usage_table(usages)}\n\n"
+    if not issues:
+        return result + f"校验通过，共 {len(usages)} 个术语"
+    return result + f"发现 {len(issues)} 个问题：\n" + "\n".join(str(issue) for issue in issues)
+
+
+@mcp.tool()
+def check_outline_lengths(path_to_project: str) -> str:
+    """统计已完成的摘要、权利要求书及说明书各章节的汉字数，与大纲03_outline/patent_outline.md中的字数要求对照，
+    返回每个章节的字数、要求、偏差及需要补充还是删减。撰写过程中可以随时调用
+
+    Args:
+        path_to_project: 项目目录（绝对路径），如 workspace/temp_xxxx
+    """
+    project_dir, error_msg = _workspace_path(path_to_project)
+    if project_dir is None:
+        return error_msg
+    if not project_dir.is_dir():
+        return f"路径不存在: {project_dir}"
+    metrics = measure_project(project_dir)
+    if not metrics:
+        return "还没有写出有字数要求的章节"
+    failed = [metric for metric in metrics if not metric.ok]
+    result = f"{metrics_table(metrics)}\n\n"
+    if not failed:
+        return result + "校验通过，所有章节的字数都符合要求"
+    return result + f"{len(failed)} 个章节的字数不符合要求：" + "、".join(metric.section for metric in failed)
+
+
+@mcp.tool()
+def merge_patent_files(path_to_project: str) -> str:
+    """按 摘要->权利要求书->说明书->说明书附图 的顺序合并专利文件，保存为项目目录下的05_final/complete_patent.md
+
+    Args:
+        path_to_project: 项目目录（绝对路径），如 workspace/temp_xxxx
+    """
+    project_dir, error_msg = _workspace_path(path_to_project)
+    if project_dir is None:
+        return error_msg
+    if not project_dir.is_dir():
+        return f"路径不存在: {project_dir}"
+    output = project_dir / COMPLETE_PATENT
+    try:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(merge_patent(project_dir), encoding="utf-8")
+        return f"文件合并成功: {output}"
+    except Exception as exc:
+        return f"合并失败: {output} {exc}"
+
+
+@mcp.tool()
+def check_patent_metrics(path_to_project: str) -> str:
+    """在本地检查专利文件：章节完整性、权利要求编号及引用关系、附图编号及mermaid语法、各章节字数是否符合大纲，
+    返回指标检查表及未通过检查项的原文片段
+
+    Args:
+        path_to_project: 项目目录（绝对路径），如 workspace/temp_xxxx
+    """
+    project_dir, error_msg = _workspace_path(path_to_project)
+    if project_dir is None:
+        return error_msg
+    if not project_dir.is_dir():
+        return f"路径不存在: {project_dir}"
+    checks = compute_checks(project_dir)
+    excerpts = flagged_excerpts(checks)
+    result = f"# 指标检查\n\n{checks_table(checks)}"
+    return result + (f"\n\n# 未通过检查项的原文片段\n\n{excerpts}" if excerpts else "")
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
@@ -1,8 +1,20 @@
+import math
+import re
+import sys
+from collections import Counter
 from pathlib import Path
 from mcp.server.fastmcp import FastMCP
 
 mcp = FastMCP("learn_skills")
 
+_SKILLS_DIR = Path(__file__).parent / "skills"
+# 单个片段的最大字符数，超过时按段落拆分
+_MAX_CHUNK_CHARS = 1500
+# 按一至三级标题切分，四级及以下的标题保留在所属章节中
+_HEADING = re.compile(r"^(#{1,3})\s+(.*)$")
+_CJK = re.compile(r"[一-鿿]+")
+_WORD = re.compile(r"[a-z0-9]+")
+
 @mcp.tool()
 def learn_skills_mermaid() -> str:
     """mermaid画图技能"""
@@ -44,5 +56,156 @@ def learn_skills_patent_writing() -> str:
         return f"读取失败: {e}"
 
 
+def _tokenize(text: str) -> list[str]:
+    """中文按字的二元组切分（单字的片段保留单字），英文、数字按单词切分"""
+    tokens = []
+    for run in _CJK.findall(text):
+        tokens.extend(run[i:i + 2] for i in range(max(len(run) - 1, 1)))
+    tokens.extend(_WORD.findall(text.lower()))
+    return tokens
+
+
+def _split_long(body: str) -> list[str]:
+    if len(body) <= _MAX_CHUNK_CHARS:
+        return [body]
+    parts, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", body):
+        if current and len(current) + len(paragraph) > _MAX_CHUNK_CHARS:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _chunk_markdown(file_name: str, text: str) -> list[dict]:
+    """按标题切分文档，每个片段带有完整的标题路径；代码块中的 # 不作为标题"""
+    chunks = []
+    headings = []
+    lines = []
+    in_code = False
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            path = " > ".join([file_name] + [title for _, title in headings])
+            for part in _split_long(body):
+                chunks.append({"path": path, "text": part})
+        lines.clear()
+
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else _HEADING.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            headings[:] = [item for item in headings if item[0] < level] + [(level, match.group(2).strip())]
+        else:
+            lines.append(line)
+    flush()
+    return chunks
+
+
+class _SkillsIndex:
+    """技能文档片段的 BM25 索引"""
+
+    def __init__(self, chunks: list[dict], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        # 标题路径计入两次，提高章节标题命中的权重
+        self.term_freqs = [Counter(_tokenize(item["path"]) * 2 + _tokenize(item["text"])) for item in chunks]
+        self.lengths = [sum(freqs.values()) for freqs in self.term_freqs]
+        self.avg_length = sum(self.lengths) / max(len(self.lengths), 1)
+        doc_freqs = Counter(term for freqs in self.term_freqs for term in freqs)
+        total = len(chunks)
+        self.idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    def search(self, query: str, k: int) -> list[tuple[float, dict]]:
+        terms = set(_tokenize(query))
+        scored = []
+        for chunk, freqs, length in zip(self.chunks, self.term_freqs, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length)
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, chunk))
+        scored.sort(key=lambda item: -item[0])
+        return scored[:k]
+
+
+_index = None
+
+
+def _get_index() -> _SkillsIndex:
+    global _index
+    if _index is None:
+        chunks = []
+        for path in sorted(_SKILLS_DIR.glob("*.md")):
+            chunks.extend(_chunk_markdown(path.name, path.read_text(encoding="utf-8")))
+        _index = _SkillsIndex(chunks)
+    return _index
+
+
+@mcp.tool()
+def search_skills(query: str, k: int = 5) -> str:
+    """检索技能文档（专利写作指南、mermaid画图语法），只返回与检索词最相关的章节
+
+    Args:
+        query: 检索词，多个关键词用空格分隔，如"权利要求书 从属权利要求 引用关系"
+        k: 返回的章节数
+    """
+    try:
+        results = _get_index().search(query, max(1, min(k, 20)))
+    except Exception as e:
+        return f"检索失败: {e}"
+    if not results:
+        return f"没有找到与'{query}'相关的内容"
+    sections = [f"## {chunk['path']}\n\n{chunk['text']}" for _, chunk in results]
+    return "\n\n---\n\n".join(sections)
+
+
+def _estimate_tokens(text: str) -> int:
+    # 粗略估计：每个汉字约1个token，其余字符约4个字符1个token
+    cjk = sum(len(run) for run in _CJK.findall(text))
+    return cjk + (len(text) - cjk) // 4
+
+
+def _measure():
+    """估计每次生成专利时，按提示词中的检索词检索技能文档比学习整篇技能文档节省的token"""
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    from agent.utils.subagent_tools import SUBAGENT_PROMPTS
+
+    full = {"patent": _estimate_tokens(learn_skills_patent_writing()), "mermaid": _estimate_tokens(learn_skills_mermaid())}
+    print("| 子代理 | 原来（tokens） | 检索（tokens） |")
+    print("| --- | --- | --- |")
+    total_before = total_after = 0
+    for name, prompt in SUBAGENT_PROMPTS.items():
+        queries = []
+        for line in prompt.splitlines():
+            if "search_skills" in line and "检索词：" in line:
+                queries += re.findall(r"'([^']+)'", line.split("检索词：", 1)[1])
+        if not queries:
+            continue
+        # 原提示词中每个子代理都学习专利写作技能，diagram_generator 另外学习 mermaid 画图技能
+        before = full["patent"] + (full["mermaid"] if "mermaid" in prompt else 0)
+        after = sum(_estimate_tokens(search_skills(query)) for query in queries)
+        total_before += before
+        total_after += after
+        print(f"| {name} | {before} | {after} |")
+    print(f"| 合计 | {total_before} | {total_after} |")
+    print(f"\n每次生成约节省 {total_before - total_after} tokens（{100 * (1 - total_after / total_before):.0f}%），"
+          f"技能内容在子代理后续的每轮模型调用中都会重复发送，实际节省为此数值乘以轮数")
+
+
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
\ No newline at end of file
+    if "--measure" in sys.argv:
+        _measure()
+    else:
+        mcp.run(transport="stdio")
@@ -0,0 +1,20 @@
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# 项目没有打包，直接从仓库根目录导入 agent、mcp_server
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.pipeline import project_path  # noqa: E402
+
+
+@pytest.fixture
+def workspace_project():
+    """workspace 下的临时项目目录（filesystem 工具只能访问 workspace），测试结束后删除"""
+    project_dir = project_path(f"pytest_{uuid.uuid4().hex[:8]}")
+    project_dir.mkdir(parents=True)
+    yield project_dir
+    shutil.rmtree(project_dir, ignore_errors=True)
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import random
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agent import long_writer
+from agent.long_writer import PROGRESS_FILE, LongWriter, _sha256
+from agent.pipeline import STAGES
+from agent.utils.native_tools import aget_native_tools
+
+PART1, PART2 = (next(stage for stage in STAGES if stage.name == name)
+                for name in ("description_writer_part1", "description_writer_part2"))
+DESCRIPTION = "04_content/description.md"
+
+CLAIMS = "# 权利要求书\n1. 一种数据处理方法，其特征在于，包括：获取待处理数据；确定目标处理模型。\n"
+OUTLINE = "# 专利大纲\n## 背景技术\n- 字数要求：1000-2000字\n"
+# 每个实施例都支持权利要求的特征，正常撰写时不需要补充
+SUPPORTED = "获取待处理数据，确定目标处理模型。"
+
+
+class FakeChatModel:
+    """按本段任务返回预设内容的模型
+
+    Args:
+        replies: 本段任务中包含的文字 -> 回复；回复为列表时依次返回 (内容, 结束原因)
+        fail_on: 本段任务中包含该文字时抛出异常（模拟中断）
+        delay: 每次调用前等待的最长时间（秒），实际时间随机
+    """
+
+    def __init__(self, replies: dict = None, fail_on: str = None, delay: float = 0.0):
+        self.replies = {key: list(value) if isinstance(value, list) else value for key, value in (replies or {}).items()}
+        self.fail_on = fail_on
+        self.delay = delay
+        self.instructions = []
+
+    async def ainvoke(self, messages):
+        if self.delay:
+            await asyncio.sleep(random.uniform(0, self.delay))
+        prompt = messages[-1].content
+        if prompt.startswith("上一次输出因长度限制被截断"):
+            instruction = "续写"
+        else:
+            instruction = prompt.split("# 本段任务\n", 1)[1]
+        self.instructions.append(instruction)
+        if self.fail_on and self.fail_on in instruction:
+            raise RuntimeError("模型调用失败")
+        for key, reply in self.replies.items():
+            if key in instruction:
+                text, finish_reason = reply.pop(0) if isinstance(reply, list) else (reply, "stop")
+                break
+        else:
+            text, finish_reason = self._default(instruction), "stop"
+        return AIMessage(content=text, response_metadata={"finish_reason": finish_reason},
+                         usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15})
+
+    @staticmethod
+    def _default(instruction: str) -> str:
+        if "附图说明，根据" in instruction:
+            return "图1为方法流程图。\n图2为装置结构图。\n图3为设备结构图。"
+        if instruction.startswith("撰写图"):
+            number = instruction[3:instruction.index("对应")]
+            return f"如图{number}所示，实施例{number}正文，{SUPPORTED}"
+        if "技术领域" in instruction:
+            return "技术领域正文。"
+        if "背景技术" in instruction:
+            return "背景技术正文。"
+        if "第一部分" in instruction:
+            return "发明目的正文。"
+        if "第二部分" in instruction:
+            return "技术方案正文。"
+        if "第三部分" in instruction:
+            return "有益效果正文。"
+        if "开头" in instruction:
+            return "具体实施方式开头。"
+        if "结尾" in instruction:
+            return "具体实施方式结尾。"
+        return "其他正文。"
+
+
+@pytest.fixture
+def project(workspace_project, monkeypatch):
+    """写好说明书两部分的输入文件；写作器在进程内调用 filesystem 工具"""
+    monkeypatch.setattr(long_writer, "aget_filesystem_tools", lambda: aget_native_tools("filesystem"))
+    contents = {"04_content/claims.md": CLAIMS, "03_outline/patent_outline.md": OUTLINE, "01_input/parsed_info.json": "{}"}
+    for name in set(PART1.inputs + PART2.inputs) - {DESCRIPTION}:
+        path = workspace_project / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(contents.get(name, f"{name}的内容\n"), encoding="utf-8")
+    return workspace_project
+
+
+def _writer(model, **kwargs):
+    return LongWriter({"low": model, "high": model}, **kwargs)
+
+
+def _description(project_dir) -> str:
+    return (project_dir / DESCRIPTION).read_text(encoding="utf-8")
+
+
+def _progress(project_dir, stage) -> dict:
+    return json.loads((project_dir / PROGRESS_FILE).read_text(encoding="utf-8"))[stage.name]
+
+
+def _sections(project_dir, stage) -> dict:
+    """按进度记录的长度切分说明书：段落 -> 内容"""
+    content = _description(project_dir)
+    progress = _progress(project_dir, stage)
+    start = progress["length"] - sum(progress["lengths"].values())
+    sections = {}
+    for key in progress["done"]:
+        sections[key] = content[start:start + progress["lengths"][key]].strip()
+        start += progress["lengths"][key]
+    assert start == progress["length"]
+    assert progress["hash"] == _sha256(content[:progress["length"]])
+    return sections
+
+
+def test_writes_both_parts_in_order(project):
+    model = FakeChatModel()
+    writer = _writer(model)
+    asyncio.run(writer.write(PART1, project))
+    asyncio.run(writer.write(PART2, project))
+
+    content = _description(project)
+    headings = ["# 专利说明书", "## 技术领域", "## 背景技术", "## 发明内容", "## 附图说明", "## 具体实施方式"]
+    assert [content.index(heading) for heading in headings] == sorted(content.index(heading) for heading in headings)
+    assert content.index("实施例1正文") < content.index("实施例2正文") < content.index("实施例3正文") < content.index("具体实施方式结尾")
+    assert not any("描述不足" in instruction for instruction in model.instructions)
+    assert _sections(project, PART2)["embodiment_2"] == f"如图2所示，实施例2正文，{SUPPORTED}"
+
+
+def test_truncated_section_is_continued(project):
+    model = FakeChatModel({"撰写图2对应": [("```\n如图2所示，前半段", "length"), ("后半段", "length")],
+                           "续写": [("，续写部分。", "stop")]})
+    writer = _writer(model)
+    asyncio.run(writer.write(PART1, project))
+    chunks = asyncio.run(writer.write(PART2, project))
+
+    assert _sections(project, PART2)["embodiment_2"] == "如图2所示，前半段，续写部分。"
+    records = [chunk for chunk in chunks if chunk["name"] == "embodiment_2"]
+    assert [(chunk["continuation"], chunk["finish_reason"]) for chunk in records] == [(0, "length"), (1, "stop")]
+    # 截断只续写这一段，不重写其他段
+    assert sum(instruction.startswith("撰写图2") for instruction in model.instructions) == 1
+
+
+def test_resumes_from_progress_after_interruption(project):
+    writer = _writer(FakeChatModel())
+    asyncio.run(writer.write(PART1, project))
+    with pytest.raises(RuntimeError):
+        asyncio.run(_writer(FakeChatModel(fail_on="撰写图2")).write(PART2, project))
+    assert _progress(project, PART2)["done"] == ["embodiment_opening", "embodiment_1"]
+    # 中断时写了一半的内容
+    with open(project / DESCRIPTION, "a", encoding="utf-8") as f:
+        f.write("\n\n如图2所示，写了一半")
+
+    # 第一部分重新执行时不重写，第二部分只撰写剩下的段落
+    model = FakeChatModel()
+    assert asyncio.run(_writer(model).write(PART1, project)) == []
+    asyncio.run(_writer(model).write(PART2, project))
+    assert [instruction.split("，")[0][:6] for instruction in model.instructions] == ["撰写图2对应", "撰写图3对应", "撰写具体实施"]
+    content = _description(project)
+    assert "写了一半" not in content
+    assert content.count("实施例1正文") == content.count("具体实施方式开头") == 1
+    assert _progress(project, PART2)["complete"]
+
+
+def test_completed_stage_is_rewritten_only_when_inputs_change(project):
+    writer = _writer(FakeChatModel())
+    asyncio.run(writer.write(PART1, project))
+    before = _description(project)
+
+    model = FakeChatModel()
+    assert asyncio.run(_writer(model).write(PART1, project)) == []
+    assert model.instructions == []
+    assert _description(project) == before
+
+    (project / "04_content/claims.md").write_text(CLAIMS + "2. 根据权利要求1所述的方法，还包括输出结果。\n", encoding="utf-8")
+    asyncio.run(_writer(model).write(PART1, project))
+    assert len(model.instructions) == 6
+
+
+def test_revision_replaces_only_the_off_section(project):
+    writer = _writer(FakeChatModel())
+    asyncio.run(writer.write(PART1, project))
+    before = _sections(project, PART1)
+
+    model = FakeChatModel({"修改以下已写好的内容": "背景" * 600})
+    chunks = asyncio.run(_writer(model).write(PART1, project, ["背景技术共7字，要求1000-2000字"]))
+    assert [chunk["name"] for chunk in chunks] == ["background"]
+    # 修改任务附带原来的内容及字数偏差
+    assert "背景技术正文" in model.instructions[0] and "需要补充" in model.instructions[0]
+
+    after = _sections(project, PART1)
+    assert after["background"] == "## 背景技术\n\n" + "背景" * 600
+    assert {key: text for key, text in after.items() if key != "background"} == \
+           {key: text for key, text in before.items() if key != "background"}
+
+    # 修改后第二部分仍能在其后继续撰写
+    asyncio.run(_writer(FakeChatModel()).write(PART2, project))
+    content = _description(project)
+    assert content.index("背景" * 600) < content.index("## 发明内容") < content.index("## 具体实施方式")
+
+
+def test_retry_inserts_supplement_before_ending(project):
+    model = FakeChatModel({"撰写图": "如图所示，实施例正文。", "描述不足": [("补充说明一。", "stop"), ("补充说明二。", "stop")]})
+    asyncio.run(_writer(FakeChatModel()).write(PART1, project))
+    asyncio.run(_writer(model).write(PART2, project))
+    before = _sections(project, PART2)
+    assert before["embodiment_supplement"] == "补充说明一。"
+
+    chunks = asyncio.run(_writer(model).write(PART2, project, ["支持不足"]))
+    assert [chunk["name"] for chunk in chunks] == ["embodiment_supplement_2"]
+    after = _sections(project, PART2)
+    assert list(after)[-2:] == ["embodiment_supplement_2", "embodiment_ending"]
+    assert after["embodiment_supplement_2"] == "补充说明二。"
+    assert {key: after[key] for key in before} == before
+    # 没有问题时重新执行不再修改
+    assert asyncio.run(_writer(model).write(PART2, project)) == []
+
+
+def test_fan_out_sections_land_in_order(project):
+    drawings = "\n".join(f"图{number}为第{number}个实施例的流程图。" for number in range(1, 9))
+    asyncio.run(_writer(FakeChatModel({"附图说明，根据": drawings})).write(PART1, project))
+    part1 = _description(project)
+
+    asyncio.run(_writer(FakeChatModel(), fan_out=1).write(PART2, project))
+    sequential = _description(project)
+
+    (project / DESCRIPTION).write_text(part1, encoding="utf-8")
+    (project / PROGRESS_FILE).unlink()
+    asyncio.run(_writer(FakeChatModel({"附图说明，根据": drawings})).write(PART1, project))
+    random.seed(7)
+    model = FakeChatModel(delay=0.05)
+    asyncio.run(_writer(model, fan_out=4).write(PART2, project))
+
+    # 各段同时撰写、完成顺序随机，追加后的内容与逐段撰写相同
+    assert _description(project) == sequential
+    sections = _sections(project, PART2)
+    assert list(sections) == ["embodiment_opening", *(f"embodiment_{number}" for number in range(1, 9)), "embodiment_ending"]
+    for number in range(1, 9):
+        assert sections[f"embodiment_{number}"] == f"如图{number}所示，实施例{number}正文，{SUPPORTED}"
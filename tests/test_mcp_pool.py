@@ -0,0 +1,94 @@
+import asyncio
+import os
+import signal
+import sys
+import textwrap
+import time
+
+import pytest
+
+from agent.utils.mcp_pool import MCPSessionPool
+
+SERVER = textwrap.dedent('''
+    import os
+
+    from mcp.server.fastmcp import FastMCP
+
+    mcp = FastMCP("pool_test")
+
+    @mcp.tool()
+    def pid() -> str:
+        """返回服务器进程号"""
+        return str(os.getpid())
+
+    if __name__ == "__main__":
+        mcp.run(transport="stdio")
+''')
+
+
+def _connection(*args) -> dict:
+    return {"command": sys.executable, "args": list(args), "transport": "stdio"}
+
+
+def _call(tool) -> str:
+    result = asyncio.run(tool.ainvoke({}))
+    return result if isinstance(result, str) else "".join(block["text"] for block in result)
+
+
+def _pid_tool(pool: MCPSessionPool):
+    return next(item for item in pool.get_tools() if item.name == "pid")
+
+
+@pytest.fixture
+def server_script(tmp_path):
+    script = tmp_path / "pool_test_server.py"
+    script.write_text(SERVER, encoding="utf-8")
+    return str(script)
+
+
+@pytest.mark.parametrize("ping_interval", [0.0, 30.0])
+def test_killed_server_is_restarted(server_script, ping_interval):
+    """ping_interval=0 时由取用前的健康检查发现，否则由调用失败后的重试发现"""
+    pool = MCPSessionPool("pool_test", _connection(server_script), size=1, ping_interval=ping_interval,
+                          start_timeout=20)
+    try:
+        tool = _pid_tool(pool)
+        first = int(_call(tool))
+        # 工具调用时发现服务器进程已退出
+        os.kill(first, signal.SIGKILL)
+        time.sleep(0.2)
+        second = int(_call(tool))
+        assert second != first
+        # 获取工具列表时发现服务器进程已退出
+        os.kill(second, signal.SIGKILL)
+        time.sleep(0.2)
+        third = int(_call(_pid_tool(pool)))
+        assert third not in (first, second)
+        assert pool.restarts >= 2
+        assert int(_call(tool)) == third
+    finally:
+        pool.close()
+
+
+def test_server_that_never_initializes_fails_within_start_timeout():
+    pool = MCPSessionPool("hang", _connection("-c", "import time; time.sleep(60)"), size=1, start_timeout=1.0)
+    start = time.monotonic()
+    try:
+        with pytest.raises(TimeoutError):
+            pool.get_tools()
+        assert time.monotonic() - start < 1.0 + 2.0
+    finally:
+        pool.close()
+
+
+def test_server_that_cannot_start_raises_its_error():
+    connection = {"command": "patentbot-missing-mcp-server", "args": [], "transport": "stdio"}
+    pool = MCPSessionPool("missing", connection, size=2, start_timeout=5.0, max_start_attempts=2)
+    start = time.monotonic()
+    try:
+        with pytest.raises(Exception) as excinfo:
+            pool.get_tools()
+        assert not isinstance(excinfo.value, TimeoutError)
+        assert time.monotonic() - start < 5.0
+    finally:
+        pool.close()
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from agent.utils.mcp_pool import MCPSessionPool
+from agent.utils.native_tools import NATIVE_SERVERS, aget_native_tools
+from agent.utils.tools import _CONNECTIONS
+
+
+def _text(result) -> str:
+    """MCP客户端返回内容块列表，进程内调用返回文本"""
+    if isinstance(result, str):
+        return result
+    return "".join(block["text"] for block in result if block.get("type") == "text")
+
+
+@pytest.fixture(scope="module")
+def filesystem_tools():
+    pool = MCPSessionPool("filesystem", _CONNECTIONS["filesystem"], size=1, start_timeout=20)
+    pooled = {tool.name: tool for tool in pool.get_tools()}
+    native = {tool.name: tool for tool in asyncio.run(aget_native_tools("filesystem"))}
+    yield pooled, native
+    pool.close()
+
+
+@pytest.mark.parametrize("server_name", sorted(NATIVE_SERVERS))
+def test_native_servers_expose_tools(server_name):
+    tools = asyncio.run(aget_native_tools(server_name))
+    assert tools
+    assert all(tool.description for tool in tools)
+
+
+def test_native_tools_match_mcp_protocol(filesystem_tools):
+    pooled, native = filesystem_tools
+    assert sorted(native) == sorted(pooled)
+    for name, tool in native.items():
+        assert tool.description == pooled[name].description
+        assert tool.args_schema == pooled[name].args_schema
+
+
+def test_native_results_match_mcp_protocol(filesystem_tools, workspace_project):
+    pooled, native = filesystem_tools
+    sample = workspace_project / "sample.md"
+    sample.write_text("第一行\n第二行\n", encoding="utf-8")
+
+    async def call(tools, name, arguments):
+        return _text(await tools[name].ainvoke(arguments))
+
+    cases = [
+        ("return_work_path", {}),
+        ("read_file", {"path_to_file": str(sample)}),
+        ("read_file", {"path_to_file": str(workspace_project / "missing.md")}),
+        ("list_directory", {"path": str(workspace_project)}),
+    ]
+    for name, arguments in cases:
+        expected = asyncio.run(call(pooled, name, arguments))
+        assert asyncio.run(call(native, name, arguments)) == expected
+    assert "第二行" in asyncio.run(call(native, "read_file", {"path_to_file": str(sample)}))
+
+
+def test_native_tool_errors_are_returned_to_the_model(filesystem_tools):
+    _, native = filesystem_tools
+    # 参数校验失败与MCP服务器一样报告给模型，而不是抛出异常
+    result = asyncio.run(native["read_file"].ainvoke({}))
+    assert "path_to_file" in result and "Field required" in result
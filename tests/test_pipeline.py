@@ -0,0 +1,127 @@
+from agent.pipeline import (
+    STAGES, Stage, critical_path, file_sha256, forget_stage, hash_files, load_manifest, record_stage, stage_dependencies,
+    valid_stages,
+)
+
+# 依赖关系与 STAGES 相同的最小流水线：b、c 都依赖 a，d 覆盖 c 的输出（与说明书的第一、二部分相同）
+MINI_STAGES = (
+    Stage("a", "a", inputs=("in.txt",), outputs=("a.txt",)),
+    Stage("b", "b", inputs=("a.txt",), outputs=("b.txt",)),
+    Stage("c", "c", inputs=("a.txt",), outputs=("doc.md",)),
+    Stage("d", "d", inputs=("b.txt", "doc.md"), outputs=("doc.md",)),
+    Stage("e", "e", inputs=("doc.md",), outputs=("e.txt",)),
+)
+
+
+def _run(project_dir, stage, write=None):
+    """模拟执行一个阶段：写出输出文件，并在清单中记录"""
+    forget_stage(project_dir, stage)
+    inputs = hash_files(project_dir, stage.inputs)
+    for name in stage.outputs:
+        path = project_dir / name
+        if write:
+            write(path)
+        else:
+            path.write_text(f"{stage.name} output\n", encoding="utf-8")
+    record_stage(project_dir, stage, inputs, 1.0)
+
+
+def _run_all(project_dir):
+    (project_dir / "in.txt").write_text("input\n", encoding="utf-8")
+    for stage in MINI_STAGES:
+        if stage.name == "d":
+            _run(project_dir, stage, lambda path: path.write_text(path.read_text(encoding="utf-8") + "part2\n", encoding="utf-8"))
+        else:
+            _run(project_dir, stage)
+
+
+def test_stage_dependencies_follow_last_producer():
+    dependencies = stage_dependencies(MINI_STAGES)
+    assert dependencies == {"a": (), "b": ("a",), "c": ("a",), "d": ("b", "c"), "e": ("d",)}
+
+
+def test_stage_dependencies_of_patent_pipeline():
+    dependencies = stage_dependencies()
+    assert dependencies["input_parser"] == ()
+    assert set(dependencies["patent_searcher"]) == {"input_parser"}
+    assert set(dependencies["description_writer_part2"]) >= {"description_writer_part1", "claims_writer"}
+    # 附图只依赖写完第二部分的说明书
+    assert dependencies["diagram_generator"] == ("description_writer_part2",)
+    names = [stage.name for stage in STAGES]
+    for name, deps in dependencies.items():
+        assert all(names.index(dep) < names.index(name) for dep in deps)
+
+
+def test_all_recorded_stages_are_valid(tmp_path):
+    _run_all(tmp_path)
+    assert valid_stages(tmp_path, MINI_STAGES) == {"a", "b", "c", "d", "e"}
+    record = load_manifest(tmp_path)["stages"]["c"]
+    assert record["sizes"]["doc.md"] == len("c output\n")
+
+
+def test_changed_output_invalidates_stage_and_dependents(tmp_path):
+    _run_all(tmp_path)
+    (tmp_path / "b.txt").write_text("edited\n", encoding="utf-8")
+    assert valid_stages(tmp_path, MINI_STAGES) == {"a", "c"}
+
+
+def test_changed_source_input_invalidates_everything(tmp_path):
+    _run_all(tmp_path)
+    (tmp_path / "in.txt").write_text("another input\n", encoding="utf-8")
+    assert valid_stages(tmp_path, MINI_STAGES) == set()
+
+
+def test_overwritten_output_is_checked_against_the_last_writer(tmp_path):
+    _run_all(tmp_path)
+    # doc.md 已被 d 覆盖，c 的输出与 d 的记录一致即可
+    assert file_sha256(tmp_path / "doc.md") != load_manifest(tmp_path)["stages"]["c"]["outputs"]["doc.md"]
+    assert "c" in valid_stages(tmp_path, MINI_STAGES)
+    (tmp_path / "doc.md").write_text("edited\n", encoding="utf-8")
+    assert valid_stages(tmp_path, MINI_STAGES) == {"a", "b"}
+
+
+def test_interrupted_later_writer_keeps_earlier_output_valid(tmp_path):
+    (tmp_path / "in.txt").write_text("input\n", encoding="utf-8")
+    for stage in MINI_STAGES[:3]:
+        _run(tmp_path, stage)
+    # d 追加了一半时中断：没有记录，doc.md 以 c 的输出开头
+    forget_stage(tmp_path, MINI_STAGES[3])
+    with open(tmp_path / "doc.md", "a", encoding="utf-8") as f:
+        f.write("half of part2")
+    assert valid_stages(tmp_path, MINI_STAGES) == {"a", "b", "c"}
+
+    # 开头被改动时 c 需要重新执行
+    (tmp_path / "doc.md").write_text("c outpuT\nhalf of part2", encoding="utf-8")
+    assert valid_stages(tmp_path, MINI_STAGES) == {"a", "b"}
+
+
+def test_missing_or_corrupt_manifest_means_nothing_to_skip(tmp_path):
+    assert valid_stages(tmp_path, MINI_STAGES) == set()
+    _run_all(tmp_path)
+    (tmp_path / "manifest.json").write_text("{broken", encoding="utf-8")
+    assert valid_stages(tmp_path, MINI_STAGES) == set()
+
+
+def test_file_sha256_of_prefix(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_bytes(b"part1part2")
+    (tmp_path / "part1.md").write_bytes(b"part1")
+    assert file_sha256(path, 5) == file_sha256(tmp_path / "part1.md")
+    assert file_sha256(path, 100) is None
+    assert file_sha256(tmp_path / "missing.md") is None
+
+
+def test_critical_path_follows_longest_chain():
+    path, total = critical_path({"a": 1.0, "b": 5.0, "c": 2.0, "d": 1.0, "e": 1.0}, MINI_STAGES)
+    assert path == ["a", "b", "d", "e"]
+    assert total == 8.0
+
+
+def test_critical_path_ignores_skipped_stages():
+    # 续跑时 a、b、c 已完成并跳过，关键路径只包括本次执行的阶段
+    path, total = critical_path({"d": 3.0, "e": 1.0}, MINI_STAGES)
+    assert path == ["d", "e"]
+    assert total == 4.0
+    path, _ = critical_path({"description_writer_part2": 30.0, "diagram_generator": 10.0, "markdown_merger": 5.0})
+    assert path == ["description_writer_part2", "diagram_generator", "markdown_merger"]
+    assert critical_path({}, MINI_STAGES) == ([], 0.0)
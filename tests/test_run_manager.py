@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agent import agent as agent_module
+from agent import run_manager as run_manager_module
+from agent.run_manager import evict_patentbots, get_patentbot, run_manager
+
+
+class FakePatentBot:
+    """代替 PatentBot：记录创建次数，创建耗时固定"""
+
+    created = 0
+    build_seconds = 0.05
+
+    def __init__(self, model_name="deepseek-chat", api_key=None, use_leader=False, llm_cache=None, **kwargs):
+        time.sleep(self.build_seconds)
+        FakePatentBot.created += 1
+        self.model_name = model_name
+        self.api_key = api_key
+        self.use_leader = use_leader
+
+
+@pytest.fixture
+def fake_bots(monkeypatch):
+    monkeypatch.setattr(run_manager_module, "PatentBot", FakePatentBot)
+    FakePatentBot.created = 0
+    evict_patentbots()
+    yield
+    evict_patentbots()
+
+
+def test_cached_bot_is_reused_and_much_faster(fake_bots):
+    start = time.perf_counter()
+    bot = get_patentbot(api_key="sk-user-a")
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    assert get_patentbot(api_key="sk-user-a") is bot
+    cached = time.perf_counter() - start
+    assert FakePatentBot.created == 1
+    assert cold >= FakePatentBot.build_seconds
+    assert cached < FakePatentBot.build_seconds / 10
+
+
+def test_bots_are_separated_by_key_and_options(fake_bots):
+    a = get_patentbot(api_key="sk-user-a")
+    assert get_patentbot(api_key="sk-user-b") is not a
+    assert get_patentbot(api_key="sk-user-a", use_leader=True) is not a
+    assert get_patentbot(model_name="gpt-5", api_key="sk-user-a") is not a
+    assert FakePatentBot.created == 4
+
+
+def test_cache_does_not_keep_raw_api_keys(fake_bots):
+    get_patentbot(api_key="sk-secret-value")
+    assert all("sk-secret-value" not in map(str, key) for key in run_manager_module._patentbots)
+
+
+def test_evict_by_api_key(fake_bots):
+    a = get_patentbot(api_key="sk-user-a")
+    a_leader = get_patentbot(api_key="sk-user-a", use_leader=True)
+    b = get_patentbot(api_key="sk-user-b")
+    assert evict_patentbots("sk-user-a") == 2
+    assert get_patentbot(api_key="sk-user-b") is b
+    assert get_patentbot(api_key="sk-user-a") not in (a, a_leader)
+    assert evict_patentbots() == 2
+    assert evict_patentbots() == 0
+
+
+def test_cache_size_is_bounded(fake_bots, monkeypatch):
+    monkeypatch.setattr(run_manager_module, "PATENTBOT_CACHE_SIZE", 2)
+    monkeypatch.setattr(FakePatentBot, "build_seconds", 0)
+    first = get_patentbot(api_key="sk-1")
+    second = get_patentbot(api_key="sk-2")
+    get_patentbot(api_key="sk-1")
+    get_patentbot(api_key="sk-3")
+    # 最久未使用的 sk-2 被删除
+    assert len(run_manager_module._patentbots) == 2
+    assert get_patentbot(api_key="sk-1") is first
+    assert get_patentbot(api_key="sk-2") is not second
+
+
+@pytest.fixture
+def endless_pipeline(monkeypatch):
+    """代替流水线：每 10ms 产出一次进展，直到任务被停止"""
+    async def pipeline(file_name, uuid, **kwargs):
+        step = 0
+        while True:
+            yield {"tools": {"todos": [{"content": uuid, "status": str(step)}]}}
+            step += 1
+            await asyncio.sleep(0.01)
+
+    bot = SimpleNamespace(leader_agent=None, subagent_tools={}, writers={}, model_name="fake", temperatures={})
+    monkeypatch.setattr(run_manager_module, "astream_pipeline", pipeline)
+    monkeypatch.setattr(run_manager_module, "get_patentbot", lambda **kwargs: bot)
+    return bot
+
+
+def _consume(run):
+    chunks = []
+    thread = threading.Thread(target=lambda: chunks.extend(run.stream()), daemon=True)
+    thread.start()
+    return thread, chunks
+
+
+def test_stopping_one_run_does_not_stop_another(endless_pipeline):
+    first = agent_module.start_patentbot_run("a.txt")
+    second = agent_module.start_patentbot_run("b.txt")
+    assert first.uuid != second.uuid
+    assert run_manager.get(first.uuid) is first
+    first_thread, first_chunks = _consume(first)
+    second_thread, second_chunks = _consume(second)
+    time.sleep(0.1)
+
+    agent_module.shoud_stop(first.uuid)
+    first_thread.join(1)
+    assert not first_thread.is_alive()
+    assert first.finished
+    received = len(second_chunks)
+    time.sleep(0.1)
+    assert second_thread.is_alive() and not second.finished
+    assert len(second_chunks) > received
+    assert {chunk["tools"]["todos"][0]["content"] for chunk in first_chunks} == {first.uuid}
+
+    # 不指定 uuid 时停止所有进行中的任务
+    agent_module.shoud_stop()
+    second_thread.join(1)
+    assert not second_thread.is_alive()
+    assert second not in run_manager.active_runs()
+
+
+def test_legacy_stream_runs_are_registered_and_stoppable(endless_pipeline):
+    stream = agent_module.run_patentbot_async_stream("a.txt")
+    first = next(stream)
+    uuid = first["tools"]["todos"][0]["content"]
+    assert run_manager.get(uuid) is not None
+    run_manager.stop(uuid)
+    assert all(chunk["tools"]["todos"][0]["content"] == uuid for chunk in stream)
+    assert run_manager.get(uuid).finished
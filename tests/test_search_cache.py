@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+
+from agent.utils.search_cache import SearchCache, normalize_params
+
+
+class StubSerpApi:
+    """代替 SerpAPI 的本地桩：记录每次搜索，可以阻塞或返回错误"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def __call__(self, params: dict) -> dict:
+        self.calls.append(params)
+        self.release.wait(5)
+        if self.error:
+            return {"error": self.error}
+        return {"organic_results": [{"title": params["q"]}], "version": len(self.calls)}
+
+
+@pytest.fixture
+def stub():
+    return StubSerpApi()
+
+
+def _params(query="数据处理 AND 模型"):
+    return normalize_params(query, "CN", "GRANT", None, 10)
+
+
+def test_fresh_results_are_served_from_cache(tmp_path, stub):
+    cache = SearchCache(stub, tmp_path / "cache.sqlite")
+    first = cache.search(_params())
+    second = cache.search(_params())
+    assert first == second
+    assert len(stub.calls) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes"] > 0
+
+
+def test_stale_results_are_returned_while_one_background_search_updates_them(tmp_path, stub):
+    cache = SearchCache(stub, tmp_path / "cache.sqlite", ttl=0, stale_ttl=3600)
+    old = cache.search(_params())
+    stub.release.clear()
+    # 后台更新进行中，同一个键的多次搜索都先返回旧的结果，只触发一次重新搜索
+    results = [cache.search(_params()) for _ in range(3)]
+    assert results == [old] * 3
+    stub.release.set()
+    cache.wait(5)
+    assert len(stub.calls) == 2
+    # 仍然过期：返回更新后的结果，并再次在后台更新
+    assert cache.search(_params())["version"] == 2
+    cache.wait(5)
+    assert len(stub.calls) == 3
+    stats = cache.stats()
+    assert (stats["stale_hits"], stats["revalidations"], stats["misses"]) == (4, 2, 1)
+
+
+def test_expired_results_are_searched_again(tmp_path, stub):
+    cache = SearchCache(stub, tmp_path / "cache.sqlite", ttl=0, stale_ttl=0)
+    cache.search(_params())
+    assert cache.search(_params())["version"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_error_results_are_not_cached(tmp_path, stub):
+    cache = SearchCache(stub, tmp_path / "cache.sqlite")
+    stub.error = "Your account has run out of searches."
+    assert "error" in cache.search(_params())
+    assert "error" in cache.search(_params())
+    assert len(stub.calls) == 2
+    stats = cache.stats()
+    assert (stats["errors"], stats["entries"]) == (2, 0)
+
+    stub.error = None
+    assert "error" not in cache.search(_params())
+    assert cache.stats()["entries"] == 1
+
+
+def test_failed_background_search_keeps_old_results(tmp_path, stub):
+    cache = SearchCache(stub, tmp_path / "cache.sqlite", ttl=0, stale_ttl=3600)
+    old = cache.search(_params())
+    stub.error = "timeout"
+    assert cache.search(_params()) == old
+    cache.wait(5)
+    assert cache.search(_params()) == old
+    assert cache.stats()["errors"] >= 1
+
+
+def test_equivalent_searches_share_a_key(tmp_path, stub):
+    a = normalize_params("  数据处理   AND ( 模型 OR 算法 ) ", "cn", "grant", "Relevance", "5")
+    b = normalize_params("数据处理 AND (模型 OR 算法)", "CN", "GRANT", None, 10)
+    assert a == b
+    assert SearchCache.make_key(a) == SearchCache.make_key(b)
+    # OR/AND 区分大小写，不同的关键词、排序使用不同的键
+    assert normalize_params("a or b", "", "", None, 10) != normalize_params("a OR b", "", "", None, 10)
+    assert normalize_params("a", "", "", "new", 10) != normalize_params("a", "", "", None, 10)
+    assert normalize_params("a", "", "", None, 1000)["num"] == "100"
+    assert normalize_params("a", "", "", None, "x")["num"] == "10"
+
+    cache = SearchCache(stub, tmp_path / "cache.sqlite")
+    cache.search(a)
+    cache.search(b)
+    assert len(stub.calls) == 1
+
+
+def test_counters_persist_across_instances_and_clear(tmp_path, stub):
+    path = tmp_path / "cache.sqlite"
+    SearchCache(stub, path).search(_params())
+    cache = SearchCache(stub, path)
+    cache.search(_params())
+    assert list(cache.entries())[0][0] == _params()
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    cache.clear()
+    assert cache.stats() == {
+        "hits": 0, "stale_hits": 0, "misses": 0, "revalidations": 0, "errors": 0, "entries": 0, "bytes": 0,
+    }
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from agent.utils.search_projection import (
+    DEFAULT_FIELDS, compact_json, measure, parse_fields, project_results,
+)
+
+
+def _item(number: int, **overrides) -> dict:
+    item = {
+        "position": number,
+        "publication_number": f"CN11234567{number}A",
+        "title": f"一种数据处理方法{number}",
+        "assignee": "某某科技有限公司",
+        "inventor": "张三",
+        "priority_date": "2020-01-01",
+        "snippet": "本发明公开了一种数据处理方法……",
+        "pdf": f"https://patentimages.storage.googleapis.com/{number}.pdf",
+        "thumbnail": "https://serpapi.com/thumbnail.png",
+        "serpapi_link": "https://serpapi.com/search.json?engine=google_patents_details",
+    }
+    item.update(overrides)
+    return item
+
+
+def _results(count: int) -> dict:
+    return {
+        "search_information": {"total_results": 1234},
+        "organic_results": [_item(number) for number in range(1, count + 1)],
+        "serpapi_pagination": {"next": "https://serpapi.com/search.json?page=2"},
+    }
+
+
+def test_parse_fields_defaults_and_required_first():
+    assert parse_fields("") == DEFAULT_FIELDS
+    assert parse_fields("  ,") == DEFAULT_FIELDS
+    assert parse_fields("title，inventor assignee") == ("rank", "publication_number", "title", "inventor", "assignee")
+    assert parse_fields("title,rank,title") == ("rank", "publication_number", "title")
+
+
+def test_parse_fields_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="thumbnail、serpapi_link"):
+        parse_fields("title,thumbnail,serpapi_link")
+
+
+def test_projection_keeps_only_selected_fields():
+    projection = project_results(_results(3), parse_fields("title"))
+    assert projection["total_results"] == 1234
+    assert projection["results"] == [
+        {"rank": number, "publication_number": f"CN11234567{number}A", "title": f"一种数据处理方法{number}"}
+        for number in range(1, 4)
+    ]
+    default = project_results(_results(1))["results"][0]
+    assert "thumbnail" not in default and "serpapi_link" not in default and "inventor" not in default
+
+
+@pytest.mark.parametrize("page, page_size, expected_page, expected_ranks", [
+    (1, 0, 1, list(range(1, 8))),
+    (5, 0, 1, list(range(1, 8))),
+    (2, 3, 2, [4, 5, 6]),
+    (3, 3, 3, [7]),
+    (99, 3, 3, [7]),
+    (0, 3, 1, [1, 2, 3]),
+    (-2, 3, 1, [1, 2, 3]),
+    (1, -1, 1, list(range(1, 8))),
+])
+def test_page_is_clamped(page, page_size, expected_page, expected_ranks):
+    projection = project_results(_results(7), page=page, page_size=page_size)
+    assert projection["page"] == expected_page
+    assert projection["pages"] == (3 if page_size > 0 else 1)
+    assert [item["rank"] for item in projection["results"]] == expected_ranks
+
+
+def test_empty_results():
+    projection = project_results({"organic_results": []}, page=3, page_size=10)
+    assert projection == {"total_results": 0, "page": 1, "pages": 1, "results": []}
+
+
+def test_publication_number_from_patent_id_and_rank_from_order():
+    results = {"organic_results": [
+        _item(1, publication_number=None, position=None, patent_id="patent/CN112345678A/zh"),
+        _item(2, publication_number="", position=None, patent_id=None),
+    ]}
+    first, second = project_results(results, parse_fields("title"), page=1, page_size=0)["results"]
+    assert first["publication_number"] == "CN112345678A"
+    assert first["rank"] == 1
+    assert "publication_number" not in second
+    assert second["rank"] == 2
+    # 第二页的排名接续第一页
+    assert project_results(results, page=2, page_size=1)["results"][0]["rank"] == 2
+
+
+def test_empty_values_are_dropped():
+    results = {"organic_results": [_item(1, assignee="", inventor=None, snippet=[], pdf={})]}
+    item = project_results(results, parse_fields("assignee,inventor,snippet,pdf,title"))["results"][0]
+    assert set(item) == {"rank", "publication_number", "title"}
+
+
+def test_compact_json_is_smaller_and_keeps_chinese():
+    results = _results(10)
+    compact = compact_json(project_results(results))
+    assert "一种数据处理方法1" in compact
+    assert ": " not in compact and ", " not in compact
+    assert json.loads(compact)["results"][0]["publication_number"] == "CN112345671A"
+    size = measure(results, compact)
+    assert size.compact_bytes == len(compact.encode("utf-8"))
+    assert 0 < size.byte_reduction < 1
+    assert 0 < size.token_reduction < 1
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+from agent.utils.subagent_tools import SUBAGENT_PROMPTS
+from mcp_server import skills
+
+GUIDE = "patent_guide.md > 专利申请文件撰写指南 > "
+
+# 子代理提示词中的检索词 -> 前 k 个结果中必须包含的章节（标题路径）
+EXPECTED = {
+    "发明名称 技术领域 发明内容": [GUIDE + "一、发明名称 > 撰写规范", GUIDE + "二、技术领域 > 撰写要点", GUIDE + "四、发明内容"],
+    "撰写权利要求书的主要步骤": [GUIDE + "八、权利要求书 > 撰写权利要求书的主要步骤"],
+    "具体实施方式 基本要求": [GUIDE + "六、具体实施方式 > 基本要求"],
+    "说明书摘要 基本要求": [GUIDE + "九、说明书摘要 > 基本要求"],
+    "发明名称 技术领域": [GUIDE + "一、发明名称 > 撰写规范", GUIDE + "二、技术领域 > 撰写要点"],
+    "权利要求书 独立权利要求 两段式": [GUIDE + "八、权利要求书 > 独立权利要求的撰写"],
+    "从属权利要求 引用关系 清楚性要求": [GUIDE + "八、权利要求书 > 从属权利要求的撰写", GUIDE + "八、权利要求书 > 清楚性要求"],
+    "技术领域 背景技术": [GUIDE + "二、技术领域 > 定义", GUIDE + "三、背景技术（现有技术） > 三部分内容"],
+    "发明内容 技术方案 有益效果": [GUIDE + "四、发明内容 > （二）技术方案", GUIDE + "四、发明内容 > （三）有益效果"],
+    "附图说明 基本要求": [GUIDE + "五、附图说明 > 基本要求"],
+    "实施例撰写要求 方法 计算机程序": [GUIDE + "六、具体实施方式 > 不同类型发明的实施例撰写要求"],
+    "附图 基本要求 附图标记": [GUIDE + "七、附图 > 基本要求"],
+    "flowchart node shapes links subgraph": ["mermaid_flowchart.md > Flowcharts - Basic Syntax > Subgraphs"],
+    "sequenceDiagram participants messages": ["mermaid_sequence_diagram.md > Sequence diagrams > Syntax > Participants",
+                                              "mermaid_sequence_diagram.md > Sequence diagrams > Messages"],
+    "术语统一 撰写方式": [GUIDE + "十、其它重要事项 > 术语统一", GUIDE + "十、其它重要事项 > 撰写方式"],
+    "说明书撰写格式示例": [GUIDE + "附录：说明书撰写格式示例 > 说 明 书"],
+}
+
+
+def _prompt_queries() -> set[str]:
+    """与 skills._measure 相同：从子代理提示词中提取 search_skills 的检索词"""
+    queries = set()
+    for prompt in SUBAGENT_PROMPTS.values():
+        for line in prompt.splitlines():
+            if "search_skills" in line and "检索词：" in line:
+                queries.update(re.findall(r"'([^']+)'", line.split("检索词：", 1)[1]))
+    return queries
+
+
+def test_every_prompt_query_has_an_expectation():
+    assert _prompt_queries() <= set(EXPECTED)
+
+
+@pytest.mark.parametrize("query", sorted(EXPECTED))
+def test_query_returns_expected_sections_in_top_k(query):
+    paths = [chunk["path"] for _, chunk in skills._get_index().search(query, 5)]
+    for expected in EXPECTED[query]:
+        assert expected in paths
+
+
+def test_search_skills_formats_sections():
+    result = skills.search_skills("撰写权利要求书的主要步骤", k=1)
+    assert result.startswith(f"## {GUIDE}八、权利要求书 > 撰写权利要求书的主要步骤\n\n")
+    assert "\n---\n" not in result
+    assert skills.search_skills("撰写权利要求书的主要步骤", k=3).count("\n\n---\n\n") == 2
+
+
+def test_search_skills_clamps_k_and_reports_no_match():
+    assert skills.search_skills("权利要求书", k=100).count("\n\n---\n\n") == 19
+    assert skills.search_skills("权利要求书", k=0).count("\n\n---\n\n") == 0
+    assert skills.search_skills("zzzz qqqq") == "没有找到与'zzzz qqqq'相关的内容"
+
+
+def test_headings_inside_code_blocks_are_not_sections():
+    chunks = skills._chunk_markdown("doc.md", "# 标题\n正文\n```\n# 注释\n```\n## 小节\n内容")
+    assert [chunk["path"] for chunk in chunks] == ["doc.md > 标题", "doc.md > 标题 > 小节"]
+    assert "# 注释" in chunks[0]["text"]
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent.utils.stream_bridge import AsyncStreamBridge, _measure
+
+
+def test_idle_wait_uses_little_cpu_and_delivers_quickly():
+    # 生产者每 50ms 产出一块，期间双方阻塞等待，不应轮询占用CPU
+    result = _measure(chunks=10, interval=0.05)
+    assert result["cpu_percent"] < 20
+    assert result["latency_max_ms"] < 50
+
+
+def test_items_arrive_in_order_with_backpressure():
+    produced = []
+
+    async def numbers():
+        for number in range(100):
+            produced.append(number)
+            yield number
+
+    bridge = AsyncStreamBridge(numbers, maxsize=2)
+    received = []
+    for item in bridge:
+        # 消费者较慢时，生产者最多领先队列容量加上正在写入的一块
+        assert len(produced) - len(received) <= 4
+        received.append(item)
+    assert received == list(range(100))
+    assert bridge.join(1)
+
+
+def test_stop_wakes_waiting_consumer():
+    started = threading.Event()
+
+    async def idle():
+        started.set()
+        await asyncio.sleep(3600)
+        yield "never"
+
+    bridge = AsyncStreamBridge(idle)
+    received = []
+    consumer = threading.Thread(target=lambda: received.extend(bridge))
+    consumer.start()
+    assert started.wait(1)
+    start = time.perf_counter()
+    bridge.stop()
+    consumer.join(1)
+    assert not consumer.is_alive()
+    assert time.perf_counter() - start < 1
+    assert received == []
+    assert bridge.stopped
+    assert bridge.join(1)
+
+
+def test_exception_is_raised_in_consumer():
+    async def failing():
+        yield 1
+        yield 2
+        raise ValueError("boom")
+
+    received = []
+    with pytest.raises(ValueError, match="boom"):
+        for item in AsyncStreamBridge(failing):
+            received.append(item)
+    assert received == [1, 2]
+
+
+def test_early_break_cancels_generator():
+    cancelled = threading.Event()
+
+    async def endless():
+        try:
+            number = 0
+            while True:
+                yield number
+                number += 1
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    bridge = AsyncStreamBridge(endless)
+    for item in bridge:
+        if item == 3:
+            break
+    assert bridge.join(1)
+    assert cancelled.is_set()
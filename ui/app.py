@@ -1,6 +1,7 @@
 import streamlit as st
 import sys
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
@@ -9,8 +10,8 @@ load_dotenv()
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from agent.agent import run_patentbot_async_stream, init_patentbot
-from agent.agent import shoud_stop
+from agent.run_manager import evict_patentbots, get_patentbot, run_manager
+from agent.utils.artifact_cache import ArtifactCache
 
 def _get_status_icon(status: str) -> str:
     """根据状态返回对应的图标"""
@@ -32,6 +33,13 @@ def _get_status_color(status: str) -> str:
     }
     return status_map.get(status.lower(), "gray")
 
+def shoud_stop():
+    """停止当前会话的生成任务，不影响其他会话"""
+    run = st.session_state.get('run')
+    if run is not None:
+        run.stop()
+        st.session_state.run = None
+
 # 页面配置
 st.set_page_config(
     page_title="专利写作Bot",
@@ -62,6 +70,42 @@ selected_model = st.selectbox(
     index=0,  # 默认选择 'deepseek-chat'
     help="选择用于生成专利的 AI 模型"
 )
+use_leader = st.checkbox(
+    "使用 leader 代理编排",
+    value=False,
+    help="默认按固定流水线直接调用各子代理；勾选后由 leader 代理编排，耗时和费用更高"
+)
+use_cache = st.checkbox(
+    "复用已生成的阶段结果",
+    value=False,
+    disabled=use_leader,
+    help="输入文件、提示词和模型都相同时，直接复用之前项目中对应阶段的输出文件"
+)
+long_writer = st.checkbox(
+    "分段撰写说明书",
+    value=False,
+    disabled=use_leader,
+    help="按章节及实施例逐段撰写说明书，输出被截断时从截断处续写，只需重写一段而不是整个说明书"
+)
+fan_out = st.number_input(
+    "同时撰写的实施例数",
+    min_value=1,
+    max_value=8,
+    value=1,
+    disabled=use_leader or not long_writer,
+    help="分段撰写时，具体实施方式的各实施例同时撰写，完成后按附图顺序合并"
+)
+parallel_figures = st.checkbox(
+    "并行生成附图",
+    value=False,
+    disabled=use_leader,
+    help="先取出附图列表，各附图只附带对应实施例的内容同时生成，完成后按图号顺序合并"
+)
+use_llm_cache = st.checkbox(
+    "缓存模型响应",
+    value=False,
+    help="发送给模型的消息、模型参数及工具都相同时，直接返回之前的响应（workspace/.cache/llm_cache.sqlite），适合调试提示词"
+)
 
 # API Key 输入（根据模型选择显示不同的输入框）
 st.header("API 配置")
@@ -96,21 +140,27 @@ if st.session_state.is_generating:
     shoud_stop()
     st.session_state.is_generating = False
 
-# 保存到 session state
+# 保存到 session state；更换 API Key 时删除用旧 Key 创建的代理，不在进程中保留不再使用的 Key
+previous_api_key = st.session_state.get(f'api_key_{selected_model}')
+if previous_api_key and previous_api_key != api_key:
+    evict_patentbots(previous_api_key)
 st.session_state[f'api_key_{selected_model}'] = api_key
 
 # 显示 API Key 状态
 if api_key:
-    # 设置环境变量
-    if api_key != default_api_key:
-        os.environ[env_key_name] = api_key
-    #初始化模型及代理
-    init_patentbot(model_name=selected_model)
+    #初始化模型及代理（API Key 只用于当前会话的模型，不写入环境变量）
+    #相同模型及 API Key 的代理在进程内只创建一次，脚本重新运行时直接复用
+    init_start = time.perf_counter()
+    bot = get_patentbot(model_name=selected_model, api_key=api_key, use_leader=use_leader,
+                        use_llm_cache=use_llm_cache, long_writer=long_writer and not use_leader,
+                        fan_out=int(fan_out) if long_writer and not use_leader else 1,
+                        parallel_figures=parallel_figures and not use_leader)
+    init_ms = (time.perf_counter() - init_start) * 1000
 
     st.success(f"✅ {api_key_label} 已配置")
     # 显示部分 API Key（前4位和后4位）
     masked_key = api_key[:4] + "..." + api_key[-4:] if len(api_key) > 8 else "****"
-    st.caption(f"当前配置: {masked_key}")
+    st.caption(f"当前配置: {masked_key}，代理初始化耗时: {init_ms:.0f} ms")
 else:
     st.warning(f"⚠️ 请配置 {api_key_label}")
 
@@ -198,7 +248,13 @@ if st.session_state.uploaded_file_name:
                     messages = []
                     current_todos = {}
                     
-                    for chunk in run_patentbot_async_stream(st.session_state.uploaded_file_name):
+                    run = run_manager.start(
+                        bot,
+                        st.session_state.uploaded_file_name,
+                        cache=ArtifactCache() if use_cache and not use_leader else None,
+                    )
+                    st.session_state.run = run
+                    for chunk in run.stream():
                         todo_list = []
                         for step, data in chunk.items():
                             if step == "tools" and data.get("todos"):
@@ -248,7 +304,7 @@ if st.session_state.uploaded_file_name:
                 all_completed = True
                 if current_todos:
                     for status in current_todos.values():
-                        if status.lower() == "pending":
+                        if status.lower() in ("pending", "cancelled"):
                             all_completed = False
                             break
                 else: